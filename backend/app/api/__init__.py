@@ -11,6 +11,8 @@ from .search import router as search_router
 from .access import router as access_router
 from .health import router as health_router
 from .publishers import router as publishers_router
+from .ask import router as ask_router
+from .audio import router as audio_router
 
 # Define router configurations
 ROUTER_CONFIGS = {
@@ -25,7 +27,9 @@ ROUTER_CONFIGS = {
     "access": {"prefix": "/access", "tags": ["access"]},
     "health": {"prefix": "/health", "tags": ["health"]},
     "sessions": {"prefix": "/sessions", "tags": ["sessions"]},
-    "publishers": {"prefix": "/publishers", "tags": ["publishers"]}
+    "publishers": {"prefix": "/publishers", "tags": ["publishers"]},
+    "ask": {"prefix": "/ask", "tags": ["ask"]},
+    "audio": {"prefix": "/audio", "tags": ["audio"]}
 }
 
 router = APIRouter()
@@ -42,4 +46,6 @@ router.include_router(search_router, **ROUTER_CONFIGS["search"])
 router.include_router(access_router, **ROUTER_CONFIGS["access"])
 router.include_router(health_router, **ROUTER_CONFIGS["health"])
 router.include_router(sessions_router, **ROUTER_CONFIGS["sessions"])
-router.include_router(publishers_router, **ROUTER_CONFIGS["publishers"])
\ No newline at end of file
+router.include_router(publishers_router, **ROUTER_CONFIGS["publishers"])
+router.include_router(ask_router, **ROUTER_CONFIGS["ask"])
+router.include_router(audio_router, **ROUTER_CONFIGS["audio"])
@@ -6,6 +6,7 @@ from ..core.database import get_db
 from ..core.config import settings
 from ..auth.jwt import get_current_user
 from ..models import Document, User, DocumentStatus, DocumentAccess, AccessLogs
+from ..services.counters import document_counters
 
 router = APIRouter()
 
@@ -256,6 +257,9 @@ async def track_access(
     db.add(access_log)
     db.commit()
     db.refresh(access)
+
+    if action == "download":
+        document_counters.increment_download(access.document_id)
     
     return {
         "message": "Access tracked successfully",
@@ -0,0 +1,114 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncIterator, Dict, Optional
+import json
+import logging
+
+from app.core.database import get_async_db
+from app.core.security import get_current_user
+from app.models import User
+from app.schemas.ask import AskRequest
+from app.services.rag_pipeline import rag_pipeline, StageTimer
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _chat_context(body: AskRequest) -> Optional[Dict[str, Any]]:
+    if not body.chat_history:
+        return None
+    return {"chat_history": [message.model_dump() for message in body.chat_history]}
+
+@router.post("")
+async def ask(
+    body: AskRequest,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> Any:
+    """
+    Answer a question over the documents the user can access. Per-stage
+    durations are returned in the Server-Timing header.
+    """
+    timer = StageTimer()
+    try:
+        result = await rag_pipeline.answer(
+            body.query,
+            current_user,
+            db,
+            top_n=body.top_n,
+            temperature=body.temperature,
+            max_tokens=body.max_tokens,
+            context=_chat_context(body),
+            timer=timer
+        )
+    except Exception as e:
+        logger.error(f"Error answering question: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to answer the question",
+            headers={"Server-Timing": timer.server_timing()}
+        )
+    response.headers["Server-Timing"] = timer.server_timing()
+    return result
+
+@router.post("/stream")
+async def ask_stream(
+    body: AskRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Answer a question over the library, streamed as Server-Sent Events:
+    `retrieval` (source chunks and stage timings), then `token` events,
+    then `usage` (or `error`) and finally `done`.
+    """
+    async def events() -> AsyncIterator[str]:
+        timer = StageTimer()
+        try:
+            documents = await rag_pipeline.retrieve(body.query, current_user, db, top_n=body.top_n, timer=timer)
+        except Exception as e:
+            logger.error(f"Retrieval failed: {str(e)}")
+            yield _sse("error", {"error": "Retrieval failed"})
+            yield _sse("done", {})
+            return
+
+        yield _sse("retrieval", {
+            "documents": [
+                {
+                    "text": doc["text"],
+                    "metadata": doc.get("metadata", {}),
+                    "score": doc.get("score"),
+                    "rerank_score": doc.get("rerank_score")
+                }
+                for doc in documents
+            ],
+            "timings_ms": timer.timings
+        })
+
+        async for event in rag_pipeline.manager.stream_answer(
+            body.query,
+            documents,
+            temperature=body.temperature,
+            max_tokens=body.max_tokens,
+            context=_chat_context(body)
+        ):
+            event_type = event.pop("type")
+            yield _sse(event_type, event)
+
+        yield _sse("done", {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Disable proxy buffering so tokens reach the client immediately
+            "X-Accel-Buffering": "no"
+        }
+    )
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, Dict, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Path, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+MEDIA_TYPES = {".mp3": "audio/mpeg", ".wav": "audio/wav"}
+# Read size for partial responses
+CHUNK_SIZE = 64 * 1024
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def _audio_dir() -> str:
+    return os.path.join(settings.UPLOAD_DIR, "audio")
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range Range header into (start, end) inclusive.
+
+    Returns None for a header this endpoint ignores (multiple ranges, other
+    units); raises 416 for a range outside the file.
+    """
+    match = _RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(0, size - int(last))
+        end = size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+async def _read_range(path: str, start: int, end: int) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await asyncio.to_thread(f.read, min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+@router.get("/{filename}")
+async def stream_audio(request: Request, filename: str = Path(...)):
+    """
+    Stream a generated audio file (DocumentAudio.file_url = /audio/{filename}).
+
+    Supports single byte ranges (206) so players can seek without
+    downloading the whole file, and ETag/Last-Modified revalidation (304).
+    With AUDIO_X_ACCEL_REDIRECT set, the body is handed to nginx, which
+    serves it (and its ranges) with sendfile.
+    """
+    if filename != os.path.basename(filename) or filename.startswith("."):
+        raise HTTPException(status_code=404, detail="Audio not found")
+    media_type = MEDIA_TYPES.get(os.path.splitext(filename)[1].lower())
+    path = os.path.join(_audio_dir(), filename)
+    try:
+        stat = await asyncio.to_thread(os.stat, path)
+    except FileNotFoundError:
+        stat = None
+    if media_type is None or stat is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    # Audio files are written once under a new name and replaced atomically
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    headers: Dict[str, str] = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": f"public, max-age={settings.AUDIO_CACHE_MAX_AGE}",
+    }
+
+    if _not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    if settings.AUDIO_X_ACCEL_REDIRECT:
+        # nginx answers Range/conditional requests itself from the internal location
+        headers["X-Accel-Redirect"] = f"{settings.AUDIO_X_ACCEL_REDIRECT.rstrip('/')}/{filename}"
+        return Response(headers=headers, media_type=media_type)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        byte_range = _parse_range(range_header, stat.st_size)
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                _read_range(path, start, end),
+                status_code=206,
+                headers=headers,
+                media_type=media_type
+            )
+
+    return FileResponse(path, headers=headers, media_type=media_type, stat_result=stat)
@@ -11,11 +11,14 @@ from app.models import User, UserRole  # Import directly from app.models
 from app.schemas.auth import Token, TokenData, UserCreate
 from app.schemas.user import UserResponse  # Import UserResponse from user.py
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    verify_and_update_password,
+    get_password_hash_async,
     create_access_token,
-    get_current_user
+    get_current_user,
+    oauth2_scheme
 )
+from app.core.auth_cache import auth_cache
+from app.models.user_session import UserSession, hash_token
 
 router = APIRouter()
 
@@ -28,7 +31,17 @@ async def login(
     OAuth2 compatible token login, get an access token for future requests
     """
     user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    # Hashing runs on the password pool; new_hash is set when the stored
+    # hash uses a deprecated scheme or cost and should be migrated
+    is_valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -36,10 +49,16 @@ async def login(
         )
     
     # Update last login time using direct SQL to avoid triggering updated_at
-    db.execute(
-        text("UPDATE users SET last_login = :now WHERE id = :user_id"),
-        {"now": datetime.utcnow(), "user_id": user.id}
-    )
+    if new_hash:
+        db.execute(
+            text("UPDATE users SET last_login = :now, hashed_password = :hashed_password WHERE id = :user_id"),
+            {"now": datetime.utcnow(), "hashed_password": new_hash, "user_id": user.id}
+        )
+    else:
+        db.execute(
+            text("UPDATE users SET last_login = :now WHERE id = :user_id"),
+            {"now": datetime.utcnow(), "user_id": user.id}
+        )
     db.commit()
     
     # Refresh user object to get updated last_login
@@ -56,6 +75,23 @@ async def login(
         user=user  # Pass the entire user object, Pydantic will handle the conversion
     )
 
+@router.post("/logout")
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> dict:
+    """
+    End the current session and drop its cached token
+    """
+    db.query(UserSession).filter(
+        UserSession.user_id == current_user.id,
+        UserSession.token_hash == hash_token(token)
+    ).delete(synchronize_session=False)
+    db.commit()
+    auth_cache.invalidate_token(token)
+    return {"message": "Logged out successfully"}
+
 @router.post("/register")
 async def register(
     email: str,
@@ -81,7 +117,7 @@ async def register(
         )
     
     # Create new user with all required fields
-    hashed_password = get_password_hash(password)
+    hashed_password = await get_password_hash_async(password)
     now = datetime.utcnow()
     user = User(
         email=email,
@@ -130,7 +166,7 @@ async def create_admin_user(
         )
     
     # Create admin user with all necessary fields
-    hashed_password = get_password_hash(password)
+    hashed_password = await get_password_hash_async(password)
     admin = User(
         email=email,
         username=username,
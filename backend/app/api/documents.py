@@ -5,11 +5,14 @@ from datetime import datetime
 import os
 import hashlib
 import logging
+from sqlalchemy import func, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 import json
+import asyncio
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.core.config import settings
 from app.core.security import get_current_user
 from app.core.exceptions import (
@@ -20,13 +23,15 @@ from app.core.exceptions import (
 from app.models import (
     User, Document, DocumentStatus, DocumentAccessLevel, FileType, Category, UserRole,
     DocumentChapter, DocumentSection, DocumentAudio, DocumentQA, ReadingProgress,
-    DocumentAudioStatus, ReadingProgressType, ReadingProgressStatus, Tag, Author
+    DocumentAudioStatus, ReadingProgressType, ReadingProgressStatus, Tag, Author, Voice
 )
 from app.schemas.document import (
     DocumentCreate, DocumentUpdate, DocumentResponse, DocumentList,
     DocumentChapterBase, DocumentSectionBase, DocumentAudioBase, DocumentQABase
 )
 from app.services.document import DocumentService
+from app.services.counters import document_counters
+from app.services.chapter_audio import chapter_audio_jobs, read_playlist
 # Comment out vector store import
 # from app.services.vector import VectorStore
 from app.schemas.author import AuthorResponse
@@ -37,6 +42,27 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Relationships read by DocumentResponse; loaded eagerly because lazy loads
+# are not allowed on an AsyncSession
+DOCUMENT_RESPONSE_OPTIONS = (
+    joinedload(Document.category),
+    joinedload(Document.publisher),
+    joinedload(Document.file_type_rel),
+    joinedload(Document.language_rel),
+    joinedload(Document.added_by_user),
+    selectinload(Document.authors),
+    selectinload(Document.tags),
+)
+
+def _document_response(document: Document) -> DocumentResponse:
+    """DocumentResponse of a document loaded with DOCUMENT_RESPONSE_OPTIONS, counters included"""
+    response = DocumentResponse.model_validate(document)
+    # Views and downloads buffered in memory but not flushed yet
+    pending_views, pending_downloads = document_counters.pending_counts(document.id)
+    response.view_count = (document.view_count or 0) + pending_views
+    response.download_count = (document.download_count or 0) + pending_downloads
+    return response
+
 @router.post("/upload", response_model=DocumentResponse)
 async def upload_document(
     title: str = Form(...),
@@ -148,7 +174,7 @@ async def list_documents(
     access_level: Optional[DocumentAccessLevel] = None,
     search: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> DocumentList:
     """
     List documents with filtering and pagination
@@ -156,50 +182,41 @@ async def list_documents(
     try:
         logger.info("Starting document list query")
         
-        # Build base query with joins
-        query = db.query(Document).options(
-            joinedload(Document.category),
-            joinedload(Document.publisher),
-            joinedload(Document.file_type_rel),
-            joinedload(Document.language_rel),
-            joinedload(Document.added_by_user),
-        )
+        # Build filtered statement
+        query = select(Document)
         
         # Apply filters
         if category_id:
-            query = query.filter(Document.category_id == category_id)
+            query = query.where(Document.category_id == category_id)
         if publisher_id:
-            query = query.filter(Document.publisher_id == publisher_id)
+            query = query.where(Document.publisher_id == publisher_id)
         if status:
-            query = query.filter(Document.status == status)
+            query = query.where(Document.status == status)
         if access_level:
-            query = query.filter(Document.access_level == access_level)
+            query = query.where(Document.access_level == access_level)
         if search:
             search_filter = (
                 (Document.title.ilike(f"%{search}%")) |
                 (Document.description.ilike(f"%{search}%"))
             )
-            query = query.filter(search_filter)
+            query = query.where(search_filter)
         
         # Get total count
-        total = query.count()
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
         logger.info(f"Total documents found: {total}")
         
         # Apply pagination
-        documents = query.offset(skip).limit(limit).all()
+        result = await db.execute(
+            query.options(*DOCUMENT_RESPONSE_OPTIONS).offset(skip).limit(limit)
+        )
+        documents = result.scalars().unique().all()
         logger.info(f"Retrieved {len(documents)} documents")
         
         return DocumentList(
             total=total,
             skip=skip,
             limit=limit,
-            documents=[
-                DocumentResponse(
-                    **doc.__dict__,
-                    authors=[AuthorResponse.from_orm(a) for a in getattr(doc, 'authors', [])],
-                    tags=[TagResponse.from_orm(t) for t in getattr(doc, 'tags', [])],
-                ) for doc in documents
-            ]
+            documents=[_document_response(doc) for doc in documents]
         )
     except Exception as e:
         logger.error(f"Error in list_documents: {str(e)}", exc_info=True)
@@ -212,27 +229,25 @@ async def list_documents(
 async def get_document(
     document_id: UUID = Path(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> DocumentResponse:
     """
     Get document details by ID
     """
-    document = db.query(Document).filter(Document.id == document_id).first()
+    document = await db.scalar(
+        select(Document)
+        .options(*DOCUMENT_RESPONSE_OPTIONS)
+        .where(Document.id == document_id)
+    )
     if not document:
         raise HTTPException(
             status_code=404,
             detail="Document not found"
         )
     
-    # Update view count
-    document.view_count += 1
-    db.commit()
-    
-    return DocumentResponse(
-        **document.__dict__,
-        authors=[AuthorResponse.from_orm(a) for a in getattr(document, 'authors', [])],
-        tags=[TagResponse.from_orm(t) for t in getattr(document, 'tags', [])],
-    )
+    # Buffer the view instead of updating the row on every read
+    document_counters.increment_view(document.id)
+    return _document_response(document)
 
 @router.put("/{document_id}", response_model=DocumentResponse)
 async def update_document(
@@ -522,18 +537,67 @@ async def get_document_summary(
 async def get_document_audio(
     document_id: UUID = Path(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> DocumentAudioBase:
     """Get document audio"""
     logger.info(f"Getting audio for document {document_id}")
     
-    audio = db.query(DocumentAudio).filter(
-        DocumentAudio.document_id == document_id,
-        DocumentAudio.status == DocumentAudioStatus.COMPLETED
-    ).first()
+    audio = await db.scalar(
+        select(DocumentAudio).where(
+            DocumentAudio.document_id == document_id,
+            DocumentAudio.status == DocumentAudioStatus.COMPLETED,
+            # Summary audio; chapter audio is listed by /audio/playlist
+            DocumentAudio.chapter_id.is_(None)
+        ).order_by(DocumentAudio.created_at.desc()).limit(1)
+    )
     
     if not audio:
         logger.error(f"Audio not found for document {document_id}")
         raise HTTPException(status_code=404, detail="Audio not found")
     
-    return audio 
\ No newline at end of file
+    return audio
+
+@router.get("/{document_id}/audio/playlist")
+async def get_document_audio_playlist(
+    document_id: UUID = Path(...),
+    language: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> Any:
+    """
+    Get the chapter playlist of a document.
+
+    Chapters are listed in reading order with their status; completed ones
+    can be played while the rest is still rendering.
+    """
+    document = await db.get(Document, document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    playlist = await asyncio.to_thread(read_playlist, document_id, language or document.language)
+    if playlist is None:
+        raise HTTPException(status_code=404, detail="Chapter audio not available")
+    playlist["rendering"] = chapter_audio_jobs.is_running(document_id)
+    return playlist
+
+@router.post("/{document_id}/audio/chapters", status_code=202)
+async def generate_chapter_audio(
+    document_id: UUID = Path(...),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> Any:
+    """(Re)generate per-chapter audio of a document in the background"""
+    document = await db.get(Document, document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if current_user.role != UserRole.ADMIN and document.added_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    voice_id = await db.scalar(
+        select(Voice.id).where(Voice.language == document.language, Voice.is_active == True).limit(1)
+    ) or settings.DEFAULT_VOICE_ID
+    file_path = os.path.join(settings.UPLOAD_DIR, document.file_name)
+    if not chapter_audio_jobs.start(document.id, file_path, document.language, voice_id):
+        raise HTTPException(status_code=409, detail="Chapter audio is already being generated")
+    return {"document_id": str(document.id), "status": "processing"}
+
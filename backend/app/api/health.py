@@ -1,15 +1,28 @@
+import asyncio
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from ..core.database import get_db
+from ..core.database import get_async_db
 from ..core.qdrant_client import get_qdrant_client
 from qdrant_client.http.exceptions import UnexpectedResponse
+from ..services.counters import document_counters
+from ..core.auth_cache import auth_cache
+from ..core.security import password_hash_pool
+from ..core.readiness import readiness
+from ..core.http_client import llm_http_client
+from ..core.rate_limiter import llm_rate_limiter
+from ..core.executors import process_pool
+from ..services.llm_cache import llm_response_cache
+from ..services.chapter_audio import chapter_audio_jobs
+from ..services.tts_cache import tts_segment_cache
+from ..core.config import settings
 
 router = APIRouter()
 
 @router.get("/health")
 async def health_check(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     qdrant = Depends(get_qdrant_client)
 ):
     """
@@ -24,8 +37,8 @@ async def health_check(
     # Check PostgreSQL connection
     try:
         # Test both connection and schema
-        db.execute(text("SELECT current_database(), current_schema()"))
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT current_database(), current_schema()"))
+        await db.execute(text("SELECT 1"))
     except Exception as e:
         status["status"] = "unhealthy"
         status["postgresql"] = "disconnected"
@@ -33,10 +46,40 @@ async def health_check(
 
     # Check Qdrant Cloud connection
     try:
-        qdrant.get_collections()
+        # The Qdrant client is synchronous; keep it off the event loop
+        await asyncio.to_thread(qdrant.get_collections)
     except Exception as e:
         status["status"] = "unhealthy"
         status["qdrant_cloud"] = "disconnected"
         status["qdrant_cloud_error"] = str(e)
 
-    return status 
\ No newline at end of file
+    return status 
+@router.get("/stats")
+async def runtime_stats():
+    """
+    In-process runtime statistics (per worker)
+    """
+    return {
+        "document_counters": document_counters.stats(),
+        "auth_cache": auth_cache.stats(),
+        "password_hash_pool": password_hash_pool.stats(),
+        "llm_http_client": llm_http_client.stats(),
+        "llm_rate_limiter": llm_rate_limiter.stats(),
+        "llm_response_cache": llm_response_cache.stats(),
+        "chapter_audio_jobs": chapter_audio_jobs.stats(),
+        "tts_segment_cache": tts_segment_cache.stats(),
+        "process_pool": process_pool.stats()
+    }
+
+@router.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: 503 until model warm-up has finished
+    """
+    if not settings.WARMUP_MODELS:
+        # Models load lazily on first use, nothing to wait for
+        return {"ready": True, "components": {}}
+    status = readiness.status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+    return status
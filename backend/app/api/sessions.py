@@ -16,6 +16,7 @@ from app.schemas.session import (
     SessionListResponse
 )
 from app.core.security import get_current_user, get_user_from_token
+from app.core.auth_cache import auth_cache
 from app.models.user import User
 
 router = APIRouter()
@@ -34,7 +35,8 @@ async def create_session(
     ).first()
     
     if existing_session:
-        # Update existing session
+        # Update existing session; the previous token must stop validating
+        auth_cache.invalidate_user(current_user.id)
         existing_session.token = session_data.token
         existing_session.ip_address = session_data.ip_address
         existing_session.user_agent = session_data.user_agent
@@ -87,6 +89,7 @@ async def delete_session(
     
     db.delete(session)
     db.commit()
+    auth_cache.invalidate_token(session.token)
     return {"message": "Session deleted successfully"}
 
 @router.post("/access-logs", response_model=AccessLogResponse)
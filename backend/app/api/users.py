@@ -7,7 +7,8 @@ from sqlalchemy import text
 
 from app.core.database import get_db
 from app.core.config import settings
-from app.core.security import get_current_user, create_access_token, get_password_hash, verify_password
+from app.core.security import get_current_user, create_access_token, get_password_hash_async, verify_password_async
+from app.core.auth_cache import auth_cache
 from app.models import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserList, UserVerification, PasswordReset, PasswordChange
 from app.services.email import generate_verification_code, send_verification_email, get_code_expiration
@@ -63,6 +64,7 @@ async def update_user_profile(
         
         db.commit()
         db.refresh(current_user)
+        auth_cache.invalidate_user(current_user.id)
         return current_user
     except Exception as e:
         db.rollback()
@@ -138,6 +140,7 @@ async def update_user_role(
     user.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(user)
+    auth_cache.invalidate_user(user.id)
     
     return user
 
@@ -168,6 +171,7 @@ async def update_user_status(
     user.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(user)
+    auth_cache.invalidate_user(user.id)
     
     return user
 
@@ -231,12 +235,13 @@ async def reset_password(
     await VerificationService.verify_reset_code(reset_data.code, user, db)
     
     # Update password
-    user.hashed_password = get_password_hash(reset_data.new_password)
+    user.hashed_password = await get_password_hash_async(reset_data.new_password)
     user.verification_code = None
     user.verification_code_expires = None
     user.updated_at = datetime.now(timezone.utc)
     
     db.commit()
+    auth_cache.invalidate_user(user.id)
     
     return {"message": "Password has been reset successfully"}
 
@@ -250,16 +255,17 @@ async def change_password(
     Change user's password by providing old and new password
     """
     # Verify old password
-    if not verify_password(password_data.old_password, current_user.hashed_password):
+    if not await verify_password_async(password_data.old_password, current_user.hashed_password):
         raise HTTPException(
             status_code=400,
             detail="Incorrect old password"
         )
     
     # Update to new password
-    current_user.hashed_password = get_password_hash(password_data.new_password)
+    current_user.hashed_password = await get_password_hash_async(password_data.new_password)
     current_user.updated_at = datetime.now(timezone.utc)
     
     db.commit()
+    auth_cache.invalidate_user(current_user.id)
     
     return {"message": "Password has been changed successfully"} 
\ No newline at end of file
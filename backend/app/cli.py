@@ -0,0 +1,541 @@
+"""
+Command line tools.
+
+    python -m app.cli import <directory | manifest.csv | manifest.jsonl> \
+        --category <id|slug> --user <email|id> [--workers N] [--dry-run]
+
+import loads a catalogue in bulk instead of going through /documents/upload
+one file at a time:
+
+1. Files are hashed in parallel and deduplicated against each other and the
+   database up front; files with an unsupported or mismatching content type
+   and invalid metadata are reported and skipped.
+2. Files are copied to UPLOAD_DIR and Document rows, author and tag links
+   are inserted in batches of --batch-size (missing authors and tags are
+   created by name).
+3. Extraction (process pool for heavy formats), chunking, embedding and
+   summarization run for --workers documents at a time; each document turns
+   AVAILABLE or REJECTED as it finishes.
+
+A manifest has one row per file: path (relative to the manifest) and
+optionally title, description, isbn, publication_year, language, category,
+version, access_level, authors and tags (lists, or ";"-separated in CSV).
+Summary and chapter audio are not rendered; use
+POST /documents/{id}/audio/chapters for the titles that need it.
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID, uuid4
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.exceptions import InvalidFileError
+from app.core.executors import process_pool
+from app.models import (
+    Author, Category, Document, DocumentAccessLevel, DocumentStatus, FileType, Tag, User
+)
+from app.models.document_author import DocumentAuthor
+from app.models.document_tag import DocumentTag
+from app.models.language import Language
+from app.services.extractors import SNIFF_BYTES, extract_file_async, resolve_extractor
+from app.services.slug import SlugService
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_EXTENSIONS = (".csv", ".jsonl")
+LIST_FIELDS = ("authors", "tags")
+
+def _split_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(";")
+    return [str(item).strip() for item in value if str(item).strip()]
+
+def read_manifest(path: str) -> List[Dict[str, Any]]:
+    """Entries of a CSV or JSONL manifest, paths resolved against its directory"""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    entries = []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows: Iterable[Dict[str, Any]] = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for line_number, row in enumerate(rows, start=2 if path.lower().endswith(".csv") else 1):
+            row = {key.strip(): value for key, value in row.items() if key and value not in (None, "")}
+            if not row.get("path"):
+                logger.warning(f"{path}:{line_number}: no path, skipped")
+                continue
+            row["path"] = os.path.normpath(os.path.join(base_dir, row["path"]))
+            for field in LIST_FIELDS:
+                row[field] = _split_list(row.get(field))
+            entries.append(row)
+    return entries
+
+def scan_directory(path: str) -> List[Dict[str, Any]]:
+    """One entry per supported file under a directory"""
+    entries = []
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            ext = os.path.splitext(name)[1].lower().lstrip(".")
+            if name.startswith(".") or ext not in settings.ALLOWED_FILE_TYPES:
+                continue
+            entries.append({"path": os.path.join(root, name), "authors": [], "tags": []})
+    return entries
+
+def hash_file(path: str) -> Tuple[str, int, bytes]:
+    """MD5 (same as DocumentProcessor.get_file_hash), size and first bytes of a file"""
+    hasher = hashlib.md5()
+    size = 0
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+        hasher.update(head)
+        size = len(head)
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(block)
+            size += len(block)
+    return hasher.hexdigest(), size, head
+
+class ImportProgress:
+    """Progress lines on stderr with throughput and ETA"""
+
+    def __init__(self, total: int, stream=sys.stderr):
+        self.total = total
+        self.stream = stream
+        self.done = 0
+        self.counts: Dict[str, int] = {}
+        self.started = time.monotonic()
+
+    def update(self, status: str, title: str, detail: str = "") -> None:
+        self.done += 1
+        self.counts[status] = self.counts.get(status, 0) + 1
+        elapsed = time.monotonic() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate else 0.0
+        print(
+            f"[{self.done}/{self.total}] {status:<9} {title[:60]}"
+            f"{f' ({detail})' if detail else ''}  {rate * 60:.1f}/min, ETA {eta / 60:.0f} min",
+            file=self.stream,
+            flush=True
+        )
+
+class BulkImporter:
+    def __init__(
+        self,
+        user_id: UUID,
+        default_category_id: Optional[UUID],
+        default_language: str,
+        workers: int,
+        batch_size: int,
+        embed: bool = True,
+        summarize: bool = True
+    ):
+        self.user_id = user_id
+        self.default_category_id = default_category_id
+        self.default_language = default_language
+        self.workers = workers
+        self.batch_size = batch_size
+        self.embed = embed
+        self.summarize = summarize
+        self.skipped: List[Tuple[str, str]] = []
+        self._vector_store = None
+        self._embed_lock = asyncio.Lock()
+        self._summary_service = None
+        self._processor = None
+
+    def _skip(self, path: str, reason: str) -> None:
+        self.skipped.append((path, reason))
+        logger.warning(f"Skipping {path}: {reason}")
+
+    # Preparation
+
+    def prepare(self, db: Session, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Hash, deduplicate and validate entries; returns the ones to import"""
+        from app.services.document import DocumentService
+
+        with ThreadPoolExecutor(max_workers=max(4, self.workers)) as executor:
+            hashed = list(executor.map(self._hash_entry, entries))
+
+        # Duplicates within the import, then against the catalogue
+        unique: Dict[str, Dict[str, Any]] = {}
+        for entry in hashed:
+            if entry is None:
+                continue
+            if entry["file_hash"] in unique:
+                self._skip(entry["path"], f"duplicate of {unique[entry['file_hash']]['path']}")
+            else:
+                unique[entry["file_hash"]] = entry
+        existing_hashes = self._existing(db, Document.file_hash, list(unique))
+        existing_isbns = self._existing(db, Document.isbn, [e["isbn"] for e in unique.values() if e.get("isbn")])
+
+        file_types = {file_type.extension: file_type.id for file_type in db.query(FileType).all()}
+        languages = {code for (code,) in db.query(Language.code).all()}
+        categories: Dict[str, UUID] = {}
+        for category in db.query(Category).all():
+            categories[str(category.id)] = category.id
+            if category.slug:
+                categories[category.slug] = category.id
+
+        accepted = []
+        seen_isbns = set()
+        for entry in unique.values():
+            path = entry["path"]
+            if entry["file_hash"] in existing_hashes:
+                self._skip(path, "already in the catalogue")
+                continue
+            ext = os.path.splitext(path)[1].lower().lstrip(".")
+            entry["file_type"] = file_types.get(ext)
+            entry["language"] = entry.get("language") or self.default_language
+            entry["category_id"] = categories.get(str(entry["category"])) if entry.get("category") else self.default_category_id
+            entry["title"] = entry.get("title") or os.path.splitext(os.path.basename(path))[0].replace("_", " ")
+            entry["version"] = entry.get("version") or "1.0"
+            isbn = entry.get("isbn")
+
+            reason = None
+            if entry["file_type"] is None:
+                reason = f"unsupported file type: {ext}"
+            elif entry["category_id"] is None:
+                reason = f"unknown category: {entry.get('category')}"
+            elif entry["language"] not in languages:
+                reason = f"unknown language: {entry['language']}"
+            elif not DocumentService.validate_isbn(isbn):
+                reason = f"invalid ISBN: {isbn}"
+            elif isbn and (isbn in existing_isbns or isbn in seen_isbns):
+                reason = f"ISBN already used: {isbn}"
+            elif not self._parse_year(entry):
+                reason = f"invalid publication year: {entry.get('publication_year')}"
+            elif not DocumentService.validate_version(entry["version"]):
+                reason = f"invalid version: {entry['version']}"
+            else:
+                try:
+                    entry["access_level"] = DocumentAccessLevel(entry.get("access_level") or DocumentAccessLevel.PUBLIC.value)
+                    resolve_extractor(os.path.basename(path), entry.pop("head"))
+                except ValueError:
+                    reason = f"invalid access level: {entry.get('access_level')}"
+                except InvalidFileError as e:
+                    reason = e.detail
+            if reason:
+                self._skip(path, reason)
+                continue
+            if isbn:
+                seen_isbns.add(isbn)
+            accepted.append(entry)
+        return accepted
+
+    @staticmethod
+    def _parse_year(entry: Dict[str, Any]) -> bool:
+        """Convert publication_year to int in place; False if it is not a valid year"""
+        from app.services.document import DocumentService
+
+        year = entry.get("publication_year")
+        if year is None:
+            return True
+        try:
+            year = int(str(year).strip())
+        except ValueError:
+            return False
+        if not DocumentService.validate_publication_year(year):
+            return False
+        entry["publication_year"] = year
+        return True
+
+    def _copy_entry(self, entry: Dict[str, Any]) -> bool:
+        try:
+            shutil.copyfile(entry["path"], entry["file_path"])
+            return True
+        except OSError as e:
+            # Drop a partial copy
+            if os.path.exists(entry["file_path"]):
+                os.remove(entry["file_path"])
+            self._skip(entry["path"], f"copy failed: {str(e)}")
+            return False
+
+    def _hash_entry(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            file_hash, size, head = hash_file(entry["path"])
+        except OSError as e:
+            self._skip(entry["path"], str(e))
+            return None
+        if not size:
+            self._skip(entry["path"], "empty file")
+            return None
+        return {**entry, "file_hash": file_hash, "file_size": size, "head": head}
+
+    @staticmethod
+    def _existing(db: Session, column, values: List[str]) -> set:
+        found = set()
+        for start in range(0, len(values), 1000):
+            found.update(value for (value,) in db.query(column).filter(column.in_(values[start:start + 1000])).all())
+        return found
+
+    # Insertion
+
+    def _named_ids(self, db: Session, model, names: Iterable[str]) -> Dict[str, UUID]:
+        """Ids of authors/tags by name, creating the missing ones"""
+        names = sorted(set(names))
+        ids = {}
+        for start in range(0, len(names), 1000):
+            batch = names[start:start + 1000]
+            ids.update({row.name: row.id for row in db.query(model.id, model.name).filter(model.name.in_(batch)).all()})
+        for name in names:
+            if name in ids:
+                continue
+            base_slug = SlugService.convert_to_slug(name) or "item"
+            row = model(name=name, slug=SlugService.generate_unique_slug(db, model, base_slug))
+            db.add(row)
+            # Flushed one by one so the next slug check sees this one
+            db.flush()
+            ids[name] = row.id
+        return ids
+
+    def insert(self, db: Session, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Copy files to UPLOAD_DIR and insert documents with their links, in batches"""
+        author_ids = self._named_ids(db, Author, (name for entry in entries for name in entry["authors"]))
+        tag_ids = self._named_ids(db, Tag, (name for entry in entries for name in entry["tags"]))
+        db.commit()
+
+        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+        timestamp = int(datetime.utcnow().timestamp())
+        inserted = []
+        for start in range(0, len(entries), self.batch_size):
+            batch = entries[start:start + self.batch_size]
+            for entry in batch:
+                entry["id"] = uuid4()
+                entry["file_name"] = f"{timestamp}_{entry['file_hash'][:8]}_{os.path.basename(entry['path'])}"
+                entry["file_path"] = os.path.join(settings.UPLOAD_DIR, entry["file_name"])
+            with ThreadPoolExecutor(max_workers=max(4, self.workers)) as executor:
+                copied = list(executor.map(self._copy_entry, batch))
+            batch = [entry for entry, ok in zip(batch, copied) if ok]
+            if not batch:
+                continue
+
+            try:
+                db.execute(insert(Document), [
+                    {
+                        "id": entry["id"],
+                        "title": entry["title"],
+                        "description": entry.get("description"),
+                        "publication_year": entry.get("publication_year"),
+                        "isbn": entry.get("isbn"),
+                        "file_name": entry["file_name"],
+                        "file_hash": entry["file_hash"],
+                        "file_type": entry["file_type"],
+                        "file_size": entry["file_size"],
+                        "status": DocumentStatus.PENDING,
+                        "category_id": entry["category_id"],
+                        "access_level": entry["access_level"],
+                        "language": entry["language"],
+                        "version": entry["version"],
+                        "added_by": self.user_id
+                    }
+                    for entry in batch
+                ])
+                author_links = [
+                    {"document_id": entry["id"], "author_id": author_ids[name], "created_at": datetime.utcnow()}
+                    for entry in batch for name in dict.fromkeys(entry["authors"])
+                ]
+                if author_links:
+                    db.execute(insert(DocumentAuthor), author_links)
+                tag_links = [
+                    {"document_id": entry["id"], "tag_id": tag_ids[name]}
+                    for entry in batch for name in dict.fromkeys(entry["tags"])
+                ]
+                if tag_links:
+                    db.execute(insert(DocumentTag), tag_links)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                for entry in batch:
+                    try:
+                        os.remove(entry["file_path"])
+                    except OSError:
+                        pass
+                    self._skip(entry["path"], f"insert failed: {str(e)}")
+                continue
+            inserted.extend(batch)
+            logger.info(f"Inserted {len(inserted)}/{len(entries)} documents")
+        return inserted
+
+    # Processing
+
+    def _chunk(self, entry: Dict[str, Any], extracted) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Chunk a document and store its chapters and sections (blocking)"""
+        db = SessionLocal()
+        try:
+            return self._processor.process_file(entry["file_path"], db, extracted=extracted)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _finish(document_id: UUID, status: DocumentStatus, summary: Optional[str] = None) -> None:
+        values: Dict[str, Any] = {"status": status}
+        if summary:
+            values["ai_summary"] = summary
+        db = SessionLocal()
+        try:
+            db.execute(update(Document).where(Document.id == document_id).values(**values))
+            db.commit()
+        finally:
+            db.close()
+
+    async def _process_one(self, entry: Dict[str, Any], progress: ImportProgress) -> None:
+        try:
+            extracted = await extract_file_async(entry["file_path"])
+            chunks, metadata_list = await asyncio.to_thread(self._chunk, entry, extracted)
+            if not chunks:
+                await asyncio.to_thread(self._finish, entry["id"], DocumentStatus.REJECTED)
+                progress.update("rejected", entry["title"], "no text")
+                return
+
+            if self.embed:
+                for metadata in metadata_list:
+                    metadata.update({
+                        "id": f"{entry['id']}_{metadata['chunk_id']}",
+                        "document_id": str(entry["id"]),
+                        "title": entry["title"]
+                    })
+                # The encoder uses every core already; one document at a time
+                async with self._embed_lock:
+                    stored = await asyncio.to_thread(self._vector_store.store_documents, chunks, metadata_list)
+                if not stored:
+                    raise RuntimeError("vector store rejected the chunks")
+
+            summary = None
+            if self.summarize:
+                summary = await self._summary_service.generate_summary(" ".join(chunks))
+
+            await asyncio.to_thread(self._finish, entry["id"], DocumentStatus.AVAILABLE, summary)
+            progress.update("ok", entry["title"], f"{len(chunks)} chunks")
+        except Exception as e:
+            logger.error(f"Import of {entry['path']} failed: {str(e)}")
+            try:
+                await asyncio.to_thread(self._finish, entry["id"], DocumentStatus.REJECTED)
+            except Exception as db_error:
+                logger.error(f"Could not reject {entry['id']}: {str(db_error)}")
+            progress.update("failed", entry["title"], str(e)[:80])
+
+    async def process(self, entries: List[Dict[str, Any]]) -> ImportProgress:
+        """Extract, chunk, embed and summarize documents, --workers at a time"""
+        from app.services.document import DocumentProcessor
+
+        self._processor = DocumentProcessor()
+        if self.embed:
+            from app.services.vector import VectorStore
+            self._vector_store = VectorStore(qdrant_url=settings.QDRANT_URL, qdrant_api_key=settings.QDRANT_API_KEY)
+        if self.summarize:
+            from app.services.summary_service import SummaryService
+            self._summary_service = SummaryService()
+
+        progress = ImportProgress(len(entries))
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def run(entry: Dict[str, Any]) -> None:
+            async with semaphore:
+                await self._process_one(entry, progress)
+
+        await asyncio.gather(*(run(entry) for entry in entries))
+        return progress
+
+def _resolve_user(db: Session, value: str) -> User:
+    try:
+        user = db.query(User).filter(User.id == UUID(value)).first()
+    except ValueError:
+        user = db.query(User).filter(User.email == value).first()
+    if user is None:
+        raise SystemExit(f"User not found: {value}")
+    return user
+
+def _resolve_category(db: Session, value: Optional[str]) -> Optional[UUID]:
+    if value is None:
+        return None
+    try:
+        category = db.query(Category).filter(Category.id == UUID(value)).first()
+    except ValueError:
+        category = db.query(Category).filter(Category.slug == value).first()
+    if category is None:
+        raise SystemExit(f"Category not found: {value}")
+    return category.id
+
+def cmd_import(args: argparse.Namespace) -> int:
+    source = args.source
+    if os.path.isdir(source):
+        entries = scan_directory(source)
+    elif source.lower().endswith(MANIFEST_EXTENSIONS):
+        entries = read_manifest(source)
+    else:
+        raise SystemExit(f"Source must be a directory or a {'/'.join(MANIFEST_EXTENSIONS)} manifest: {source}")
+    print(f"{len(entries)} files listed in {source}", file=sys.stderr)
+
+    db = SessionLocal()
+    try:
+        user = _resolve_user(db, args.user)
+        importer = BulkImporter(
+            user_id=user.id,
+            default_category_id=_resolve_category(db, args.category),
+            default_language=args.language,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            embed=not args.skip_embedding,
+            summarize=not args.skip_summary
+        )
+        entries = importer.prepare(db, entries)
+        print(f"{len(entries)} to import, {len(importer.skipped)} skipped", file=sys.stderr)
+        if args.dry_run or not entries:
+            for path, reason in importer.skipped:
+                print(f"skipped {path}: {reason}", file=sys.stderr)
+            return 0
+        entries = importer.insert(db, entries)
+    finally:
+        db.close()
+
+    try:
+        progress = asyncio.run(importer.process(entries))
+    finally:
+        process_pool.shutdown()
+
+    for path, reason in importer.skipped:
+        print(f"skipped {path}: {reason}", file=sys.stderr)
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(progress.counts.items()))
+    print(f"Imported {len(entries)} documents: {summary or 'nothing processed'}; {len(importer.skipped)} skipped", file=sys.stderr)
+    return 1 if progress.counts.get("failed") else 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="senselib", description="SenseLib command line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Bulk import documents from a directory or manifest")
+    import_parser.add_argument("source", help="Directory of files, or a .csv/.jsonl manifest")
+    import_parser.add_argument("--user", required=True, help="Email or id of the user the documents are added by")
+    import_parser.add_argument("--category", help="Default category (id or slug) for entries without one")
+    import_parser.add_argument("--language", default="vi", help="Default language code (default: vi)")
+    import_parser.add_argument(
+        "--workers", type=int, default=settings.PROCESS_POOL_WORKERS * 2,
+        help="Documents processed concurrently"
+    )
+    import_parser.add_argument("--batch-size", type=int, default=500, help="Rows per insert batch")
+    import_parser.add_argument("--skip-embedding", action="store_true", help="Do not store chunks in the vector store")
+    import_parser.add_argument("--skip-summary", action="store_true", help="Do not generate AI summaries")
+    import_parser.add_argument("--dry-run", action="store_true", help="Validate and report without importing")
+    import_parser.set_defaults(func=cmd_import)
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO)
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import threading
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple, Union
+from uuid import UUID
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.core.config import settings
+from app.models import User
+from app.models.user_session import hash_token
+
+logger = logging.getLogger(__name__)
+
+class AuthCache:
+    """
+    TTL cache of validated tokens for get_current_user.
+
+    Entries map sha256(token) to a snapshot of the user's columns plus the
+    moment the entry stops being valid (the earliest of the cache TTL, the
+    session expiry and the JWT expiry). Invalidation is per process, so the
+    TTL bounds how long other workers can serve a stale entry.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # token_hash -> (user_id, user snapshot, valid_until timestamp)
+        self._entries: "OrderedDict[str, Tuple[str, Dict[str, Any], float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _timestamp(value: Optional[Union[datetime, int, float]]) -> Optional[float]:
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            return value.timestamp()
+        return float(value)
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return the cached user snapshot for a token, or None on miss"""
+        if self.ttl_seconds <= 0:
+            return None
+        key = hash_token(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(
+        self,
+        token: str,
+        user: User,
+        session_expires_at: Optional[datetime] = None,
+        token_expires_at: Optional[Union[datetime, int, float]] = None
+    ) -> None:
+        """Cache a validated token for the given user"""
+        if self.ttl_seconds <= 0:
+            return
+        valid_until = time.time() + self.ttl_seconds
+        for expiry in (self._timestamp(session_expires_at), self._timestamp(token_expires_at)):
+            if expiry is not None:
+                valid_until = min(valid_until, expiry)
+        key = hash_token(token)
+        with self._lock:
+            self._entries[key] = (str(user.id), user.to_dict(), valid_until)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_token(self, token: str) -> None:
+        """Drop a single token, e.g. on logout"""
+        with self._lock:
+            self._entries.pop(hash_token(token), None)
+
+    def invalidate_user(self, user_id: Union[str, UUID]) -> None:
+        """Drop every cached token of a user (role change, deactivation, session deletion)"""
+        user_id = str(user_id)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[0] == user_id]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached tokens for user {user_id}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "entries": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+    @staticmethod
+    def attach(db: Session, snapshot: Dict[str, Any]) -> User:
+        """
+        Rebuild a User from a snapshot and attach it to the request session
+        without a SELECT, so handlers can still modify and commit it.
+        """
+        user = User.from_dict(snapshot)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+# Process-wide auth cache
+auth_cache = AuthCache(
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES
+)
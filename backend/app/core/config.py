@@ -1,4 +1,5 @@
 from typing import List, Optional
+from pydantic import Field
 from pydantic_settings import BaseSettings
 from pathlib import Path
 import os
@@ -8,137 +9,231 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Settings(BaseSettings):
+    # Values are read from the environment when Settings() is instantiated;
+    # fields without a default are required and fail validation if unset.
+
     # Project info - required from env
     PROJECT_NAME: str = "SenseLib"
     API_V1_STR: str = "/api"
-    if not PROJECT_NAME:
-        raise ValueError("PROJECT_NAME environment variable is not set")
     
     # API settings - required from env
-    API_HOST: str = os.getenv("API_HOST")
-    if not API_HOST:
-        raise ValueError("API_HOST environment variable is not set")
-    
-    API_PORT: int = int(os.getenv("API_PORT", "8000"))
-    DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
+    API_HOST: str
+    API_PORT: int = 8000
+    DEBUG: bool = True
     
     # CORS settings - required from env
-    BACKEND_CORS_ORIGINS_STR: str = os.getenv("BACKEND_CORS_ORIGINS", "")
-    if not BACKEND_CORS_ORIGINS_STR:
-        raise ValueError("BACKEND_CORS_ORIGINS environment variable is not set")
+    BACKEND_CORS_ORIGINS_STR: str = Field(validation_alias="BACKEND_CORS_ORIGINS", min_length=1)
     
     @property
     def BACKEND_CORS_ORIGINS(self) -> List[str]:
         return [origin.strip() for origin in self.BACKEND_CORS_ORIGINS_STR.split(",") if origin.strip()]
     
     # File upload settings - required from env
-    UPLOAD_DIR: str = os.getenv("UPLOAD_DIR")
-    if not UPLOAD_DIR:
-        raise ValueError("UPLOAD_DIR environment variable is not set")
+    UPLOAD_DIR: str
     
     # Database settings - required from env
-    DATABASE_URL: str = os.getenv("DATABASE_URL")
-    if not DATABASE_URL:
-        raise ValueError("DATABASE_URL environment variable is not set")
+    DATABASE_URL: str
     
     # Database connection settings - required from env
-    DB_HOST: str = os.getenv("DB_HOST")
-    if not DB_HOST:
-        raise ValueError("DB_HOST environment variable is not set")
-    
-    DB_PORT: int = int(os.getenv("DB_PORT", "5432"))
-    DB_NAME: str = os.getenv("DB_NAME")
-    if not DB_NAME:
-        raise ValueError("DB_NAME environment variable is not set")
-    
-    DB_USER: str = os.getenv("DB_USER")
-    if not DB_USER:
-        raise ValueError("DB_USER environment variable is not set")
-    
-    DB_PASSWORD: str = os.getenv("DB_PASSWORD")
-    if not DB_PASSWORD:
-        raise ValueError("DB_PASSWORD environment variable is not set")
-    
-    DB_SCHEMA: str = os.getenv("DB_SCHEMA", "public")
+    DB_HOST: str
+    DB_PORT: int = 5432
+    DB_NAME: str
+    DB_USER: str
+    DB_PASSWORD: str
+    DB_SCHEMA: str = "public"
     
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
         return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
     
     # Database pool settings - required from env
-    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
-    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
-    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
-    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
-    DB_ECHO: bool = os.getenv("DB_ECHO", "False").lower() == "true"
-    
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_ECHO: bool = False
+
+    # Async (asyncpg) pool used by request handlers; the sync pool above
+    # serves scripts, migrations and not-yet-migrated routes
+    DB_ASYNC_POOL_SIZE: int = 10
+    DB_ASYNC_MAX_OVERFLOW: int = 20
+
+    # View/download counters are buffered in memory and flushed in batches
+    COUNTER_FLUSH_INTERVAL_SECONDS: float = 10
+
     # JWT settings - required from env
-    JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY")
-    if not JWT_SECRET_KEY:
-        raise ValueError("JWT_SECRET_KEY environment variable is not set")
-    
-    JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    JWT_SECRET_KEY: str
+    JWT_ALGORITHM: str = "HS256"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    # Password hashing - first scheme hashes new passwords, the rest are rehashed on login
+    PASSWORD_HASH_SCHEMES_STR: str = Field("bcrypt", validation_alias="PASSWORD_HASH_SCHEMES")
+
+    @property
+    def PASSWORD_HASH_SCHEMES(self) -> List[str]:
+        return [scheme.strip() for scheme in self.PASSWORD_HASH_SCHEMES_STR.split(",") if scheme.strip()]
+
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    # Validated token cache used by get_current_user (0 disables it)
+    AUTH_CACHE_TTL_SECONDS: float = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
     
     # Grok API settings
     GROK_API_URL: str = "https://api.x.ai/v1/chat/completions"
     GROK_API_MODEL: str = "grok-3"
-    GROK_API_KEY: str = os.getenv("GROK_API_KEY")
-    if not GROK_API_KEY:
-        raise ValueError("GROK_API_KEY environment variable is not set")
+    GROK_API_KEY: str
+
+    # Shared HTTP connection pool for LLM calls (see core/http_client.py)
+    LLM_HTTP_POOL_LIMIT: int = 32
+    LLM_HTTP_LIMIT_PER_HOST: int = 16
+    LLM_HTTP_KEEPALIVE_SECONDS: float = 300
+    LLM_HTTP_DNS_CACHE_SECONDS: int = 600
+    LLM_HTTP_TIMEOUT_SECONDS: float = 900
+    LLM_HTTP_VERIFY_SSL: bool = False
+
+    # LLM rate limiting shared by summarization and RAG (see core/rate_limiter.py)
+    LLM_RATE_LIMIT_RPM: float = 60  # requests per minute, 0 disables
+    LLM_RATE_LIMIT_TPM: float = 100000  # tokens per minute, 0 disables
+    LLM_MAX_CONCURRENCY: int = 8  # in-flight calls per worker
+    LLM_INTERACTIVE_RESERVED_SLOTS: int = 2  # slots batch work may not use
+    LLM_GLOBAL_SLOTS: int = 0  # cross-worker cap via Postgres advisory locks, 0 disables
+    LLM_INTERACTIVE_WAIT_SECONDS: float = 30  # give up on an answer after waiting this long
     
     # Qdrant Vector Database settings - required from env
-    QDRANT_URL: str = os.getenv("QDRANT_URL")
-    if not QDRANT_URL:
-        raise ValueError("QDRANT_URL environment variable is not set")
+    QDRANT_URL: str
     
-    QDRANT_API_KEY: str = os.getenv("QDRANT_API_KEY")
-    if not QDRANT_API_KEY:
-        raise ValueError("QDRANT_API_KEY environment variable is not set")
+    QDRANT_API_KEY: str
     
     # SMTP settings - required from env
-    SMTP_HOST: str = os.getenv("SMTP_HOST")
-    if not SMTP_HOST:
-        raise ValueError("SMTP_HOST environment variable is not set")
-    
-    SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
-    SMTP_USERNAME: str = os.getenv("SMTP_USERNAME")
-    if not SMTP_USERNAME:
-        raise ValueError("SMTP_USERNAME environment variable is not set")
-    
-    SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD")
-    if not SMTP_PASSWORD:
-        raise ValueError("SMTP_PASSWORD environment variable is not set")
+    SMTP_HOST: str
+    SMTP_PORT: int = 587
+    SMTP_USERNAME: str
+    SMTP_PASSWORD: str
     
     # Email settings (using SMTP settings)
-    MAIL_USERNAME: str = SMTP_USERNAME
-    MAIL_PASSWORD: str = SMTP_PASSWORD
-    MAIL_FROM: str = SMTP_USERNAME
-    MAIL_PORT: int = SMTP_PORT
-    MAIL_SERVER: str = SMTP_HOST
+    @property
+    def MAIL_USERNAME(self) -> str:
+        return self.SMTP_USERNAME
+
+    @property
+    def MAIL_PASSWORD(self) -> str:
+        return self.SMTP_PASSWORD
+
+    @property
+    def MAIL_FROM(self) -> str:
+        return self.SMTP_USERNAME
+
+    @property
+    def MAIL_PORT(self) -> int:
+        return self.SMTP_PORT
+
+    @property
+    def MAIL_SERVER(self) -> str:
+        return self.SMTP_HOST
+
     MAIL_STARTTLS: bool = True
     MAIL_SSL_TLS: bool = False
     USE_CREDENTIALS: bool = True
     
     # Summary settings
-    # Settings for embedding chunks
-    EMBEDDING_CHUNK_SIZE: int = 512  # Kích thước chunk cho embedding (nhỏ hơn để tối ưu tìm kiếm)
-    EMBEDDING_CHUNK_OVERLAP: int = 50  # Độ chồng lấp giữa các chunk embedding
-    
-    # Settings for summarization chunks
-    SUMMARY_CHUNK_SIZE: int = 3072  # Kích thước chunk cho tóm tắt (lớn hơn để giữ ngữ cảnh)
-    SUMMARY_CHUNK_OVERLAP: int = 100  # Độ chồng lấp giữa các chunk tóm tắt
+    # Settings for embedding chunks (measured in tokens of the embedding model)
+    EMBEDDING_MODEL_NAME: str = "dangvantuan/vietnamese-embedding"
+    EMBEDDING_CHUNK_SIZE: int = 200  # Số token tối đa mỗi chunk embedding (giới hạn bởi max length của mô hình)
+    EMBEDDING_CHUNK_OVERLAP: int = 40  # Số token chồng lấp giữa các chunk embedding
+    
+    # Settings for summarization chunks (measured in estimated LLM tokens)
+    SUMMARY_CHUNK_SIZE: int = 2048  # Số token mỗi chunk tóm tắt (lớn hơn để giữ ngữ cảnh)
+    SUMMARY_CHUNK_OVERLAP: int = 64  # Số token chồng lấp giữa các chunk tóm tắt
     SUMMARY_MAX_LENGTH: int = 500  # Độ dài tối đa của tóm tắt cuối cùng (khoảng 400-500 từ)
     SUMMARY_MIN_LENGTH: int = 100  # Độ dài tối thiểu của tóm tắt cuối cùng (khoảng 80-100 từ)
+    # Hierarchical reduce: chunk summaries are merged in batches of at most
+    # SUMMARY_REDUCE_FAN_IN summaries / SUMMARY_REDUCE_MAX_INPUT_TOKENS tokens
+    SUMMARY_REDUCE_MAX_INPUT_TOKENS: int = 6000
+    SUMMARY_REDUCE_FAN_IN: int = 8
+    SUMMARY_REDUCE_MAX_TOKENS: int = 400  # Độ dài tối đa của mỗi bản tóm tắt trung gian
+    # Durable cache of chunk/reduce summaries (SQLite file, keep it outside UPLOAD_DIR)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = "data/llm_cache.sqlite3"
+    
+    # Query expansion (see services/query_expansion.py): variants are encoded
+    # in one batch, searched in one Qdrant request and fused with RRF
+    QUERY_EXPANSION_ENABLED: bool = True
+    QUERY_EXPANSION_LLM: bool = False  # Thêm các cách diễn đạt do LLM sinh ra (tốn thêm một lần gọi)
+    QUERY_EXPANSION_MAX_VARIANTS: int = 4
+    QUERY_SYNONYMS_PATH: Optional[str] = None
+    
+    # RAG context assembly (see services/context_packer.py)
+    RAG_CONTEXT_MAX_TOKENS: int = 3000  # Số token tối đa cho phần tài liệu trong prompt
+    RAG_DEDUP_THRESHOLD: float = 0.8  # Ngưỡng tương đồng MinHash để loại đoạn trùng lặp
     
     # Audio settings
     AUDIO_DIR: str = "uploads/audio"
     DEFAULT_VOICE_ID: str = "vi-VN-Standard-A"
-    
+    # Text-to-speech (see services/tts.py): text is split into sentence-aligned
+    # segments that are synthesized in parallel on TTS_MAX_WORKERS threads
+    TTS_ENGINE: str = "gtts"  # "gtts" (trực tuyến) hoặc "espeak" (chạy offline)
+    TTS_MAX_WORKERS: int = max(1, min(8, os.cpu_count() or 1))
+    TTS_SEGMENT_MAX_CHARS: int = 500  # Độ dài tối đa mỗi đoạn tổng hợp
+    TTS_SEGMENT_TIMEOUT_SECONDS: int = 120
+    TTS_ESPEAK_BINARY: str = "espeak-ng"
+    # Synthesized segments cached by (engine, voice, language, text hash)
+    TTS_CACHE_ENABLED: bool = True
+    TTS_CACHE_DIR: str = "data/tts_cache"
+    TTS_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024  # 2GB
+    # Audio streaming (/api/audio/{filename})
+    AUDIO_CACHE_MAX_AGE: int = 86400
+    # nginx internal location aliased to UPLOAD_DIR/audio, e.g. "/protected-audio";
+    # when set, nginx serves the file bodies with sendfile
+    AUDIO_X_ACCEL_REDIRECT: Optional[str] = None
+    
+    # Cover thumbnails (see services/cover_images.py)
+    COVER_WIDTHS: List[int] = [160, 320, 640]  # Chiều rộng các ảnh bìa thu nhỏ (px)
+    COVER_DEFAULT_WIDTH: int = 320
+    COVER_JPEG_QUALITY: int = 82
+    COVER_WEBP_QUALITY: int = 80
+    # Cache lifetime of /uploads/images (file names are content-hashed)
+    IMAGES_CACHE_MAX_AGE: int = 31536000
+    
+    # Shared process pool for CPU-heavy jobs (cover rendering, parsing, OCR)
+    PROCESS_POOL_WORKERS: int = max(1, min(4, os.cpu_count() or 1))
+    
+    # Text extraction of legacy binary Office files (doc, ppt), converted with
+    # LibreOffice when it is installed
+    LIBREOFFICE_BINARY: str = "soffice"
+    LIBREOFFICE_TIMEOUT_SECONDS: int = 180
+    
+    # OCR of image-only PDF pages (needs pytesseract, tesseract with the
+    # listed language packs and poppler)
+    OCR_ENABLED: bool = True
+    OCR_LANGUAGES: str = "vie+eng"
+    OCR_TESSERACT_CMD: str = "tesseract"
+    OCR_DPI: int = 300
+    # Pages with less extracted text than this (and an image) are OCRed
+    OCR_MIN_PAGE_CHARS: int = 10
+    # OCR results cached by rendered page hash
+    OCR_CACHE_DIR: str = "data/ocr_cache"
+    
+    # Startup behaviour
+    # Run Base.metadata.create_all on startup. Off unless set explicitly
+    # (e.g. DB_CREATE_ALL=true in a local .env); the schema is otherwise
+    # managed by migrations only
+    DB_CREATE_ALL: bool = False
+    # Load the retrieval models during startup instead of on the first request;
+    # /health/ready reports 503 until warm-up has finished
+    WARMUP_MODELS: bool = False
+
+    @property
+    def SHOULD_CREATE_SCHEMA(self) -> bool:
+        return self.DB_CREATE_ALL
+
     class Config:
         case_sensitive = True
         env_file = ".env"
         env_file_encoding = "utf-8"
+        extra = "ignore"
         
     # Allowed file types for document upload
     ALLOWED_FILE_TYPES: list[str] = [
@@ -1,10 +1,13 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
-from typing import Generator
+from typing import Any, AsyncGenerator, Dict, Generator
 from .config import settings
 import logging
+import re
+import ssl
 from urllib.parse import urlparse, parse_qs, urlencode
 
 logger = logging.getLogger(__name__)
@@ -49,6 +52,84 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _asyncpg_connect_args(query: str) -> Dict[str, Any]:
+    """
+    Translate libpq DSN query parameters into asyncpg.connect() arguments.
+
+    SQLAlchemy passes URL query parameters to asyncpg as keyword arguments,
+    and asyncpg rejects the libpq names, so they are mapped here (sslmode to
+    ssl, options/application_name to server_settings, connect_timeout to
+    timeout). Unknown parameters are logged and dropped.
+    """
+    connect_args: Dict[str, Any] = {}
+    server_settings: Dict[str, str] = {}
+    ssl_files: Dict[str, str] = {}
+    for key, values in parse_qs(query).items():
+        value = values[-1]
+        if key == "sslmode":
+            # asyncpg accepts the libpq sslmode names
+            connect_args["ssl"] = value
+        elif key in ("sslrootcert", "sslcert", "sslkey"):
+            ssl_files[key] = value
+        elif key == "connect_timeout":
+            connect_args["timeout"] = float(value)
+        elif key == "application_name":
+            server_settings["application_name"] = value
+        elif key == "options":
+            # "-c name=value" and "--name=value" forms
+            for option in re.findall(r"(?:-c\s*|--)([\w.]+)=(\S+)", " ".join(values)):
+                server_settings[option[0].replace("-", "_")] = option[1]
+        else:
+            logger.warning(f"Ignoring database URL parameter {key} for the async engine")
+
+    if ssl_files:
+        # Certificates need an SSLContext; verification follows sslmode
+        mode = connect_args.get("ssl", "verify-full" if "sslrootcert" in ssl_files else "require")
+        context = ssl.create_default_context(cafile=ssl_files.get("sslrootcert"))
+        if "sslcert" in ssl_files:
+            context.load_cert_chain(ssl_files["sslcert"], ssl_files.get("sslkey"))
+        if mode != "verify-full":
+            context.check_hostname = False
+        if mode not in ("verify-ca", "verify-full"):
+            context.verify_mode = ssl.CERT_NONE
+        connect_args["ssl"] = context
+
+    if settings.DB_SCHEMA:
+        server_settings["search_path"] = settings.DB_SCHEMA
+    if server_settings:
+        connect_args["server_settings"] = server_settings
+    return connect_args
+
+# Async engine for request handlers. The sync engine above stays in use for
+# scripts, migrations and handlers that have not been migrated yet.
+# asyncpg does not understand libpq query parameters, so they are moved from
+# the URL into connect_args.
+_parsed_async = urlparse(SQLALCHEMY_DATABASE_URL)
+ASYNC_SQLALCHEMY_DATABASE_URL = _parsed_async._replace(
+    scheme="postgresql+asyncpg",
+    query=""
+).geturl()
+
+async_connect_args = _asyncpg_connect_args(_parsed_async.query)
+
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    pool_size=settings.DB_ASYNC_POOL_SIZE,
+    max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    echo=settings.DB_ECHO,
+    connect_args=async_connect_args
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 # Dependency
@@ -57,4 +138,8 @@ def get_db() -> Generator[Session, None, None]:
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
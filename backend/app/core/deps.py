@@ -4,7 +4,7 @@ from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.user import User
-from app.models.user_session import UserSession
+from app.models.user_session import UserSession, hash_token
 from app.models.enums import UserRole
 from app.core.security import get_current_user, get_current_active_user, oauth2_scheme
 
@@ -22,7 +22,7 @@ def get_current_session(
 ) -> UserSession:
     session = db.query(UserSession).filter(
         UserSession.user_id == current_user.id,
-        UserSession.token == token,
+        UserSession.token_hash == hash_token(token),
         UserSession.expires_at > datetime.utcnow()
     ).first()
     
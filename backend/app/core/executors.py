@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ProcessPool:
+    """
+    Shared process pool for CPU-heavy work (image rendering, parsing of
+    large files, OCR) that would otherwise hold the GIL or the event loop.
+
+    The pool is created on first use so workers that never render anything
+    do not fork. Submitted callables and their arguments must be picklable,
+    i.e. module-level functions.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._running = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                logger.info(f"Starting process pool with {self.max_workers} workers")
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run func(*args, **kwargs) in a worker process"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._running += 1
+        try:
+            result = await loop.run_in_executor(self._get_executor(), partial(func, *args, **kwargs))
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def submit(self, func: Callable, *args, **kwargs):
+        """Submit from synchronous code; returns a concurrent.futures.Future"""
+        return self._get_executor().submit(func, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "started": self._executor is not None,
+                "running": self._running,
+                "completed": self.completed,
+                "failed": self.failed
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+# Process-wide pool for CPU-bound jobs
+process_pool = ProcessPool(max_workers=settings.PROCESS_POOL_WORKERS)
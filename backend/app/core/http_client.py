@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import ssl
+from typing import Any, Dict, Optional
+import aiohttp
+import certifi
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class LLMHttpClient:
+    """
+    App-scoped aiohttp session for calls to the LLM API.
+
+    A single TCPConnector is shared by every SummaryService instance so
+    keep-alive connections (and their TLS sessions) are reused across
+    chunks and documents. The session is created lazily on first use and
+    closed from the app lifespan. aiohttp only speaks HTTP/1.1; reuse comes
+    from keep-alive plus the per-host connection limit.
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.requests = 0
+        self.connections_created = 0
+
+    def _ssl_context(self) -> ssl.SSLContext:
+        ssl_context = ssl.create_default_context(cafile=certifi.where())
+        if not settings.LLM_HTTP_VERIFY_SSL:
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+        return ssl_context
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            self.requests += 1
+
+        async def on_connection_create_end(session, context, params):
+            # Every new connection means a fresh TCP + TLS handshake
+            self.connections_created += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        return trace_config
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            ssl=self._ssl_context(),
+            limit=settings.LLM_HTTP_POOL_LIMIT,
+            limit_per_host=settings.LLM_HTTP_LIMIT_PER_HOST,
+            ttl_dns_cache=settings.LLM_HTTP_DNS_CACHE_SECONDS,
+            keepalive_timeout=settings.LLM_HTTP_KEEPALIVE_SECONDS,
+            enable_cleanup_closed=True
+        )
+        logger.info(
+            f"Creating shared LLM HTTP session (limit={settings.LLM_HTTP_POOL_LIMIT}, "
+            f"per_host={settings.LLM_HTTP_LIMIT_PER_HOST})"
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=settings.LLM_HTTP_TIMEOUT_SECONDS),
+            headers={"User-Agent": "SenseLib/1.0"},
+            trace_configs=[self._trace_config()]
+        )
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Sessions are bound to the loop they were created on (scripts
+            # calling asyncio.run get their own)
+            self._session = None
+            self._loop = loop
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._session is None or self._session.closed:
+                self._session = self._create_session()
+        return self._session
+
+    async def close(self) -> None:
+        """Close the shared session and its connection pool"""
+        session, self._session = self._session, None
+        if session is not None and not session.closed:
+            await session.close()
+            logger.info("Closed shared LLM HTTP session")
+
+    def stats(self) -> Dict[str, Any]:
+        connector = self._session.connector if self._session is not None and not self._session.closed else None
+        return {
+            "open": connector is not None,
+            "requests": self.requests,
+            "connections_created": self.connections_created,
+            "pool_limit": settings.LLM_HTTP_POOL_LIMIT,
+            "limit_per_host": settings.LLM_HTTP_LIMIT_PER_HOST
+        }
+
+# Process-wide HTTP client for LLM calls
+llm_http_client = LLMHttpClient()
@@ -0,0 +1,37 @@
+"""add hashed token index to user sessions
+
+Revision ID: add_session_token_hash
+Revises:
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_session_token_hash'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Add token_hash column to user_sessions table
+    op.add_column('user_sessions', sa.Column('token_hash', sa.String(64), nullable=True))
+
+    # Backfill hashes for existing sessions (pgcrypto is created by init_db)
+    op.execute("CREATE EXTENSION IF NOT EXISTS pgcrypto")
+    op.execute("UPDATE user_sessions SET token_hash = encode(digest(token, 'sha256'), 'hex')")
+
+    # Make token_hash non-nullable after populating data
+    op.alter_column('user_sessions', 'token_hash',
+               existing_type=sa.String(64),
+               nullable=False)
+
+    # Index used by get_current_user, plus one for per-user active session lookups
+    op.create_index('idx_user_sessions_token_hash', 'user_sessions', ['token_hash'], unique=True)
+    op.create_index('idx_user_sessions_user_expires', 'user_sessions', ['user_id', 'expires_at'])
+
+def downgrade():
+    op.drop_index('idx_user_sessions_user_expires', table_name='user_sessions')
+    op.drop_index('idx_user_sessions_token_hash', table_name='user_sessions')
+    op.drop_column('user_sessions', 'token_hash')
@@ -0,0 +1,462 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes; lower values are served first
+INTERACTIVE = 0
+BATCH = 1
+
+LANE_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+# Longest a waiter blocks on one advisory slot before re-scanning all slots
+ADVISORY_WAIT_SECONDS = 1.0
+
+# SQLSTATE lock_not_available, raised when lock_timeout expires
+LOCK_NOT_AVAILABLE = "55P03"
+
+# Backoff applied on a 429/503 without a usable Retry-After header
+DEFAULT_RETRY_AFTER_SECONDS = 5.0
+
+# First key of pg_try_advisory_lock(int, int) used for cross-worker slots
+ADVISORY_LOCK_NAMESPACE = 0x5E15
+
+class LLMRateLimitTimeout(TimeoutError):
+    """Raised when a caller could not get an LLM slot within its timeout"""
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class TokenBucket:
+    """Token bucket refilled continuously up to a per-minute capacity"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)"""
+        self._refill(now)
+        # A single request larger than the bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Correct a reservation once the real usage is known (may go negative)"""
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+def _is_lock_timeout(error: DBAPIError) -> bool:
+    # asyncpg exposes sqlstate, psycopg2 pgcode
+    code = getattr(error.orig, "sqlstate", None) or getattr(error.orig, "pgcode", None)
+    return code == LOCK_NOT_AVAILABLE
+
+class AdvisorySlots:
+    """
+    Cross-worker concurrency slots backed by Postgres advisory locks.
+
+    A permit holds one pooled connection with a session-level advisory lock
+    on (ADVISORY_LOCK_NAMESPACE, slot) for the duration of the LLM call, so
+    at most `slots` calls run at once across all workers sharing the
+    database.
+
+    A waiter keeps a single connection: it tries every slot, then blocks in
+    pg_advisory_lock on one of them (rotating) so Postgres wakes it when
+    that slot is released. lock_timeout bounds the block to
+    ADVISORY_WAIT_SECONDS, after which all slots are tried again in case
+    another one was freed first.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self._rotation = itertools.count()
+
+    def _params(self, slot: int) -> Dict[str, int]:
+        return {"namespace": ADVISORY_LOCK_NAMESPACE, "slot": slot}
+
+    async def acquire(self) -> Tuple[Any, int]:
+        from app.core.database import async_engine
+        conn = await async_engine.connect()
+        try:
+            while True:
+                for slot in range(self.slots):
+                    result = await conn.execute(text("SELECT pg_try_advisory_lock(:namespace, :slot)"), self._params(slot))
+                    if result.scalar():
+                        return conn, slot
+                slot = next(self._rotation) % self.slots
+                # SET LOCAL ends with the transaction (at the latest when the connection is returned)
+                await conn.execute(text(f"SET LOCAL lock_timeout = '{int(ADVISORY_WAIT_SECONDS * 1000)}ms'"))
+                try:
+                    await conn.execute(text("SELECT pg_advisory_lock(:namespace, :slot)"), self._params(slot))
+                    return conn, slot
+                except DBAPIError as e:
+                    if not _is_lock_timeout(e):
+                        raise
+                    # Session-level locks survive the rollback
+                    await conn.rollback()
+        except BaseException:
+            # A cancelled pg_advisory_lock may have been granted: drop the
+            # connection so Postgres releases whatever it holds
+            await conn.invalidate()
+            await conn.close()
+            raise
+
+    async def release(self, handle: Tuple[Any, int]) -> None:
+        conn, slot = handle
+        try:
+            await conn.execute(text("SELECT pg_advisory_unlock(:namespace, :slot)"), self._params(slot))
+        except Exception as e:
+            # Session locks outlive the transaction; never return a
+            # connection that may still hold one to the pool
+            logger.error(f"Failed to release LLM slot {slot}: {str(e)}")
+            await conn.invalidate()
+        finally:
+            await conn.close()
+
+    def acquire_sync(self) -> Tuple[Any, int]:
+        from app.core.database import engine
+        conn = engine.connect()
+        try:
+            while True:
+                for slot in range(self.slots):
+                    result = conn.execute(text("SELECT pg_try_advisory_lock(:namespace, :slot)"), self._params(slot))
+                    if result.scalar():
+                        return conn, slot
+                slot = next(self._rotation) % self.slots
+                conn.execute(text(f"SET LOCAL lock_timeout = '{int(ADVISORY_WAIT_SECONDS * 1000)}ms'"))
+                try:
+                    conn.execute(text("SELECT pg_advisory_lock(:namespace, :slot)"), self._params(slot))
+                    return conn, slot
+                except DBAPIError as e:
+                    if not _is_lock_timeout(e):
+                        raise
+                    conn.rollback()
+        except BaseException:
+            conn.invalidate()
+            conn.close()
+            raise
+
+    def release_sync(self, handle: Tuple[Any, int]) -> None:
+        conn, slot = handle
+        try:
+            conn.execute(text("SELECT pg_advisory_unlock(:namespace, :slot)"), self._params(slot))
+        except Exception as e:
+            logger.error(f"Failed to release LLM slot {slot}: {str(e)}")
+            conn.invalidate()
+        finally:
+            conn.close()
+
+class LLMPermit:
+    """A granted LLM call; report real usage so the token bucket stays accurate"""
+
+    def __init__(self, limiter: "LLMRateLimiter", tokens: int, priority: int, slot: Optional[Tuple[Any, int]] = None):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.priority = priority
+        self.slot = slot
+
+    def record_usage(self, total_tokens: Optional[int]) -> None:
+        if total_tokens is not None:
+            self.limiter._adjust_tokens(total_tokens - self.tokens)
+            self.tokens = total_tokens
+
+class LLMRateLimiter:
+    """
+    Process-wide governor for LLM API calls.
+
+    Combines a requests-per-minute and a tokens-per-minute bucket with a cap
+    on in-flight calls. Waiters are served strictly by (priority, arrival),
+    so interactive RAG answers overtake queued batch summarization, and
+    batch calls may not use the slots reserved for interactive ones. A
+    429/503 from the provider pauses every caller for its Retry-After.
+    Works from both coroutines and worker threads.
+
+    Waiters do not poll: each sleeps until the refill time its bucket
+    reports, or until it is woken because it became the head of the queue
+    or a slot or tokens were released. Only the head waiter is woken, so
+    grants follow the (priority, arrival) order.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_concurrency: int,
+        interactive_reserved: int = 0,
+        global_slots: int = 0
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.batch_concurrency = max(1, self.max_concurrency - interactive_reserved)
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._slots = AdvisorySlots(global_slots) if global_slots > 0 else None
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[int, int]] = []
+        # ticket -> callable waking that waiter (asyncio.Event on its loop, or threading.Event)
+        self._wakers: Dict[Tuple[int, int], Callable[[], None]] = {}
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self.granted = {lane: 0 for lane in LANE_NAMES}
+        self.rate_limited = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+
+    def _wake_head(self) -> None:
+        """Wake the first waiter so it re-checks (lock held)"""
+        if self._waiters:
+            waker = self._wakers.get(self._waiters[0])
+            if waker is not None:
+                try:
+                    waker()
+                except RuntimeError:
+                    # The waiter's event loop is already closed
+                    pass
+
+    def _enqueue(self, priority: int, waker: Callable[[], None]) -> Tuple[int, int]:
+        ticket = (priority, next(self._sequence))
+        with self._lock:
+            heapq.heappush(self._waiters, ticket)
+            self._wakers[ticket] = waker
+        return ticket
+
+    def _dequeue(self, ticket: Tuple[int, int]) -> None:
+        with self._lock:
+            self._wakers.pop(ticket, None)
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._wake_head()
+
+    def _try_grant(self, ticket: Tuple[int, int], tokens: int) -> Optional[float]:
+        """
+        Grant the ticket if possible (returns 0). Otherwise returns the
+        seconds until the buckets refill, or None to wait for a wake-up
+        (not first in line, or every slot in use).
+        """
+        with self._lock:
+            if self._waiters[0] != ticket:
+                return None
+            priority = ticket[0]
+            limit = self.max_concurrency if priority == INTERACTIVE else self.batch_concurrency
+            if self._in_flight >= limit:
+                return None
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            delay = 0.0
+            if self._requests is not None:
+                delay = max(delay, self._requests.wait_time(1, now))
+            if self._tokens is not None:
+                delay = max(delay, self._tokens.wait_time(tokens, now))
+            if delay > 0:
+                return delay
+            if self._requests is not None:
+                self._requests.take(1)
+            if self._tokens is not None:
+                self._tokens.take(tokens)
+            heapq.heappop(self._waiters)
+            self._wakers.pop(ticket, None)
+            self._in_flight += 1
+            self.granted[priority] += 1
+            # The next waiter may fit as well
+            self._wake_head()
+            return 0.0
+
+    def _finish_wait(self, started: float) -> None:
+        with self._lock:
+            self.wait_seconds += time.monotonic() - started
+
+    def _wait_seconds(self, ticket: Tuple[int, int], delay: Optional[float], deadline: Optional[float]) -> Optional[float]:
+        """How long to sleep for a refused ticket; raises once its deadline has passed"""
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._dequeue(ticket)
+                with self._lock:
+                    self.timeouts += 1
+                raise LLMRateLimitTimeout(f"No LLM slot available ({LANE_NAMES[ticket[0]]} lane)")
+            return remaining if delay is None else min(delay, remaining)
+        return delay
+
+    def _adjust_tokens(self, delta: float) -> None:
+        if self._tokens is not None and delta:
+            with self._lock:
+                self._tokens.adjust(delta)
+                if delta < 0:
+                    # Unused tokens came back
+                    self._wake_head()
+
+    def _release_local(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._wake_head()
+
+    async def acquire(self, tokens: int, priority: int = BATCH, timeout: Optional[float] = None) -> LLMPermit:
+        """
+        Wait for an LLM slot.
+
+        Args:
+            tokens: Estimated tokens of the call (prompt + max completion)
+            priority: INTERACTIVE or BATCH
+            timeout: Maximum seconds to wait, None to wait indefinitely
+
+        Returns:
+            Permit to pass to release()
+        """
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        ticket = self._enqueue(priority, lambda: loop.call_soon_threadsafe(wakeup.set))
+        try:
+            while True:
+                # Cleared before checking, so a wake-up in between is not lost
+                wakeup.clear()
+                delay = self._try_grant(ticket, tokens)
+                if delay == 0:
+                    break
+                wait = self._wait_seconds(ticket, delay, deadline)
+                try:
+                    await asyncio.wait_for(wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._dequeue(ticket)
+            raise
+        slot = None
+        if self._slots is not None:
+            try:
+                slot = await self._slots.acquire()
+            except BaseException:
+                self._release_local()
+                raise
+        self._finish_wait(started)
+        return LLMPermit(self, tokens, priority, slot)
+
+    async def release(self, permit: LLMPermit) -> None:
+        try:
+            if permit.slot is not None:
+                await self._slots.release(permit.slot)
+        finally:
+            self._release_local()
+
+    def acquire_sync(self, tokens: int, priority: int = INTERACTIVE, timeout: Optional[float] = None) -> LLMPermit:
+        """Blocking variant of acquire() for code running in worker threads"""
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+        wakeup = threading.Event()
+        ticket = self._enqueue(priority, wakeup.set)
+        try:
+            while True:
+                wakeup.clear()
+                delay = self._try_grant(ticket, tokens)
+                if delay == 0:
+                    break
+                wakeup.wait(self._wait_seconds(ticket, delay, deadline))
+        except BaseException:
+            self._dequeue(ticket)
+            raise
+        slot = None
+        if self._slots is not None:
+            try:
+                slot = self._slots.acquire_sync()
+            except BaseException:
+                self._release_local()
+                raise
+        self._finish_wait(started)
+        return LLMPermit(self, tokens, priority, slot)
+
+    def release_sync(self, permit: LLMPermit) -> None:
+        try:
+            if permit.slot is not None:
+                self._slots.release_sync(permit.slot)
+        finally:
+            self._release_local()
+
+    @asynccontextmanager
+    async def limit(self, tokens: int, priority: int = BATCH, timeout: Optional[float] = None):
+        """async with limiter.limit(tokens) as permit: ... (one LLM call)"""
+        permit = await self.acquire(tokens, priority, timeout)
+        try:
+            yield permit
+        finally:
+            await self.release(permit)
+
+    @contextmanager
+    def limit_sync(self, tokens: int, priority: int = INTERACTIVE, timeout: Optional[float] = None):
+        """with limiter.limit_sync(tokens) as permit: ... (one LLM call)"""
+        permit = self.acquire_sync(tokens, priority, timeout)
+        try:
+            yield permit
+        finally:
+            self.release_sync(permit)
+
+    def note_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """Pause all callers after the provider answered 429/503"""
+        delay = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER_SECONDS
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            self.rate_limited += 1
+        logger.warning(f"LLM provider is rate limiting, pausing calls for {delay:.1f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "in_flight": self._in_flight,
+                "queued": len(self._waiters),
+                "max_concurrency": self.max_concurrency,
+                "batch_concurrency": self.batch_concurrency,
+                "granted": {LANE_NAMES[lane]: count for lane, count in self.granted.items()},
+                "rate_limited": self.rate_limited,
+                "timeouts": self.timeouts,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "paused_for_seconds": round(max(0.0, self._blocked_until - now), 3),
+                "requests_available": round(self._requests.tokens, 1) if self._requests is not None else None,
+                "tokens_available": round(self._tokens.tokens, 1) if self._tokens is not None else None,
+                "global_slots": self._slots.slots if self._slots is not None else 0
+            }
+
+# Process-wide limiter shared by SummaryService and RAGPromptManager
+llm_rate_limiter = LLMRateLimiter(
+    requests_per_minute=settings.LLM_RATE_LIMIT_RPM,
+    tokens_per_minute=settings.LLM_RATE_LIMIT_TPM,
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    interactive_reserved=settings.LLM_INTERACTIVE_RESERVED_SLOTS,
+    global_slots=settings.LLM_GLOBAL_SLOTS
+)
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Component states reported by /health/ready
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+class Readiness:
+    """
+    Tracks warm-up of heavy components (ML models, tokenizers).
+
+    Warm-up callables are registered by name and run one after another in a
+    worker thread, so startup does not block the event loop and liveness
+    (/health) answers while models are still loading.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._components: List[Tuple[str, Callable[[], Any]]] = []
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """Register a blocking callable that loads a component"""
+        with self._lock:
+            self._components.append((name, loader))
+            self._states[name] = {"status": PENDING}
+
+    def _set_state(self, name: str, **state) -> None:
+        with self._lock:
+            self._states[name] = state
+
+    async def _run(self) -> None:
+        for name, loader in list(self._components):
+            self._set_state(name, status=LOADING)
+            start = time.monotonic()
+            try:
+                await asyncio.to_thread(loader)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Warm-up of {name} failed: {str(e)}")
+                self._set_state(name, status=FAILED, error=str(e))
+                continue
+            elapsed = round(time.monotonic() - start, 2)
+            logger.info(f"Warm-up of {name} finished in {elapsed}s")
+            self._set_state(name, status=READY, seconds=elapsed)
+
+    def start(self) -> None:
+        """Start warm-up in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel a warm-up that is still running"""
+        if self._task is not None and not self._task.done():
+            # A loader already running in a thread finishes on its own
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    @property
+    def is_ready(self) -> bool:
+        with self._lock:
+            return all(state["status"] == READY for state in self._states.values())
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            components = {name: dict(state) for name, state in self._states.items()}
+        return {
+            "ready": all(state["status"] == READY for state in components.values()),
+            "components": components
+        }
+
+def _load_retriever() -> None:
+    from app.services.retrieval import get_retriever_singleton
+    get_retriever_singleton()
+
+def _load_query_processor() -> None:
+    from app.services.query import QueryProcessor
+    QueryProcessor.warm_up()
+
+# Process-wide readiness tracker
+readiness = Readiness()
+readiness.register("query_processor", _load_query_processor)
+readiness.register("retriever", _load_retriever)
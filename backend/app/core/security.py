@@ -1,5 +1,9 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Callable, Dict, Optional, Tuple, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -8,10 +12,20 @@ from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.core.database import get_db
 from app.models import User
-from app.models.user_session import UserSession
+from app.models.user_session import UserSession, hash_token
+from app.core.auth_cache import auth_cache
+
+logger = logging.getLogger(__name__)
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# The first scheme is used for new hashes; the others are only verified and
+# flagged for rehash. Hashes below BCRYPT_ROUNDS are flagged as well.
+pwd_context = CryptContext(
+    schemes=settings.PASSWORD_HASH_SCHEMES,
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS
+)
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
@@ -24,6 +38,98 @@ def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
 
+class PasswordHashPool:
+    """
+    Runs password hashing on a bounded thread pool so bcrypt never blocks
+    the event loop. Calls beyond the queue limit are rejected with 503
+    instead of piling up behind a burst of logins.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _dequeue(self, job: Dict[str, bool]) -> None:
+        # Called with the lock held, once per job: when it starts, or when
+        # it is cancelled before starting
+        if not job["dequeued"]:
+            job["dequeued"] = True
+            self._queued -= 1
+
+    def _wrap(self, job: Dict[str, bool], func: Callable, *args) -> Callable[[], Any]:
+        def run():
+            with self._lock:
+                self._dequeue(job)
+                self._running += 1
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self.completed += 1
+        return run
+
+    async def run(self, func: Callable, *args) -> Any:
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication service is busy, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            self._queued += 1
+        job = {"dequeued": False}
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, self._wrap(job, func, *args))
+        finally:
+            # A job cancelled while queued (client disconnect, shutdown) never runs
+            with self._lock:
+                self._dequeue(job)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "running": self._running,
+                "queued": self._queued,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+password_hash_pool = PasswordHashPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash without blocking the event loop"""
+    return await password_hash_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate password hash without blocking the event loop"""
+    return await password_hash_pool.run(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and, if its hash uses a deprecated scheme or cost,
+    return a replacement hash computed in the same pool call.
+
+    Returns:
+        Tuple[bool, Optional[str]]: (is valid, new hash or None)
+    """
+    return await password_hash_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def create_access_token(
     data: dict,
     expires_delta: Optional[timedelta] = None,
@@ -75,6 +181,11 @@ async def get_current_user(
     db: Session = Depends(get_db)
 ) -> User:
     """Get current user from JWT token"""
+    # Serve previously validated tokens without touching the database
+    cached_user = auth_cache.get(token)
+    if cached_user is not None:
+        return auth_cache.attach(db, cached_user)
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -99,10 +210,10 @@ async def get_current_user(
     if user is None:
         raise credentials_exception
     
-    # Check if user has an active session
+    # Check if user has an active session (indexed lookup on the token hash)
     active_session = db.query(UserSession).filter(
         UserSession.user_id == user.id,
-        UserSession.token == token,
+        UserSession.token_hash == hash_token(token),
         UserSession.expires_at > datetime.utcnow()
     ).first()
 
@@ -113,6 +224,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    auth_cache.set(token, user, active_session.expires_at, payload.get("exp"))
     return user
 
 async def get_current_active_user(
@@ -151,7 +263,8 @@ def create_session(
     ).first()
 
     if existing_session:
-        # Update existing session
+        # Update existing session; the previous token must stop validating
+        auth_cache.invalidate_user(user_id)
         existing_session.token = token
         existing_session.ip_address = ip_address
         existing_session.user_agent = user_agent
@@ -177,6 +290,7 @@ def delete_session(db: Session, session_id: str) -> bool:
     if session:
         db.delete(session)
         db.commit()
+        auth_cache.invalidate_token(session.token)
         return True
     return False
 
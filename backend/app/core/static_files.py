@@ -0,0 +1,18 @@
+from fastapi.staticfiles import StaticFiles
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    StaticFiles for content-addressed files (the name changes whenever the
+    content does), served with a long-lived immutable Cache-Control so
+    browsers never revalidate them.
+    """
+
+    def __init__(self, *args, max_age: int = 31536000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = f"public, max-age={max_age}, immutable"
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = self.cache_control
+        return response
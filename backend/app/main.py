@@ -1,26 +1,63 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
+import asyncio
+import logging
 import os
 import uvicorn
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine
 from app.models import *  # Import all models to ensure they are registered
+from app.models.base import BaseModel
+from app.services.counters import document_counters
+from app.core.security import password_hash_pool
+from app.services.audio_service import tts_executor
+from app.services.chapter_audio import chapter_audio_jobs
+from app.core.readiness import readiness
+from app.core.http_client import llm_http_client
+from app.core.executors import process_pool
+from app.core.static_files import ImmutableStaticFiles
 
-# Create required directories
+logger = logging.getLogger(__name__)
+
+# Create required directories (StaticFiles checks the directory at mount time)
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 os.makedirs(os.path.join(settings.UPLOAD_DIR, "images"), exist_ok=True)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create database tables only when DB_CREATE_ALL is set; otherwise migrations own the schema
+    if settings.SHOULD_CREATE_SCHEMA:
+        logger.info("Creating database tables")
+        await asyncio.to_thread(BaseModel.metadata.create_all, bind=engine)
+
+    # Periodically flush buffered view/download counters
+    document_counters.start()
+
+    # Load models in the background; /health/ready reports progress
+    if settings.WARMUP_MODELS:
+        readiness.start()
+
+    yield
+
+    await readiness.stop()
+    await chapter_audio_jobs.stop()
+    # Write any unflushed counters before the worker exits
+    await document_counters.stop()
+    password_hash_pool.shutdown()
+    tts_executor.shutdown(wait=False, cancel_futures=True)
+    process_pool.shutdown()
+    await llm_http_client.close()
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="Digital Library System with AI-powered search and document management",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -30,9 +67,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the frontend read per-stage latency of /api/ask
+    expose_headers=["Server-Timing"],
 )
 
 # Mount static files directory
+# Cover images have content-hashed names; mounted first so it takes
+# precedence over the generic /uploads mount
+app.mount(
+    "/uploads/images",
+    ImmutableStaticFiles(
+        directory=os.path.join(settings.UPLOAD_DIR, "images"),
+        max_age=settings.IMAGES_CACHE_MAX_AGE
+    ),
+    name="images"
+)
 app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
 # Import and include routers
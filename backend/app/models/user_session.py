@@ -1,13 +1,19 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, CheckConstraint, func
-from sqlalchemy.orm import relationship
+import hashlib
+from sqlalchemy import Column, String, DateTime, ForeignKey, CheckConstraint, Index, func
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.dialects.postgresql import UUID
 from .base import BaseModel
 
+def hash_token(token: str) -> str:
+    """Return the SHA-256 hex digest used to index session tokens"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
 class UserSession(BaseModel):
     __tablename__ = "user_sessions"
 
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     token = Column(String, unique=True, nullable=False)
+    token_hash = Column(String(64), nullable=False, comment="SHA-256 of token, used for lookups")
     ip_address = Column(String, nullable=True)
     user_agent = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -16,6 +22,14 @@ class UserSession(BaseModel):
     # Relationships
     user = relationship("User", back_populates="sessions")
 
+    @validates("token")
+    def _sync_token_hash(self, key, token):
+        # Keep the indexed hash in step with the raw token
+        self.token_hash = hash_token(token) if token else None
+        return token
+
     __table_args__ = (
         CheckConstraint('expires_at > created_at', name='check_session_expiry'),
-    ) 
\ No newline at end of file
+        Index('idx_user_sessions_token_hash', 'token_hash', unique=True),
+        Index('idx_user_sessions_user_expires', 'user_id', 'expires_at'),
+    )
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+class ChatMessage(BaseModel):
+    role: Literal["user", "assistant"]
+    content: str = Field(..., max_length=4000)
+
+class AskRequest(BaseModel):
+    query: str = Field(..., min_length=3, max_length=1000)
+    top_n: int = Field(5, ge=1, le=20)
+    temperature: float = Field(0.1, ge=0.0, le=1.0)
+    max_tokens: int = Field(500, ge=50, le=2000)
+    chat_history: Optional[List[ChatMessage]] = None
@@ -1,27 +1,90 @@
 import os
+import asyncio
+import hashlib
 import logging
-from datetime import datetime
-from gtts import gTTS
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from app.core.config import settings
+from app.services.tts import TTSEngine, create_tts_engine, split_sentences
+from app.services.tts_cache import tts_segment_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Shared by all AudioService instances so parallel synthesis stays bounded
+# per worker process, however many documents are processed at once
+tts_executor = ThreadPoolExecutor(max_workers=settings.TTS_MAX_WORKERS, thread_name_prefix="tts")
+
 class AudioService:
-    def __init__(self):
+    def __init__(self, engine: Optional[TTSEngine] = None):
         logger.info("Initializing AudioService")
         self.audio_dir = os.path.join(settings.UPLOAD_DIR, "audio")
         os.makedirs(self.audio_dir, exist_ok=True)
         logger.info(f"Audio directory created at {self.audio_dir}")
-        
-    async def generate_audio(self, text: str, language: str = "vi", filename: str = None) -> dict:
+        self._engine = engine
+
+    @property
+    def engine(self) -> TTSEngine:
+        if self._engine is None:
+            self._engine = create_tts_engine()
+        return self._engine
+
+    def _synthesize_segment(self, segment: str, language: str, voice_id: Optional[str]) -> bytes:
+        """Synthesize one segment, served from the segment cache when possible (blocking)"""
+        key = tts_segment_cache.make_key(self.engine.name, voice_id, language, segment)
+        audio = tts_segment_cache.get(key, self.engine.extension)
+        if audio is None:
+            audio = self.engine.synthesize(segment, language)
+            tts_segment_cache.set(key, self.engine.extension, audio)
+        return audio
+
+    async def synthesize(self, text: str, language: str, voice_id: Optional[str] = None) -> bytes:
+        """
+        Synthesize text without blocking the event loop.
+
+        The text is split at sentence boundaries and the segments are
+        synthesized concurrently on the shared TTS executor, then joined in
+        reading order into one audio stream. Repeated segments are
+        synthesized once.
         """
-        Generate audio from text using gTTS
+        segments = split_sentences(text)
+        if not segments:
+            raise ValueError("Text cannot be empty")
+        unique_segments = list(dict.fromkeys(segments))
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(tts_executor, self._synthesize_segment, segment, language, voice_id)
+            for segment in unique_segments
+        ))
+        by_segment = dict(zip(unique_segments, results))
+        # Joined outside the TTS pool: there it would queue behind the
+        # segments of every other chapter rendered at the same time
+        audio = await asyncio.to_thread(self.engine.concatenate, [by_segment[segment] for segment in segments])
+        logger.info(
+            f"Synthesized {len(segments)} segments with {self.engine.name} "
+            f"in {time.monotonic() - start:.1f}s"
+        )
+        return audio
+
+    async def generate_audio(
+        self,
+        text: str,
+        language: str = "vi",
+        filename: str = None,
+        voice_id: Optional[str] = None
+    ) -> dict:
+        """
+        Generate an audio file from text with the configured TTS engine
         
         Args:
             text: Text to convert to speech
             language: Language code (default: vi for Vietnamese)
-            filename: Optional custom filename (without extension)
+            filename: Optional filename prefix (without extension); a hash of
+                the audio is appended, so files are never overwritten and
+                identical audio is stored once
+            voice_id: Voice the audio is generated for (part of the cache key)
             
         Returns:
             Dictionary containing audio file information
@@ -36,34 +99,28 @@ class AudioService:
             if not language or not language.strip():
                 raise ValueError("Language code cannot be empty")
             
-            # Generate filename
-            if filename:
-                # Use provided filename
-                safe_filename = f"{filename}.mp3"
-            else:
-                # Generate timestamp-based filename
-                timestamp = int(datetime.now().timestamp())
-                safe_filename = f"summary_{timestamp}.mp3"
+            audio = await self.synthesize(text, language, voice_id)
+            if not audio:
+                raise ValueError("Generated audio file is empty")
             
+            # Generate filename from the audio content
+            digest = hashlib.sha256(audio).hexdigest()[:16]
+            safe_filename = f"{filename or 'summary'}_{digest}.{self.engine.extension}"
             file_path = os.path.join(self.audio_dir, safe_filename)
             
-            # Generate audio using gTTS
-            tts = gTTS(text=text, lang=language, slow=False)
-            tts.save(file_path)
-            
-            # Verify file was created
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"Audio file was not created at {file_path}")
+            if os.path.exists(file_path):
+                logger.info(f"Audio file {safe_filename} already exists, reusing it")
+            else:
+                # Write to a temporary name first so a half-written file is never served
+                tmp_path = f"{file_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(audio)
+                os.replace(tmp_path, file_path)
             
-            # Get file size
-            file_size = os.path.getsize(file_path)
-            if file_size == 0:
-                raise ValueError("Generated audio file is empty")
+            file_size = len(audio)
             
-            # Calculate duration (approximate)
-            # Average speaking rate: 150 words per minute
-            word_count = len(text.split())
-            duration_seconds = int((word_count / 150) * 60)
+            # Measured from the audio frames; the check constraint requires > 0
+            duration_seconds = max(1, round(self.engine.duration_seconds(audio)))
             
             logger.info(f"Audio generated successfully: {safe_filename}")
             logger.info(f"File size: {file_size} bytes, Duration: {duration_seconds} seconds")
@@ -76,10 +133,11 @@ class AudioService:
             
         except Exception as e:
             logger.error(f"Error generating audio: {str(e)}")
-            # Clean up file if it exists
-            if 'file_path' in locals() and os.path.exists(file_path):
+            # Clean up a partially written file (complete files may be shared)
+            tmp_path = locals().get("tmp_path")
+            if tmp_path and os.path.exists(tmp_path):
                 try:
-                    os.remove(file_path)
+                    os.remove(tmp_path)
                 except Exception as cleanup_error:
                     logger.error(f"Error cleaning up audio file: {str(cleanup_error)}")
             raise 
\ No newline at end of file
@@ -0,0 +1,253 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+from sqlalchemy import delete, select
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import DocumentAudio, DocumentAudioStatus, DocumentChapter
+from app.services.audio_service import AudioService
+from app.services.extractors import extract_file_async
+
+logger = logging.getLogger(__name__)
+
+# Chapter states in the playlist manifest
+PENDING = "pending"
+COMPLETED = "completed"
+FAILED = "failed"
+
+def playlist_path(document_id: UUID, language: str) -> str:
+    """Location of a document's playlist manifest"""
+    return os.path.join(settings.UPLOAD_DIR, "audio", f"{document_id}_{language}_playlist.json")
+
+def read_playlist(document_id: UUID, language: str) -> Optional[Dict[str, Any]]:
+    """Load a playlist manifest, or None if no chapter audio job has run"""
+    try:
+        with open(playlist_path(document_id, language), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def split_chapter_texts(text: str, chapters: List[DocumentChapter]) -> List[str]:
+    """
+    Cut the document text into chapter texts.
+
+    Chapter positions are percentages of the document's lines, as recorded
+    by DocumentProcessor._detect_structure.
+    """
+    lines = text.split("\n")
+    texts = []
+    for chapter in chapters:
+        start = int(round((chapter.start_position or 0) / 100 * len(lines)))
+        end = int(round((chapter.end_position if chapter.end_position is not None else 100) / 100 * len(lines)))
+        texts.append("\n".join(lines[start:end]).strip())
+    return texts
+
+class ChapterAudioJob:
+    """
+    Synthesizes every chapter of a document as its own audio file.
+
+    All chapters are started at once; their segments queue on the shared TTS
+    executor in chapter order, so chapter 1 finishes first and can be played
+    while later chapters are still rendering. Each chapter gets its
+    DocumentAudio row and its playlist entry as soon as it is done.
+    """
+
+    def __init__(
+        self,
+        document_id: UUID,
+        language: str,
+        voice_id: str,
+        audio_service: Optional[AudioService] = None
+    ):
+        self.document_id = document_id
+        self.language = language
+        self.voice_id = voice_id
+        self.audio_service = audio_service or AudioService()
+        self.manifest: Dict[str, Any] = {}
+        self._manifest_lock = asyncio.Lock()
+
+    def _write_manifest(self) -> None:
+        path = playlist_path(self.document_id, self.language)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    async def _update_entry(self, index: int, **fields) -> None:
+        async with self._manifest_lock:
+            self.manifest["chapters"][index].update(fields)
+            self.manifest["updated_at"] = datetime.utcnow().isoformat()
+            await asyncio.to_thread(self._write_manifest)
+
+    async def _load_chapters(self) -> List[DocumentChapter]:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(DocumentChapter)
+                .where(DocumentChapter.document_id == self.document_id)
+                .order_by(DocumentChapter.chapter_number)
+            )
+            chapters = list(result.scalars().all())
+            # Re-running the job replaces the previous chapter audio
+            await db.execute(
+                delete(DocumentAudio).where(
+                    DocumentAudio.document_id == self.document_id,
+                    DocumentAudio.language == self.language,
+                    DocumentAudio.chapter_id.isnot(None)
+                )
+            )
+            await db.commit()
+        return chapters
+
+    async def _render_chapter(self, index: int, chapter: DocumentChapter, text: str) -> bool:
+        if not text:
+            await self._update_entry(index, status=FAILED, error="Chapter has no text")
+            return False
+        try:
+            result = await self.audio_service.generate_audio(
+                text=text,
+                language=self.language,
+                filename=f"{self.document_id}_{self.language}_chapter_{chapter.chapter_number:03d}",
+                voice_id=self.voice_id
+            )
+            async with AsyncSessionLocal() as db:
+                db.add(DocumentAudio(
+                    document_id=self.document_id,
+                    chapter_id=chapter.id,
+                    language=self.language,
+                    voice_id=self.voice_id,
+                    file_url=result["file_url"],
+                    duration_seconds=result["duration_seconds"],
+                    file_size=result["file_size"],
+                    status=DocumentAudioStatus.COMPLETED
+                ))
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Audio for chapter {chapter.chapter_number} of {self.document_id} failed: {str(e)}")
+            await self._update_entry(index, status=FAILED, error=str(e))
+            return False
+
+        await self._update_entry(
+            index,
+            status=COMPLETED,
+            file_url=result["file_url"],
+            duration_seconds=result["duration_seconds"]
+        )
+        logger.info(f"Audio for chapter {chapter.chapter_number} of {self.document_id} completed")
+        return True
+
+    async def run(self, text: str) -> Dict[str, Any]:
+        """
+        Render all chapters of the document.
+
+        Args:
+            text: Full document text the chapter positions refer to
+
+        Returns:
+            The final playlist manifest
+        """
+        chapters = await self._load_chapters()
+        if not chapters:
+            logger.info(f"Document {self.document_id} has no chapters, skipping chapter audio")
+            return {}
+
+        self.manifest = {
+            "document_id": str(self.document_id),
+            "language": self.language,
+            "status": "processing",
+            "updated_at": datetime.utcnow().isoformat(),
+            "chapters": [
+                {
+                    "chapter_id": str(chapter.id),
+                    "chapter_number": chapter.chapter_number,
+                    "title": chapter.title,
+                    "status": PENDING,
+                    "file_url": None,
+                    "duration_seconds": None
+                }
+                for chapter in chapters
+            ]
+        }
+        await asyncio.to_thread(self._write_manifest)
+
+        texts = split_chapter_texts(text, chapters)
+        results = await asyncio.gather(*(
+            self._render_chapter(index, chapter, chapter_text)
+            for index, (chapter, chapter_text) in enumerate(zip(chapters, texts))
+        ))
+
+        async with self._manifest_lock:
+            self.manifest["status"] = "completed" if all(results) else "partial"
+            self.manifest["updated_at"] = datetime.utcnow().isoformat()
+            await asyncio.to_thread(self._write_manifest)
+        logger.info(f"Chapter audio for {self.document_id}: {sum(results)}/{len(results)} chapters rendered")
+        return self.manifest
+
+class ChapterAudioJobs:
+    """Runs chapter audio jobs in the background, at most one per document"""
+
+    def __init__(self):
+        self._tasks: Dict[UUID, asyncio.Task] = {}
+        self.started = 0
+        self.failed = 0
+
+    async def _run(self, job: ChapterAudioJob, file_path: str, text: Optional[str]) -> None:
+        try:
+            if text is None:
+                text = (await extract_file_async(file_path))[0]
+            await job.run(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Chapter audio job for {job.document_id} failed: {str(e)}")
+        finally:
+            self._tasks.pop(job.document_id, None)
+
+    def start(
+        self,
+        document_id: UUID,
+        file_path: str,
+        language: str,
+        voice_id: str,
+        text: Optional[str] = None
+    ) -> bool:
+        """
+        Start rendering a document's chapters; returns False if a job for the
+        document is already running.
+
+        Pass the document text when the caller has already extracted it
+        (e.g. upload processing), so the file is not parsed or OCRed again.
+        """
+        task = self._tasks.get(document_id)
+        if task is not None and not task.done():
+            return False
+        job = ChapterAudioJob(document_id, language, voice_id)
+        self._tasks[document_id] = asyncio.create_task(self._run(job, file_path, text))
+        self.started += 1
+        return True
+
+    def is_running(self, document_id: UUID) -> bool:
+        task = self._tasks.get(document_id)
+        return task is not None and not task.done()
+
+    async def stop(self) -> None:
+        """Cancel running jobs (chapters already rendered are kept)"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "running": sum(1 for task in self._tasks.values() if not task.done()),
+            "started": self.started,
+            "failed": self.failed
+        }
+
+# Process-wide job registry
+chapter_audio_jobs = ChapterAudioJobs()
@@ -0,0 +1,153 @@
+import logging
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.tokenization import estimate_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# MinHash parameters: NUM_PERMUTATIONS (a, b) pairs of a universal hash over
+# crc32 shingle hashes, fixed so signatures are stable across processes
+NUM_PERMUTATIONS = 64
+SHINGLE_SIZE = 3
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_PERMUTATIONS = [
+    (1 + (i * 0x9E3779B1) % (_MERSENNE_PRIME - 1), (i * 0x85EBCA77 + 0xC2B2AE3D) % _MERSENNE_PRIME)
+    for i in range(1, NUM_PERMUTATIONS + 1)
+]
+
+# Longest overlap (in characters) searched for when merging adjacent chunks
+MAX_OVERLAP_CHARS = 2000
+
+def _score(document: Dict[str, Any]) -> float:
+    score = document.get("rerank_score")
+    return float(score if score is not None else document.get("score") or 0.0)
+
+def remove_overlap(left: str, right: str, min_overlap: int = 20) -> str:
+    """
+    Join two consecutive chunks, dropping the text `right` repeats from the
+    end of `left` (the splitter's chunk overlap).
+    """
+    window = min(len(left), len(right), MAX_OVERLAP_CHARS)
+    for size in range(window, min_overlap - 1, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return f"{left}\n{right}"
+
+def merge_adjacent_chunks(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merge chunks of the same file whose chunk_id values are consecutive.
+
+    The merged document keeps the best score of its parts and lists the
+    merged chunk ids in metadata["chunk_ids"]. Chunks without file_hash or
+    chunk_id metadata are passed through unchanged.
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    passthrough: List[Dict[str, Any]] = []
+    for document in documents:
+        metadata = document.get("metadata") or {}
+        if metadata.get("file_hash") is None or metadata.get("chunk_id") is None:
+            passthrough.append(document)
+        else:
+            groups.setdefault(metadata["file_hash"], []).append(document)
+
+    merged: List[Dict[str, Any]] = []
+    for parts in groups.values():
+        parts.sort(key=lambda d: d["metadata"]["chunk_id"])
+        current: Optional[Dict[str, Any]] = None
+        for part in parts:
+            chunk_id = part["metadata"]["chunk_id"]
+            if current is not None and chunk_id == current["metadata"]["chunk_ids"][-1]:
+                # Same chunk retrieved twice
+                current["rerank_score"] = max(current["rerank_score"], _score(part))
+                continue
+            if current is not None and chunk_id == current["metadata"]["chunk_ids"][-1] + 1:
+                current["text"] = remove_overlap(current["text"], part["text"])
+                current["metadata"]["chunk_ids"].append(chunk_id)
+                current["rerank_score"] = max(current["rerank_score"], _score(part))
+                continue
+            if current is not None:
+                merged.append(current)
+            current = {
+                **part,
+                "metadata": {**part["metadata"], "chunk_ids": [chunk_id]},
+                "rerank_score": _score(part)
+            }
+        if current is not None:
+            merged.append(current)
+    return merged + passthrough
+
+def minhash_signature(text: str) -> Tuple[int, ...]:
+    """MinHash signature over word shingles of a text"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_SIZE:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+def estimated_similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+def remove_near_duplicates(documents: List[Dict[str, Any]], threshold: float) -> List[Dict[str, Any]]:
+    """Keep the best-scored document of every group of near-duplicates"""
+    kept: List[Dict[str, Any]] = []
+    signatures: List[Tuple[int, ...]] = []
+    for document in sorted(documents, key=_score, reverse=True):
+        signature = minhash_signature(document["text"])
+        if any(estimated_similarity(signature, other) >= threshold for other in signatures):
+            continue
+        kept.append(document)
+        signatures.append(signature)
+    return kept
+
+def pack_context(
+    documents: List[Dict[str, Any]],
+    max_tokens: Optional[int] = None,
+    similarity_threshold: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Assemble retrieved chunks into prompt context.
+
+    Adjacent chunks of the same document are merged with their overlap
+    removed, near-duplicates are dropped, and the rest is packed by
+    descending rerank score until the token budget is used.
+
+    Args:
+        documents: Retrieved documents with text, metadata and scores
+        max_tokens: Context budget (default: RAG_CONTEXT_MAX_TOKENS)
+        similarity_threshold: MinHash similarity above which a document is a
+            duplicate (default: RAG_DEDUP_THRESHOLD)
+
+    Returns:
+        Documents to put in the prompt, best first
+    """
+    if not documents:
+        return []
+    max_tokens = max_tokens or settings.RAG_CONTEXT_MAX_TOKENS
+    threshold = similarity_threshold if similarity_threshold is not None else settings.RAG_DEDUP_THRESHOLD
+
+    candidates = remove_near_duplicates(merge_adjacent_chunks(documents), threshold)
+
+    packed: List[Dict[str, Any]] = []
+    used = 0
+    for document in candidates:
+        tokens = estimate_tokens(document["text"])
+        if used + tokens <= max_tokens:
+            packed.append(document)
+            used += tokens
+        elif not packed:
+            # Always keep the best document, cut to the budget
+            packed.append({**document, "text": truncate_to_tokens(document["text"], max_tokens)})
+            used = max_tokens
+
+    original = sum(estimate_tokens(document["text"]) for document in documents)
+    logger.info(f"Packed {len(documents)} chunks (~{original} tokens) into {len(packed)} passages (~{used} tokens)")
+    return packed
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+from uuid import UUID
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.database import engine
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class DocumentCounterBuffer:
+    """
+    In-process buffer for document view and download counters.
+
+    Increments are aggregated in memory and written back periodically with a
+    single batched ``UPDATE ... FROM (VALUES ...)`` statement, so read endpoints
+    never take a row lock on ``documents``.
+    """
+
+    def __init__(self, flush_interval: float = settings.COUNTER_FLUSH_INTERVAL_SECONDS):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # document_id -> [views, downloads]
+        self._pending: Dict[str, List[int]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+
+    def increment_view(self, document_id: Union[str, UUID], amount: int = 1) -> None:
+        """Record views for a document"""
+        self._increment(document_id, views=amount)
+
+    def increment_download(self, document_id: Union[str, UUID], amount: int = 1) -> None:
+        """Record downloads for a document"""
+        self._increment(document_id, downloads=amount)
+
+    def _increment(self, document_id: Union[str, UUID], views: int = 0, downloads: int = 0) -> None:
+        key = str(document_id)
+        with self._lock:
+            counts = self._pending.setdefault(key, [0, 0])
+            counts[0] += views
+            counts[1] += downloads
+
+    def pending_counts(self, document_id: Union[str, UUID]) -> Tuple[int, int]:
+        """Return the unflushed (views, downloads) for a single document"""
+        with self._lock:
+            views, downloads = self._pending.get(str(document_id), (0, 0))
+        return views, downloads
+
+    def stats(self) -> Dict[str, int]:
+        """Return buffer totals for monitoring"""
+        with self._lock:
+            pending_views = sum(counts[0] for counts in self._pending.values())
+            pending_downloads = sum(counts[1] for counts in self._pending.values())
+            pending_documents = len(self._pending)
+        return {
+            "pending_documents": pending_documents,
+            "pending_views": pending_views,
+            "pending_downloads": pending_downloads,
+            "flushed_rows": self.flushed_rows,
+            "failed_flushes": self.failed_flushes
+        }
+
+    def _drain(self) -> Dict[str, List[int]]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def _restore(self, pending: Dict[str, List[int]]) -> None:
+        """Put counts back after a failed flush so no increments are lost"""
+        for document_id, (views, downloads) in pending.items():
+            self._increment(document_id, views=views, downloads=downloads)
+
+    def flush(self) -> int:
+        """
+        Write all buffered increments in one batched UPDATE.
+
+        Returns:
+            Number of document rows updated
+        """
+        pending = self._drain()
+        if not pending:
+            return 0
+
+        values = []
+        params = {}
+        for i, (document_id, (views, downloads)) in enumerate(pending.items()):
+            values.append(f"(CAST(:id_{i} AS uuid), :views_{i}, :downloads_{i})")
+            params[f"id_{i}"] = document_id
+            params[f"views_{i}"] = views
+            params[f"downloads_{i}"] = downloads
+
+        statement = text(
+            "UPDATE documents AS d "
+            "SET view_count = COALESCE(d.view_count, 0) + v.views, "
+            "download_count = COALESCE(d.download_count, 0) + v.downloads "
+            f"FROM (VALUES {', '.join(values)}) AS v(id, views, downloads) "
+            "WHERE d.id = v.id"
+        )
+
+        try:
+            with engine.begin() as conn:
+                result = conn.execute(statement, params)
+            self.flushed_rows += result.rowcount
+            logger.info(f"Flushed counters for {len(pending)} documents ({result.rowcount} rows updated)")
+            return result.rowcount
+        except Exception as e:
+            self.failed_flushes += 1
+            logger.error(f"Error flushing document counters: {str(e)}")
+            self._restore(pending)
+            return 0
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await asyncio.to_thread(self.flush)
+
+    def start(self) -> None:
+        """Start the periodic flush task on the running event loop"""
+        if self._task is None or self._task.done():
+            logger.info(f"Starting document counter flush every {self.flush_interval}s")
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush task and write any remaining increments"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+# Process-wide counter buffer
+document_counters = DocumentCounterBuffer()
@@ -0,0 +1,88 @@
+"""
+Cover thumbnails for the catalogue.
+
+Covers are rendered once at the largest configured width and downscaled to
+every width in COVER_WIDTHS, as JPEG and (if Pillow has libwebp) WebP.
+File names carry a hash of the image, so they can be served with immutable
+cache headers:
+
+    /uploads/images/<name>_<hash>_<width>.jpg
+    /uploads/images/<name>_<hash>_<width>.webp
+
+Document.image_url points at the COVER_DEFAULT_WIDTH JPEG; the other
+variants differ only in the suffix, so clients can build a srcset from it.
+
+The functions here are CPU-bound and are meant to run in the shared
+process pool (app.core.executors.process_pool).
+"""
+import hashlib
+import logging
+import os
+from typing import Any, Dict, Optional
+from PIL import Image, features
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+IMAGES_URL_PREFIX = "/uploads/images"
+
+def save_cover_variants(image: Image.Image, output_dir: str, filename: str) -> Dict[str, Any]:
+    """
+    Save all size/format variants of a cover.
+
+    Returns:
+        {"image_url": default JPEG url, "variants": {width: {"jpeg": url, "webp": url}}}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    image = image.convert("RGB")
+    digest = hashlib.sha256(image.tobytes()).hexdigest()[:12]
+    base = f"{filename}_{digest}"
+    with_webp = features.check("webp")
+
+    variants: Dict[int, Dict[str, str]] = {}
+    current = image
+    # Largest first, each size downscaled from the previous one
+    for width in sorted(set(settings.COVER_WIDTHS), reverse=True):
+        if current.width > width:
+            height = max(1, round(current.height * width / current.width))
+            current = current.resize((width, height), Image.LANCZOS)
+        urls = {}
+        jpeg_name = f"{base}_{width}.jpg"
+        current.save(
+            os.path.join(output_dir, jpeg_name), "JPEG",
+            quality=settings.COVER_JPEG_QUALITY, optimize=True, progressive=True
+        )
+        urls["jpeg"] = f"{IMAGES_URL_PREFIX}/{jpeg_name}"
+        if with_webp:
+            webp_name = f"{base}_{width}.webp"
+            current.save(os.path.join(output_dir, webp_name), "WEBP", quality=settings.COVER_WEBP_QUALITY, method=4)
+            urls["webp"] = f"{IMAGES_URL_PREFIX}/{webp_name}"
+        variants[width] = urls
+
+    default_width = settings.COVER_DEFAULT_WIDTH if settings.COVER_DEFAULT_WIDTH in variants else max(variants)
+    return {"image_url": variants[default_width]["jpeg"], "variants": variants}
+
+def render_pdf_cover(pdf_path: str, output_dir: str, filename: str) -> Optional[Dict[str, Any]]:
+    """Render page 1 of a PDF at the largest cover width and save its variants"""
+    # pdf2image is imported lazily to keep module import cheap
+    from pdf2image import convert_from_path
+
+    # Rasterize straight to the target width instead of a fixed DPI
+    images = convert_from_path(
+        pdf_path,
+        first_page=1,
+        last_page=1,
+        size=(max(settings.COVER_WIDTHS), None)
+    )
+    if not images:
+        logger.error("No pages found in PDF")
+        return None
+    return save_cover_variants(images[0], output_dir, filename)
+
+def render_uploaded_cover(image_path: str, output_dir: str, filename: str) -> Optional[Dict[str, Any]]:
+    """Save the variants of an uploaded cover image"""
+    largest = max(settings.COVER_WIDTHS)
+    with Image.open(image_path) as image:
+        # Lets the JPEG decoder skip detail that would be thrown away
+        image.draft("RGB", (largest, largest * 2))
+        return save_cover_variants(image, output_dir, filename)
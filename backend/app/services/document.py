@@ -3,7 +3,6 @@ import logging
 import hashlib
 from datetime import datetime
 from typing import List, Dict, Any, Tuple, Optional, Union
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 import re
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
@@ -23,7 +22,14 @@ from app.core.exceptions import (
 )
 from app.services.summary_service import SummaryService
 from app.services.audio_service import AudioService
+from app.services.chapter_audio import chapter_audio_jobs
 from app.services.pdf_service import PDFService
+from app.services.cover_images import render_uploaded_cover
+from app.core.executors import process_pool
+from app.services.tokenization import create_embedding_splitter, embedding_max_tokens
+from app.services.extractors import (
+    Extraction, SNIFF_BYTES, clean_text, extract_file, extract_file_async, resolve_extractor
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -44,32 +50,35 @@ class DocumentProcessor:
     
     def __init__(
         self,
-        chunk_size: int = 512,
-        chunk_overlap: int = 200,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
         upload_dir: str = settings.UPLOAD_DIR,
     ):
-        self.chunk_size = chunk_size
-        self.chunk_overlap = chunk_overlap
+        # Sizes are in embedding-model tokens so chunks are never truncated by the encoder
+        self.chunk_size = chunk_size or embedding_max_tokens()
+        self.chunk_overlap = settings.EMBEDDING_CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
         self.upload_dir = upload_dir
         
         # Create upload directory if it doesn't exist
         os.makedirs(self.upload_dir, exist_ok=True)
         
         # Initialize text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            length_function=len,
-            is_separator_regex=False
-        )
+        self.text_splitter = create_embedding_splitter(self.chunk_size, self.chunk_overlap)
     
-    def process_file(self, file_path: str, db: Optional[Session] = None) -> Tuple[List[str], List[Dict[str, Any]]]:
+    def process_file(
+        self,
+        file_path: str,
+        db: Optional[Session] = None,
+        extracted: Optional[Extraction] = None
+    ) -> Tuple[List[str], List[Dict[str, Any]]]:
         """
         Process a text file and return its chunks and associated metadata.
         
         Args:
             file_path: Path to the file to process
             db: Optional database session for storing chapters and sections
+            extracted: (text, headings, ocr_spans) already extracted by the caller, e.g.
+                with extract_file_async; extracted here when omitted
             
         Returns:
             Tuple containing:
@@ -92,14 +101,14 @@ class DocumentProcessor:
             base_metadata = self._extract_metadata(file_path, file_ext)
             base_metadata["file_hash"] = file_hash
             
-            # Extract text content
-            text = self._extract_text(file_path)
+            # Extract text content (and native headings where the format has them)
+            text, headings, ocr_spans = extracted if extracted is not None else self._extract_document(file_path)
             if not text:
                 logger.error(f"Failed to extract text from {file_path}")
                 return [], []
             
             # Detect chapters and sections
-            chapters, sections = self._detect_structure(text)
+            chapters, sections = self._detect_structure(text, headings)
             
             # Store chapters and sections in database if session provided
             if db:
@@ -118,6 +127,8 @@ class DocumentProcessor:
                     "total_chunks": len(chunks)
                 })
                 metadata_list.append(chunk_metadata)
+            if ocr_spans:
+                self._mark_ocr_chunks(text, chunks, metadata_list, ocr_spans)
             
             logger.info(f"Processed {file_path} into {len(chunks)} chunks")
             return chunks, metadata_list
@@ -126,46 +137,58 @@ class DocumentProcessor:
             logger.error(f"Error processing file {file_path}: {str(e)}")
             return [], []
     
+    @staticmethod
+    def _mark_ocr_chunks(
+        text: str,
+        chunks: List[str],
+        metadata_list: List[Dict[str, Any]],
+        ocr_spans: List[Dict[str, Any]]
+    ) -> None:
+        """Flag chunks that contain OCRed text with the lowest confidence of their pages"""
+        offset = 0
+        for chunk, chunk_metadata in zip(chunks, metadata_list):
+            # Chunks are taken from the text in order
+            start = text.find(chunk, offset)
+            if start < 0:
+                start = offset
+            else:
+                offset = start + 1
+            end = start + len(chunk)
+            confidences = [span["confidence"] for span in ocr_spans if span["start"] < end and span["end"] > start]
+            if confidences:
+                chunk_metadata["ocr"] = True
+                chunk_metadata["ocr_confidence"] = min(confidences)
+    
     def _extract_text(self, file_path: str) -> str:
         """Extract text content from file."""
-        ext = os.path.splitext(file_path)[1].lower()
+        return self._extract_document(file_path)[0]
+    
+    def _extract_document(self, file_path: str) -> Extraction:
+        """
+        Extract text content from file, together with the headings the
+        format records natively (PDF outline, DOCX/ODT heading styles, HTML
+        h1-h3, slide and sheet titles). The extractor is picked by the
+        registry in app.services.extractors.
+        
+        Returns:
+            Tuple containing:
+                - Cleaned text
+                - Headings ({"level", "title", "line"}, line indexes into the
+                  cleaned text), or None if the file has no native structure
+                - OCRed spans ({"page", "start", "end", "confidence"}), or None
+        """
         try:
-            if ext == '.txt':
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    text = file.read()
-                return self._clean_text(text)
-            elif ext == '.pdf':
-                import pdfplumber
-                with pdfplumber.open(file_path) as pdf:
-                    text = '\n'.join(page.extract_text() or '' for page in pdf.pages)
-                return self._clean_text(text)
-            elif ext == '.docx':
-                from docx import Document as DocxDocument
-                doc = DocxDocument(file_path)
-                text = '\n'.join([p.text for p in doc.paragraphs])
-                return self._clean_text(text)
-            else:
-                logger.error(f'Unsupported file type: {ext}')
-                return ""
+            return extract_file(file_path)
+        except InvalidFileError as e:
+            logger.error(f"Cannot extract text from {file_path}: {e.detail}")
+            return "", None, None
         except Exception as e:
             logger.error(f"Error extracting text from {file_path}: {str(e)}")
-            return ""
+            return "", None, None
     
     def _clean_text(self, text: str) -> str:
         """Clean and normalize extracted text."""
-        if not text:
-            return ""
-        
-        # Replace multiple newlines with double newline
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        
-        # Replace multiple spaces with single space
-        text = re.sub(r' {2,}', ' ', text)
-        
-        # Remove non-printable characters
-        text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', text)
-        
-        return text.strip()
+        return clean_text(text)
     
     def _is_supported_file_type(self, file_ext: str) -> bool:
         """Check if the file extension is supported."""
@@ -212,18 +235,84 @@ class DocumentProcessor:
                 "error": str(e)
             }
     
-    def _detect_structure(self, text: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    def _structure_from_headings(
+        self,
+        headings: List[Dict[str, Any]],
+        total_lines: int
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Build chapters and sections from native headings: the top heading
+        level gives chapters and the next one sections. A single top-level
+        heading (usually the book title) is skipped.
+        """
+        levels = sorted({heading["level"] for heading in headings})
+        chapter_level = levels[0]
+        top = [heading for heading in headings if heading["level"] == chapter_level]
+        if len(top) == 1 and len(levels) > 1:
+            chapter_level = levels[1]
+        section_level = next((level for level in levels if level > chapter_level), None)
+        
+        chapters = []
+        sections = []
+        chapter_number = 0
+        section_number = 0
+        last_line = -1
+        for heading in sorted(headings, key=lambda h: h["line"]):
+            if heading["level"] not in (chapter_level, section_level):
+                continue
+            # Positions must increase strictly (check constraints); of
+            # several headings on the same line only the first is kept
+            if heading["line"] <= last_line:
+                continue
+            last_line = heading["line"]
+            position = heading["line"] / total_lines * 100
+            if heading["level"] == chapter_level:
+                chapter_number += 1
+                section_number = 0
+                chapters.append({
+                    "title": heading["title"],
+                    "chapter_number": chapter_number,
+                    "start_position": position,
+                    "end_position": None
+                })
+            else:
+                section_number += 1
+                sections.append({
+                    "title": heading["title"],
+                    "section_number": section_number,
+                    "start_position": position,
+                    "end_position": None,
+                    "chapter_number": chapter_number or None
+                })
+        return chapters, sections
+    
+    def _detect_structure(
+        self,
+        text: str,
+        headings: Optional[List[Dict[str, Any]]] = None
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
         """
         Detect chapters and sections in the text.
         
+        Native headings (PDF outline, DOCX heading styles) are used when the
+        file has them; otherwise chapter and section markers are matched
+        line by line.
+        
         Args:
             text: The text content to analyze
+            headings: Optional native headings from _extract_document
             
         Returns:
             Tuple containing:
                 - List of chapter dictionaries
                 - List of section dictionaries
         """
+        if headings:
+            chapters, sections = self._structure_from_headings(headings, max(1, len(text.split('\n'))))
+            if chapters:
+                self._set_end_positions(chapters, sections)
+                return chapters, sections
+        
         chapters = []
         sections = []
         
@@ -270,20 +359,23 @@ class DocumentProcessor:
                 sections.append(current_section)
                 continue
         
-        # Update end positions
+        self._set_end_positions(chapters, sections)
+        return chapters, sections
+    
+    @staticmethod
+    def _set_end_positions(chapters: List[Dict[str, Any]], sections: List[Dict[str, Any]]) -> None:
+        """Chapters end where the next chapter starts, sections at the next section or chapter"""
         for i in range(len(chapters)):
             if i < len(chapters) - 1:
                 chapters[i]["end_position"] = chapters[i + 1]["start_position"]
             else:
                 chapters[i]["end_position"] = 100
         
-        for i in range(len(sections)):
-            if i < len(sections) - 1:
-                sections[i]["end_position"] = sections[i + 1]["start_position"]
-            else:
-                sections[i]["end_position"] = 100
-        
-        return chapters, sections
+        boundaries = sorted(item["start_position"] for item in chapters + sections)
+        for section in sections:
+            section["end_position"] = next(
+                (position for position in boundaries if position > section["start_position"]), 100
+            )
     
     def _store_structure(
         self,
@@ -309,6 +401,7 @@ class DocumentProcessor:
                 return
             
             # Store chapters
+            chapters_by_number = {}
             for chapter_data in chapters:
                 chapter = DocumentChapter(
                     document_id=document.id,
@@ -318,13 +411,16 @@ class DocumentProcessor:
                     end_position=chapter_data["end_position"]
                 )
                 db.add(chapter)
+                chapters_by_number[chapter_data["chapter_number"]] = chapter
             
             db.commit()
             
             # Store sections
             for section_data in sections:
+                chapter = chapters_by_number.get(section_data.get("chapter_number"))
                 section = DocumentSection(
                     document_id=document.id,
+                    chapter_id=chapter.id if chapter else None,
                     title=section_data["title"],
                     section_number=section_data["section_number"],
                     start_position=section_data["start_position"],
@@ -442,6 +538,14 @@ class DocumentService:
                 data={"file_size": file.size}
             )
         
+        # Validate file content: the sniffed type must match the extension and
+        # have an extractor, before anything is written to disk or the database
+        logger.info(f"Validating file content: {file.filename}")
+        head = await file.read(SNIFF_BYTES)
+        await file.seek(0)
+        extractor = resolve_extractor(file.filename or "", head)
+        logger.info(f"File will be extracted with: {extractor.name}")
+        
         # Validate version
         logger.info(f"Validating version: {data.version}")
         if not DocumentService.validate_version(data.version):
@@ -548,6 +652,16 @@ class DocumentService:
                     
                     image_url = f"/uploads/images/{safe_image_filename}"
                     logger.info(f"Uploaded image saved successfully at: {image_url}")
+                    
+                    # Thumbnails for the catalogue; the original stays as fallback
+                    try:
+                        covers = await process_pool.run(
+                            render_uploaded_cover, image_path, images_dir, f"{timestamp}_cover"
+                        )
+                        if covers:
+                            image_url = covers["image_url"]
+                    except Exception as e:
+                        logger.error(f"Error creating cover thumbnails: {str(e)}")
                 except Exception as e:
                     logger.error(f"Error saving uploaded image: {str(e)}")
                     image_url = None
@@ -559,7 +673,8 @@ class DocumentService:
                     try:
                         images_dir = os.path.join(settings.UPLOAD_DIR, "images")
                         base_filename = os.path.splitext(safe_filename)[0]
-                        image_url = PDFService.extract_cover_image(
+                        image_url = await process_pool.run(
+                            PDFService.extract_cover_image,
                             pdf_path=file_path,
                             output_dir=images_dir,
                             filename=base_filename
@@ -641,7 +756,13 @@ class DocumentService:
             # Process document using DocumentProcessor
             logger.info("Starting document processing")
             processor = DocumentProcessor()
-            chunks, metadata_list = processor.process_file(file_path, db)
+            try:
+                # Heavy formats are parsed in the process pool, off the event loop
+                extracted = await extract_file_async(file_path)
+            except Exception as e:
+                logger.error(f"Error extracting text from {file_path}: {str(e)}")
+                extracted = ("", None, None)
+            chunks, metadata_list = processor.process_file(file_path, db, extracted=extracted)
             
             if not chunks:
                 logger.error("Document processing failed - no chunks generated")
@@ -743,7 +864,8 @@ class DocumentService:
             audio_result = await audio_service.generate_audio(
                 text=full_text,
                 language=data.language,
-                filename=original_filename
+                filename=original_filename,
+                voice_id=default_voice.id
             )
             
             # Create audio record with all required fields
@@ -776,6 +898,16 @@ class DocumentService:
             db_document.status = DocumentStatus.AVAILABLE
             db.commit()
             
+            # Render chapter audio in the background; chapters become playable
+            # one by one (see /documents/{id}/audio/playlist)
+            chapter_audio_jobs.start(
+                db_document.id,
+                file_path,
+                data.language,
+                default_voice.id,
+                text=extracted[0] or None
+            )
+            
             logger.info("Document processing completed successfully")
             return db_document
             
@@ -0,0 +1,686 @@
+import asyncio
+import csv
+import json
+import logging
+import mimetypes
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import zipfile
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+from app.core.config import settings
+from app.core.exceptions import InvalidFileError
+from app.core.executors import process_pool
+
+logger = logging.getLogger(__name__)
+
+# Extraction cost: LIGHT runs in a thread, HEAVY in the shared process pool
+LIGHT = "light"
+HEAVY = "heavy"
+
+# Bytes read for MIME sniffing
+SNIFF_BYTES = 8192
+# Rows per text block for spreadsheets and CSV
+ROW_BATCH = 200
+
+# Extracted text, native headings ({"level", "title", "line"}) or None, and
+# OCRed spans ({"page", "start", "end", "confidence"}, character offsets into
+# the text) or None
+Extraction = Tuple[str, Optional[List[Dict[str, Any]]], Optional[List[Dict[str, Any]]]]
+
+def clean_text(text: str) -> str:
+    """Clean and normalize extracted text."""
+    if not text:
+        return ""
+
+    # Replace multiple newlines with double newline
+    text = re.sub(r'\n{3,}', '\n\n', text)
+
+    # Replace multiple spaces with single space
+    text = re.sub(r' {2,}', ' ', text)
+
+    # Remove non-printable characters
+    text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', text)
+
+    return text.strip()
+
+def locate_headings(text: str, headings: List[Tuple[int, str]]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Find the line of each (level, title) heading in cleaned text. Headings
+    are searched in document order, so the scan is a single pass.
+    """
+    lines = text.split('\n')
+    located = []
+    line = 0
+    for level, title in headings:
+        title = title.strip()
+        if not title:
+            continue
+        for index in range(line, len(lines)):
+            if lines[index].strip() == title:
+                located.append({"level": level, "title": title, "line": index})
+                line = index + 1
+                break
+    return located or None
+
+class Extractor(ABC):
+    """
+    Text extractor for one family of formats.
+
+    iter_text() streams the text in blocks (pages, row batches, slides) so
+    large files are never parsed into one in-memory tree; extract() joins
+    the blocks and may add native headings. Extractors whose optional
+    dependency is missing report available() False and are skipped.
+    """
+
+    name = ""
+    mime_types: Tuple[str, ...] = ()
+    extensions: Tuple[str, ...] = ()
+    cost = LIGHT
+
+    def available(self) -> bool:
+        return True
+
+    @abstractmethod
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        """Text of the file in blocks, in reading order"""
+
+    def extract(self, file_path: str) -> Extraction:
+        return clean_text('\n'.join(self.iter_text(file_path))), None, None
+
+    async def extract_async(self, file_path: str) -> Extraction:
+        """extract() off the event loop: HEAVY in the process pool, LIGHT in a thread"""
+        if self.cost == HEAVY:
+            return await process_pool.run(extract_file, file_path)
+        return await asyncio.to_thread(self.extract, file_path)
+
+class PlainTextExtractor(Extractor):
+    name = "text"
+    mime_types = ("text/plain",)
+    extensions = ("txt",)
+
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+            while True:
+                block = file.read(1024 * 1024)
+                if not block:
+                    break
+                yield block
+
+    def extract(self, file_path: str) -> Extraction:
+        # Blocks are raw slices of the file, not lines
+        return clean_text(''.join(self.iter_text(file_path))), None, None
+
+def _row_batches(rows, header: Optional[List[str]] = None) -> Iterator[str]:
+    """Join rows as 'a | b | c' lines, ROW_BATCH rows per block, each block led by the header"""
+    batch: List[str] = []
+    for row in rows:
+        cells = ["" if cell is None else str(cell).strip() for cell in row]
+        if not any(cells):
+            continue
+        if header is None:
+            header = cells
+            continue
+        batch.append(" | ".join(cells))
+        if len(batch) >= ROW_BATCH:
+            yield "\n".join([" | ".join(header)] + batch)
+            batch = []
+    if batch or header is not None:
+        yield "\n".join(([" | ".join(header)] if header else []) + batch)
+
+class CSVExtractor(Extractor):
+    name = "csv"
+    mime_types = ("text/csv", "application/csv")
+    extensions = ("csv",)
+
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        with open(file_path, 'r', encoding='utf-8-sig', errors='replace', newline='') as file:
+            sample = file.read(SNIFF_BYTES)
+            file.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample)
+            except csv.Error:
+                dialect = csv.excel
+            yield from _row_batches(csv.reader(file, dialect))
+
+class JSONExtractor(Extractor):
+    name = "json"
+    mime_types = ("application/json",)
+    extensions = ("json",)
+
+    def _walk(self, value: Any, path: str) -> Iterator[str]:
+        if isinstance(value, dict):
+            for key, item in value.items():
+                yield from self._walk(item, f"{path}.{key}" if path else str(key))
+        elif isinstance(value, list):
+            for item in value:
+                yield from self._walk(item, path)
+        elif isinstance(value, str) and value.strip():
+            yield f"{path}: {value}" if path else value
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield f"{path}: {value}"
+
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        with open(file_path, 'r', encoding='utf-8-sig') as file:
+            yield from self._walk(json.load(file), "")
+
+class XMLExtractor(Extractor):
+    name = "xml"
+    mime_types = ("text/xml", "application/xml")
+    extensions = ("xml",)
+
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        for _, element in ElementTree.iterparse(file_path, events=("end",)):
+            for part in (element.text, element.tail):
+                if part and part.strip():
+                    yield part.strip()
+            # Parsed elements are dropped as we go
+            element.clear()
+
+class _HTMLTextParser(HTMLParser):
+    BLOCK_TAGS = {
+        "p", "div", "br", "li", "tr", "section", "article", "header", "footer",
+        "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "table", "ul", "ol", "title"
+    }
+    SKIP_TAGS = {"script", "style", "noscript", "template", "head"}
+    HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.headings: List[Tuple[int, str]] = []
+        self._skip_depth = 0
+        self._heading: Optional[Tuple[int, List[str]]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+        if tag in self.HEADING_TAGS:
+            self._heading = (self.HEADING_TAGS[tag], [])
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+        if tag in self.HEADING_TAGS and self._heading is not None:
+            level, words = self._heading
+            self.headings.append((level, re.sub(r"\s+", " ", "".join(words)).strip()))
+            self._heading = None
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self.parts.append(data)
+        if self._heading is not None:
+            self._heading[1].append(data)
+
+class HTMLExtractor(Extractor):
+    name = "html"
+    mime_types = ("text/html", "application/xhtml+xml")
+    extensions = ("html", "htm")
+
+    def _parse(self, file_path: str) -> Iterator[Tuple[str, _HTMLTextParser]]:
+        parser = _HTMLTextParser()
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+            while True:
+                block = file.read(64 * 1024)
+                if not block:
+                    break
+                parser.feed(block)
+                yield "".join(parser.parts), parser
+                parser.parts = []
+        parser.close()
+        yield "".join(parser.parts), parser
+
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        for text, _ in self._parse(file_path):
+            yield text
+
+    def extract(self, file_path: str) -> Extraction:
+        blocks = []
+        parser = None
+        for text, parser in self._parse(file_path):
+            blocks.append(text)
+        # Inline whitespace is not significant in HTML
+        text = clean_text("\n".join(re.sub(r"[ \t\r\f\v]+", " ", line).strip() for line in "".join(blocks).split("\n")))
+        return text, locate_headings(text, parser.headings) if parser else None, None
+
+class PDFExtractor(Extractor):
+    """
+    PDF text layer, with OCR of image-only pages (scans) when Tesseract is
+    installed. Pages that have text are never OCRed; in extract_async the
+    OCRed pages are spread over the process pool.
+    """
+
+    name = "pdf"
+    mime_types = ("application/pdf",)
+    extensions = ("pdf",)
+    cost = HEAVY
+
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        yield self.extract(file_path)[0]
+
+    @staticmethod
+    def _inspect(file_path: str) -> Dict[str, Any]:
+        from app.services.pdf_service import PDFService
+        return PDFService.inspect_pdf(file_path, extract_text=True, min_text_chars=settings.OCR_MIN_PAGE_CHARS)
+
+    @staticmethod
+    def _ocr_pages(info: Dict[str, Any]) -> List[int]:
+        from app.services.ocr import ocr_available
+        pages = info.get("image_only_pages") or []
+        return pages if pages and ocr_available() else []
+
+    def extract(self, file_path: str) -> Extraction:
+        from app.services.ocr import ocr_page
+
+        info = self._inspect(file_path)
+        ocr = {}
+        for page in self._ocr_pages(info):
+            try:
+                ocr[page] = ocr_page(file_path, page)
+            except Exception as e:
+                logger.error(f"OCR of page {page} of {file_path} failed: {str(e)}")
+        return self._assemble(info, ocr)
+
+    async def extract_async(self, file_path: str) -> Extraction:
+        from app.services.ocr import ocr_page
+
+        info = await process_pool.run(self._inspect, file_path)
+        pages = self._ocr_pages(info)
+        ocr = {}
+        if pages:
+            logger.info(f"OCR of {len(pages)} image-only pages of {file_path}")
+            results = await asyncio.gather(
+                *(process_pool.run(ocr_page, file_path, page) for page in pages),
+                return_exceptions=True
+            )
+            for page, result in zip(pages, results):
+                if isinstance(result, Exception):
+                    logger.error(f"OCR of page {page} of {file_path} failed: {str(result)}")
+                else:
+                    ocr[page] = result
+        return await asyncio.to_thread(self._assemble, info, ocr)
+
+    @staticmethod
+    def _assemble(info: Dict[str, Any], ocr: Dict[int, Dict[str, Any]]) -> Extraction:
+        """Join page texts (OCR text for OCRed pages) and map outline entries to lines"""
+        page_texts = list(info["page_texts"])
+        for page, result in ocr.items():
+            page_texts[page - 1] = result["text"]
+
+        # Pages are cleaned one by one and joined by a blank line, so the
+        # line and offset each page starts at are known without searching
+        page_lines = [clean_text(page).split('\n') for page in page_texts]
+        joined = '\n\n'.join('\n'.join(lines) for lines in page_lines)
+        text = joined.strip()
+        lead = joined[:len(joined) - len(joined.lstrip())]
+        page_starts = []
+        page_offsets = []
+        line = -lead.count('\n')
+        offset = -len(lead)
+        for lines in page_lines:
+            page_starts.append(max(0, line))
+            page_offsets.append(max(0, offset))
+            line += len(lines) + 1
+            offset += len('\n'.join(lines)) + 2
+
+        headings = []
+        for entry in info["outline"]:
+            page = entry["page"]
+            if not entry["title"] or not page or page > len(page_lines):
+                continue
+            start = page_starts[page - 1]
+            # Prefer the heading's own line when it is printed on the page
+            title = entry["title"].casefold()
+            for index, page_line in enumerate(page_lines[page - 1]):
+                if page_line.strip().casefold() == title:
+                    start += index
+                    break
+            headings.append({"level": entry["level"], "title": entry["title"], "line": start})
+
+        ocr_spans = []
+        for page in sorted(ocr):
+            start = page_offsets[page - 1]
+            end = start + len('\n'.join(page_lines[page - 1]))
+            if end > start:
+                ocr_spans.append({"page": page, "start": start, "end": end, "confidence": ocr[page]["confidence"]})
+        return text, headings or None, ocr_spans or None
+
+class DocxExtractor(Extractor):
+    name = "docx"
+    mime_types = ("application/vnd.openxmlformats-officedocument.wordprocessingml.document",)
+    extensions = ("docx",)
+
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        from docx import Document as DocxDocument
+        for paragraph in DocxDocument(file_path).paragraphs:
+            yield paragraph.text
+
+    def extract(self, file_path: str) -> Extraction:
+        """Extract DOCX text and its "Heading N" paragraphs"""
+        from docx import Document as DocxDocument
+        doc = DocxDocument(file_path)
+
+        text = clean_text('\n'.join([p.text for p in doc.paragraphs]))
+        headings = []
+        for paragraph in doc.paragraphs:
+            match = re.match(r'^heading\s+(\d+)$', (paragraph.style.name or '').strip(), re.IGNORECASE)
+            if match:
+                headings.append((int(match.group(1)), paragraph.text))
+        return text, locate_headings(text, headings), None
+
+class XLSXExtractor(Extractor):
+    name = "xlsx"
+    mime_types = ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",)
+    extensions = ("xlsx",)
+    cost = HEAVY
+
+    def available(self) -> bool:
+        try:
+            import openpyxl  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        import openpyxl
+        # read_only streams rows instead of loading every cell
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                yield sheet.title
+                yield from _row_batches(sheet.iter_rows(values_only=True))
+        finally:
+            workbook.close()
+
+    def extract(self, file_path: str) -> Extraction:
+        import openpyxl
+        workbook = openpyxl.load_workbook(file_path, read_only=True)
+        sheet_names = workbook.sheetnames
+        workbook.close()
+        text = clean_text('\n'.join(self.iter_text(file_path)))
+        # One chapter per sheet
+        return text, locate_headings(text, [(1, name) for name in sheet_names]), None
+
+class XLSExtractor(XLSXExtractor):
+    name = "xls"
+    mime_types = ("application/vnd.ms-excel",)
+    extensions = ("xls",)
+
+    def available(self) -> bool:
+        try:
+            import xlrd  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        import xlrd
+        workbook = xlrd.open_workbook(file_path, on_demand=True)
+        try:
+            for index in range(workbook.nsheets):
+                sheet = workbook.sheet_by_index(index)
+                yield sheet.name
+                yield from _row_batches(sheet.row_values(row) for row in range(sheet.nrows))
+                workbook.unload_sheet(index)
+        finally:
+            workbook.release_resources()
+
+    def extract(self, file_path: str) -> Extraction:
+        import xlrd
+        workbook = xlrd.open_workbook(file_path, on_demand=True)
+        sheet_names = workbook.sheet_names()
+        workbook.release_resources()
+        text = clean_text('\n'.join(self.iter_text(file_path)))
+        return text, locate_headings(text, [(1, name) for name in sheet_names]), None
+
+class PPTXExtractor(Extractor):
+    name = "pptx"
+    mime_types = ("application/vnd.openxmlformats-officedocument.presentationml.presentation",)
+    extensions = ("pptx",)
+    cost = HEAVY
+
+    def available(self) -> bool:
+        try:
+            import pptx  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def _slides(self, file_path: str) -> Iterator[Tuple[Optional[str], str]]:
+        """(title, text) per slide"""
+        from pptx import Presentation
+
+        for slide in Presentation(file_path).slides:
+            title_shape = slide.shapes.title
+            title = title_shape.text_frame.text.strip() if title_shape is not None and title_shape.has_text_frame else None
+            parts = []
+            for shape in slide.shapes:
+                if shape.has_text_frame:
+                    parts.append(shape.text_frame.text)
+                elif getattr(shape, "has_table", False) and shape.has_table:
+                    for row in shape.table.rows:
+                        parts.append(" | ".join(cell.text for cell in row.cells))
+            if slide.has_notes_slide and slide.notes_slide.notes_text_frame is not None:
+                parts.append(slide.notes_slide.notes_text_frame.text)
+            yield title, "\n".join(part for part in parts if part.strip())
+
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        for _, text in self._slides(file_path):
+            yield text
+
+    def extract(self, file_path: str) -> Extraction:
+        blocks = []
+        titles = []
+        for title, text in self._slides(file_path):
+            blocks.append(text)
+            if title:
+                titles.append((1, title))
+        text = clean_text('\n\n'.join(blocks))
+        return text, locate_headings(text, titles), None
+
+class ODTExtractor(Extractor):
+    name = "odt"
+    mime_types = ("application/vnd.oasis.opendocument.text",)
+    extensions = ("odt",)
+
+    TEXT_NS = "urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+
+    def _paragraphs(self, file_path: str) -> Iterator[Tuple[Optional[int], str]]:
+        """(outline level or None, text) per paragraph/heading of content.xml"""
+        paragraph = f"{{{self.TEXT_NS}}}p"
+        heading = f"{{{self.TEXT_NS}}}h"
+        with zipfile.ZipFile(file_path) as archive, archive.open("content.xml") as content:
+            for _, element in ElementTree.iterparse(content, events=("end",)):
+                if element.tag == heading:
+                    level = element.get(f"{{{self.TEXT_NS}}}outline-level") or "1"
+                    yield int(level), "".join(element.itertext())
+                    element.clear()
+                elif element.tag == paragraph:
+                    yield None, "".join(element.itertext())
+                    element.clear()
+
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        for _, text in self._paragraphs(file_path):
+            yield text
+
+    def extract(self, file_path: str) -> Extraction:
+        lines = []
+        headings = []
+        for level, text in self._paragraphs(file_path):
+            lines.append(text)
+            if level is not None:
+                headings.append((level, text))
+        text = clean_text('\n'.join(lines))
+        return text, locate_headings(text, headings), None
+
+class RTFExtractor(Extractor):
+    name = "rtf"
+    mime_types = ("text/rtf", "application/rtf")
+    extensions = ("rtf",)
+
+    def available(self) -> bool:
+        try:
+            import striprtf  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        from striprtf.striprtf import rtf_to_text
+        with open(file_path, 'r', encoding='ascii', errors='ignore') as file:
+            # RTF escapes all non-ASCII text
+            yield rtf_to_text(file.read(), errors='ignore')
+
+class LegacyOfficeExtractor(Extractor):
+    """
+    Binary Office formats (doc, ppt): converted to their OOXML counterpart
+    with a headless LibreOffice, then extracted as such.
+    """
+
+    name = "legacy-office"
+    mime_types = ("application/msword", "application/vnd.ms-powerpoint")
+    extensions = ("doc", "ppt")
+    cost = HEAVY
+
+    TARGETS = {"doc": ("docx", DocxExtractor), "ppt": ("pptx", PPTXExtractor)}
+
+    def available(self) -> bool:
+        return shutil.which(settings.LIBREOFFICE_BINARY) is not None
+
+    def _convert(self, file_path: str, output_dir: str) -> Tuple[str, Extractor]:
+        ext = os.path.splitext(file_path)[1].lower().lstrip('.')
+        target, extractor_class = self.TARGETS[ext]
+        subprocess.run(
+            [shutil.which(settings.LIBREOFFICE_BINARY), "--headless", "--convert-to", target, "--outdir", output_dir, file_path],
+            check=True,
+            capture_output=True,
+            timeout=settings.LIBREOFFICE_TIMEOUT_SECONDS
+        )
+        converted = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(file_path))[0]}.{target}")
+        return converted, extractor_class()
+
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        yield self.extract(file_path)[0]
+
+    def extract(self, file_path: str) -> Extraction:
+        with tempfile.TemporaryDirectory() as output_dir:
+            converted, extractor = self._convert(file_path, output_dir)
+            return extractor.extract(converted)
+
+# Ordered registry; the first available extractor matching a file wins
+EXTRACTORS: List[Extractor] = [
+    PDFExtractor(),
+    DocxExtractor(),
+    PPTXExtractor(),
+    XLSXExtractor(),
+    XLSExtractor(),
+    ODTExtractor(),
+    RTFExtractor(),
+    LegacyOfficeExtractor(),
+    HTMLExtractor(),
+    XMLExtractor(),
+    JSONExtractor(),
+    CSVExtractor(),
+    PlainTextExtractor(),
+]
+
+# Sniffed types that only identify a container or encoding; the extension
+# picks the format among those the container can hold
+GENERIC_MIME_TYPES = {
+    "application/zip": {"docx", "xlsx", "pptx", "odt"},
+    "application/x-zip-compressed": {"docx", "xlsx", "pptx", "odt"},
+    "application/cdfv2": {"doc", "xls", "ppt"},
+    "application/x-ole-storage": {"doc", "xls", "ppt"},
+    "text/plain": {"txt", "csv", "json", "xml", "html", "htm", "rtf"},
+    "application/octet-stream": None,
+}
+
+def register_extractor(extractor: Extractor, first: bool = True) -> None:
+    """Add an extractor; by default it takes precedence over the built-in ones"""
+    if first:
+        EXTRACTORS.insert(0, extractor)
+    else:
+        EXTRACTORS.append(extractor)
+
+def sniff_mime(head: bytes, filename: str) -> Optional[str]:
+    """MIME type from the file's first bytes (python-magic), else from its name"""
+    try:
+        import magic
+        return magic.from_buffer(head, mime=True).lower()
+    except Exception:
+        # libmagic missing or unusable
+        return mimetypes.guess_type(filename)[0]
+
+def resolve_extractor(filename: str, head: bytes) -> Extractor:
+    """
+    Pick the extractor for a file from its content and name.
+
+    Raises:
+        InvalidFileError: if the content is of an unsupported type, does not
+            match the extension, or needs an extractor that is not installed
+    """
+    ext = os.path.splitext(filename)[1].lower().lstrip('.')
+    mime = sniff_mime(head, filename)
+
+    candidates = [extractor for extractor in EXTRACTORS if ext in extractor.extensions]
+    if mime in GENERIC_MIME_TYPES:
+        allowed = GENERIC_MIME_TYPES[mime]
+        if allowed is not None and ext not in allowed:
+            candidates = []
+    elif ext == "txt" and mime is not None and mime.startswith("text/"):
+        # A .txt may hold any text (comma-separated, markup, ...); it is
+        # read as plain text whatever libmagic recognises in it
+        pass
+    elif mime is not None:
+        by_mime = [extractor for extractor in EXTRACTORS if mime in extractor.mime_types]
+        if not by_mime and not candidates:
+            raise InvalidFileError(
+                f"Unsupported file content: {mime}",
+                data={"file_name": filename, "mime_type": mime}
+            )
+        if by_mime:
+            candidates = [extractor for extractor in by_mime if ext in extractor.extensions]
+            if not candidates:
+                raise InvalidFileError(
+                    f"File content ({mime}) does not match its extension .{ext}",
+                    data={"file_name": filename, "mime_type": mime}
+                )
+
+    if not candidates:
+        raise InvalidFileError(
+            f"Unsupported file type: {ext}",
+            data={"file_name": filename, "mime_type": mime}
+        )
+    for extractor in candidates:
+        if extractor.available():
+            return extractor
+    raise InvalidFileError(
+        f"No text extractor installed for .{ext} files",
+        data={"file_name": filename, "extractor": candidates[0].name}
+    )
+
+def _read_head(file_path: str) -> bytes:
+    with open(file_path, 'rb') as file:
+        return file.read(SNIFF_BYTES)
+
+def extract_file(file_path: str) -> Extraction:
+    """Extract text and native headings of a file (blocking)"""
+    extractor = resolve_extractor(os.path.basename(file_path), _read_head(file_path))
+    return extractor.extract(file_path)
+
+async def extract_file_async(file_path: str) -> Extraction:
+    """Extract a file off the event loop (see Extractor.extract_async)"""
+    head = await asyncio.to_thread(_read_head, file_path)
+    extractor = resolve_extractor(os.path.basename(file_path), head)
+    logger.info(f"Extracting {file_path} with {extractor.name} ({extractor.cost})")
+    return await extractor.extract_async(file_path)
@@ -1,11 +1,15 @@
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, AsyncIterator
 import logging
 import json
 import requests
 import os
 import base64
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI, RateLimitError, APIStatusError
 from requests.exceptions import RequestException
+from app.core.config import settings
+from app.core.rate_limiter import llm_rate_limiter, parse_retry_after, INTERACTIVE
+from app.services.tokenization import estimate_request_tokens, estimate_tokens
+from app.services.context_packer import pack_context
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -34,8 +38,16 @@ class RAGPromptManager:
             
         self.provider = provider
         self.client = OpenAI(api_key=provider["api_key"], base_url="https://api.x.ai/v1")
+        self._async_client: Optional[AsyncOpenAI] = None
         self.api_url = None
 
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Async client used for streaming, created on first use"""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(api_key=self.provider["api_key"], base_url="https://api.x.ai/v1")
+        return self._async_client
+
     def _create_prompt(self, query: str, documents: List[Dict[str, Any]], context: Optional[Dict[str, Any]] = None) -> str:
         """
         Create a prompt for the LLM using the query and retrieved documents.
@@ -48,6 +60,9 @@ class RAGPromptManager:
         # Maximum number of chat history messages to include in prompt
         MAX_HISTORY_IN_PROMPT = 3
 
+        # Merge adjacent chunks, drop overlaps and near-duplicates, fit the budget
+        documents = pack_context(documents)
+
         # System Role and Core Instruction
         prompt = "You are a specialized AI assistant for SenseLib Digital Library. Your primary role is to provide accurate and concise answers to questions about documents in the library. You can answer questions about:"
         prompt += "\n- Document content and summaries"
@@ -129,12 +144,25 @@ class RAGPromptManager:
         try:
             prompt = self._create_prompt(query, documents, context)
             
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            # Answers share the provider quota with batch summarization but
+            # are served first by the limiter
+            with llm_rate_limiter.limit_sync(
+                estimate_request_tokens([prompt], max_tokens),
+                priority=INTERACTIVE,
+                timeout=settings.LLM_INTERACTIVE_WAIT_SECONDS
+            ) as permit:
+                try:
+                    response = self.client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=temperature,
+                        max_tokens=max_tokens
+                    )
+                except (RateLimitError, APIStatusError) as e:
+                    if e.status_code in (429, 503):
+                        llm_rate_limiter.note_rate_limited(parse_retry_after(e.response.headers.get("retry-after")))
+                    raise
+                permit.record_usage(response.usage.total_tokens if response.usage else None)
             
             answer = response.choices[0].message.content.strip()
             
@@ -157,4 +185,93 @@ class RAGPromptManager:
                 "error": str(e),
                 "answer": "Xin lỗi, đã có lỗi xảy ra khi xử lý câu hỏi của bạn.",
                 "provider": "grok"
-            } 
\ No newline at end of file
+            }
+
+    async def stream_answer(
+        self,
+        query: str,
+        documents: List[Dict[str, Any]],
+        temperature: float = 0.1,
+        max_tokens: int = 500,
+        model: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an answer from Grok API as it is generated.
+        
+        Args:
+            query: User's question
+            documents: List of retrieved documents
+            temperature: Sampling temperature (0.0 to 1.0)
+            max_tokens: Maximum tokens in response
+            model: Model name (default: GROK_API_MODEL)
+            context: Optional context dictionary
+            
+        Yields:
+            {"type": "token", "content": ...} for each text delta, then a
+            single {"type": "usage", ...} or {"type": "error", ...} event
+        """
+        model = model or settings.GROK_API_MODEL
+        prompt = self._create_prompt(query, documents, context)
+        completion_parts: List[str] = []
+        usage = None
+
+        try:
+            async with llm_rate_limiter.limit(
+                estimate_request_tokens([prompt], max_tokens),
+                priority=INTERACTIVE,
+                timeout=settings.LLM_INTERACTIVE_WAIT_SECONDS
+            ) as permit:
+                try:
+                    stream = await self.async_client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=True,
+                        stream_options={"include_usage": True}
+                    )
+                except (RateLimitError, APIStatusError) as e:
+                    if e.status_code in (429, 503):
+                        llm_rate_limiter.note_rate_limited(parse_retry_after(e.response.headers.get("retry-after")))
+                    raise
+
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        completion_parts.append(delta)
+                        yield {"type": "token", "content": delta}
+
+                permit.record_usage(usage.total_tokens if usage else None)
+
+            if usage is not None:
+                prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+            else:
+                # Provider did not report usage for the stream; estimate it
+                prompt_tokens = estimate_tokens(prompt)
+                completion_tokens = estimate_tokens("".join(completion_parts))
+
+            yield {
+                "type": "usage",
+                "model": model,
+                "provider": "grok",
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "estimated": usage is None
+            }
+
+        except Exception as e:
+            logger.error(f"Error streaming answer: {str(e)}")
+            yield {
+                "type": "error",
+                "error": str(e),
+                "answer": "Xin lỗi, đã có lỗi xảy ra khi xử lý câu hỏi của bạn.",
+                "provider": "grok"
+            }
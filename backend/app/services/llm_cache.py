@@ -0,0 +1,116 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class LLMResponseCache:
+    """
+    Durable cache of LLM responses in a local SQLite file.
+
+    Entries are keyed by (model, prompt template version, sha256(input)) so a
+    prompt change only needs a new template version to stop old answers
+    from being served. SQLite in WAL mode lets every worker process on the
+    host share the file.
+    """
+
+    def __init__(self, path: str, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @staticmethod
+    def hash_input(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    model TEXT NOT NULL,
+                    template_version TEXT NOT NULL,
+                    input_hash TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (model, template_version, input_hash)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.commit()
+            self._conn = conn
+            logger.info(f"Opened LLM response cache at {self.path}")
+        return self._conn
+
+    def get(self, model: str, template_version: str, text: str) -> Optional[str]:
+        """Return the cached response for an input, or None"""
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT response FROM llm_responses WHERE model = ? AND template_version = ? AND input_hash = ?",
+                    (model, template_version, self.hash_input(text))
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                self.hits += 1
+                return row[0]
+        except sqlite3.Error as e:
+            # A broken cache must never break summarization
+            logger.error(f"LLM cache read failed: {str(e)}")
+            return None
+
+    def set(self, model: str, template_version: str, text: str, response: str) -> None:
+        """Store a successful response"""
+        if not self.enabled:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (model, template_version, input_hash, response, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (model, template_version, self.hash_input(text), response, time.time())
+                )
+                conn.commit()
+                self.writes += 1
+        except sqlite3.Error as e:
+            logger.error(f"LLM cache write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+# Process-wide LLM response cache
+llm_response_cache = LLMResponseCache(
+    path=settings.LLM_CACHE_PATH,
+    enabled=settings.LLM_CACHE_ENABLED
+)
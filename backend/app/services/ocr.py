@@ -0,0 +1,143 @@
+"""
+OCR of scanned PDF pages.
+
+Only pages without a text layer are OCRed (see PDFService.inspect_pdf
+image_only_pages). Each page is rendered with poppler and read by Tesseract
+in OCR_LANGUAGES; ocr_page is CPU-bound and meant to run in the shared
+process pool, one call per page, so a scanned book is read in parallel.
+
+Results are cached on disk by a hash of the rendered page, so re-uploads
+and re-indexing of the same scan skip Tesseract entirely.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def ocr_available() -> bool:
+    """Whether pytesseract, pdf2image and their binaries are installed"""
+    if not settings.OCR_ENABLED:
+        return False
+    try:
+        import pytesseract  # noqa: F401
+        import pdf2image  # noqa: F401
+    except ImportError:
+        logger.warning("OCR disabled: pytesseract or pdf2image is not installed")
+        return False
+    if shutil.which(settings.OCR_TESSERACT_CMD) is None or shutil.which("pdftoppm") is None:
+        logger.warning("OCR disabled: tesseract or poppler (pdftoppm) is not on PATH")
+        return False
+    return True
+
+class OCRPageCache:
+    """
+    Disk cache of OCR results, one small JSON file per page keyed by
+    (sha256 of the rendered page, languages, DPI). Shared by all processes.
+    """
+
+    def __init__(self, directory: str, enabled: bool = True):
+        self.directory = directory
+        self.enabled = enabled
+
+    @staticmethod
+    def make_key(image, languages: str, dpi: int) -> str:
+        page_hash = hashlib.sha256(image.tobytes()).hexdigest()
+        return hashlib.sha256(f"{page_hash}\0{image.mode}\0{image.size}\0{languages}\0{dpi}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"OCR cache read failed: {str(e)}")
+            return None
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"OCR cache write failed: {str(e)}")
+
+# Process-wide OCR cache (each pool worker has its own handle on the directory)
+ocr_page_cache = OCRPageCache(directory=settings.OCR_CACHE_DIR)
+
+def _tesseract_text(image) -> Dict[str, Any]:
+    """Text of a page image, lines and paragraphs as laid out, with mean word confidence"""
+    import pytesseract
+
+    pytesseract.pytesseract.tesseract_cmd = settings.OCR_TESSERACT_CMD
+    data = pytesseract.image_to_data(image, lang=settings.OCR_LANGUAGES, output_type=pytesseract.Output.DICT)
+
+    lines: Dict[tuple, list] = {}
+    confidences = []
+    for index, word in enumerate(data["text"]):
+        confidence = float(data["conf"][index])
+        # conf is -1 for layout rows without text
+        if confidence < 0 or not word.strip():
+            continue
+        line = (data["block_num"][index], data["par_num"][index], data["line_num"][index])
+        lines.setdefault(line, []).append(word)
+        confidences.append(confidence)
+
+    parts = []
+    paragraph = None
+    for (block, par, _), words in lines.items():
+        if paragraph is not None and (block, par) != paragraph:
+            parts.append("")
+        paragraph = (block, par)
+        parts.append(" ".join(words))
+    return {
+        "text": "\n".join(parts),
+        "confidence": round(sum(confidences) / len(confidences), 1) if confidences else 0.0
+    }
+
+def ocr_page(pdf_path: str, page_number: int) -> Dict[str, Any]:
+    """
+    OCR one page (1-based) of a PDF (blocking, CPU-bound; run it in the
+    process pool).
+
+    Returns:
+        {"text": str, "confidence": mean word confidence 0-100, "cached": bool}
+    """
+    from pdf2image import convert_from_path
+
+    images = convert_from_path(
+        pdf_path,
+        dpi=settings.OCR_DPI,
+        first_page=page_number,
+        last_page=page_number,
+        grayscale=True
+    )
+    if not images:
+        return {"text": "", "confidence": 0.0, "cached": False}
+
+    key = ocr_page_cache.make_key(images[0], settings.OCR_LANGUAGES, settings.OCR_DPI)
+    cached = ocr_page_cache.get(key)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    result = _tesseract_text(images[0])
+    ocr_page_cache.set(key, result)
+    return {**result, "cached": False}
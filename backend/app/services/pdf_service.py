@@ -1,19 +1,20 @@
 import os
 import logging
-from typing import Optional, Tuple
-from pdf2image import convert_from_path
-from PIL import Image
-import tempfile
+from typing import Any, Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 class PDFService:
     """Service for handling PDF operations including cover extraction"""
     
+    # Pages checked for a text layer when text is not extracted
+    TEXT_LAYER_SAMPLE_PAGES = 3
+    
     @staticmethod
     def extract_cover_image(pdf_path: str, output_dir: str, filename: str) -> Optional[str]:
         """
-        Extract the first page of a PDF as a cover image
+        Extract the first page of a PDF as a cover image (blocking, CPU-bound;
+        run it in the process pool)
         
         Args:
             pdf_path: Path to the PDF file
@@ -21,43 +22,116 @@ class PDFService:
             filename: Base filename for the cover image
             
         Returns:
-            Optional[str]: URL path to the saved cover image if successful, None otherwise
+            Optional[str]: URL path of the default-size cover if successful, None otherwise
         """
         try:
             logger.info(f"Extracting cover image from PDF: {pdf_path}")
             
-            # Create output directory if it doesn't exist
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # Convert first page to image
-            images = convert_from_path(
-                pdf_path,
-                first_page=1,
-                last_page=1,
-                dpi=300  # Higher DPI for better quality
-            )
-            
-            if not images:
-                logger.error("No pages found in PDF")
+            # Renders page 1 at cover size and saves every thumbnail variant
+            from app.services.cover_images import render_pdf_cover
+
+            result = render_pdf_cover(pdf_path, output_dir, filename)
+            if not result:
                 return None
             
-            # Get the first page image
-            cover_image = images[0]
-            
-            # Save as JPEG with good quality
-            output_path = os.path.join(output_dir, f"{filename}_cover.jpg")
-            cover_image.save(output_path, "JPEG", quality=95)
-            
-            # Generate URL path
-            url_path = f"/uploads/images/{filename}_cover.jpg"
-            
-            logger.info(f"Cover image extracted and saved to: {output_path}")
-            return url_path
+            logger.info(f"Cover image extracted: {result['image_url']}")
+            return result["image_url"]
             
         except Exception as e:
             logger.error(f"Error extracting cover image: {str(e)}")
             return None
     
+    @staticmethod
+    def _resolve_outline_page(doc, dest, action, page_numbers: Dict[int, int]) -> Optional[int]:
+        """Page number (1-based) an outline entry points to, if it can be resolved"""
+        from pdfminer.pdftypes import PDFObjRef, resolve1
+
+        if dest is None and action is not None:
+            action = resolve1(action)
+            if isinstance(action, dict):
+                dest = action.get("D")
+        dest = resolve1(dest)
+        if isinstance(dest, (bytes, str)):
+            # Named destination
+            name = dest.decode("latin-1") if isinstance(dest, bytes) else dest
+            try:
+                dest = resolve1(doc.get_dest(name))
+            except Exception:
+                return None
+        if isinstance(dest, dict):
+            dest = resolve1(dest.get("D"))
+        if isinstance(dest, list) and dest:
+            target = dest[0]
+            if isinstance(target, PDFObjRef):
+                return page_numbers.get(target.objid)
+            if isinstance(target, int):
+                # Some producers write a 0-based page index
+                return target + 1
+        return None
+
+    @staticmethod
+    def inspect_pdf(pdf_path: str, extract_text: bool = False, min_text_chars: int = 1) -> Dict[str, Any]:
+        """
+        Inspect a PDF in a single open: page count and sizes, outline
+        (bookmarks) with target pages, text-layer presence and document
+        metadata. Nothing is rasterized.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            extract_text: Also extract the text of every page (same pass)
+            min_text_chars: Pages with less text than this count as image-only
+            
+        Returns:
+            Dict with page_count, page_sizes ([width, height] in points),
+            outline ([{level, title, page}]), has_text_layer, metadata and,
+            with extract_text, page_texts (one string per page) and
+            image_only_pages (numbers of pages with images but no text,
+            i.e. scans that need OCR)
+        """
+        import pdfplumber
+
+        with pdfplumber.open(pdf_path) as pdf:
+            pages = pdf.pages
+            page_numbers = {page.page_obj.pageid: page.page_number for page in pages}
+
+            outline = []
+            try:
+                for level, title, dest, action, _ in pdf.doc.get_outlines():
+                    outline.append({
+                        "level": level,
+                        "title": (title or "").strip(),
+                        "page": PDFService._resolve_outline_page(pdf.doc, dest, action, page_numbers)
+                    })
+            except Exception as e:
+                # PDFNoOutlines, or a broken outline tree
+                logger.debug(f"No usable outline in {pdf_path}: {str(e)}")
+
+            result: Dict[str, Any] = {
+                "page_count": len(pages),
+                "page_sizes": [[float(page.width), float(page.height)] for page in pages],
+                "outline": outline,
+                "metadata": {
+                    key: value for key, value in (pdf.metadata or {}).items()
+                    if isinstance(value, (str, int, float))
+                }
+            }
+
+            if extract_text:
+                page_texts = [page.extract_text() or "" for page in pages]
+                result["page_texts"] = page_texts
+                result["has_text_layer"] = any(text.strip() for text in page_texts)
+                result["image_only_pages"] = [
+                    page.page_number for page, text in zip(pages, page_texts)
+                    if len(text.strip()) < min_text_chars and page.images
+                ]
+            else:
+                # Parsing characters costs about as much as extracting text,
+                # so only the first pages are checked
+                result["has_text_layer"] = any(
+                    page.chars for page in pages[:PDFService.TEXT_LAYER_SAMPLE_PAGES]
+                )
+        return result
+
     @staticmethod
     def get_pdf_metadata(pdf_path: str) -> Tuple[int, int, int]:
         """
@@ -67,24 +141,17 @@ class PDFService:
             pdf_path: Path to the PDF file
             
         Returns:
-            Tuple[int, int, int]: (number of pages, width, height)
+            Tuple[int, int, int]: (number of pages, width, height), the size
+            of the first page in pixels at 200 DPI
         """
         try:
-            # Convert first page to get dimensions
-            images = convert_from_path(pdf_path, first_page=1, last_page=1)
-            if not images:
+            info = PDFService.inspect_pdf(pdf_path)
+            if not info["page_count"]:
                 return 0, 0, 0
-                
-            # Get dimensions from first page
-            width, height = images[0].size
-            
-            # Get total pages
-            from PyPDF2 import PdfReader
-            reader = PdfReader(pdf_path)
-            num_pages = len(reader.pages)
-            
-            return num_pages, width, height
+            width, height = info["page_sizes"][0]
+            # Points (1/72 inch) to pixels at pdf2image's default 200 DPI
+            return info["page_count"], round(width * 200 / 72), round(height * 200 / 72)
             
         except Exception as e:
             logger.error(f"Error getting PDF metadata: {str(e)}")
-            return 0, 0, 0 
\ No newline at end of file
+            return 0, 0, 0
@@ -1,10 +1,11 @@
-from underthesea import word_tokenize, pos_tag
 import re
+import threading
+from functools import lru_cache
 
 class QueryProcessor:
     """
     A class to preprocess and clean user queries before sending to the RAG system.
-    Uses underthesea for Vietnamese text processing.
+    Uses underthesea for Vietnamese text processing (loaded lazily).
     """
     
     # Common Vietnamese stopwords
@@ -20,6 +21,16 @@ class QueryProcessor:
         'này', 'kia', 'ấy', 'nọ', 'đây', 'đấy', 'đó', 'này', 'kia', 'ấy', 'nọ'
     }
     
+    # Queries with at most this many syllables and no stop-word syllable skip
+    # POS tagging: there is nothing to remove from them
+    FAST_PATH_MAX_WORDS = 3
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Remove special characters and extra spaces, convert to lowercase"""
+        query = _SPECIAL_CHARS.sub(' ', query)
+        return _WHITESPACE.sub(' ', query).strip().lower()
+
     @staticmethod
     def clean_query(query: str) -> str:
         """
@@ -28,27 +39,57 @@ class QueryProcessor:
         2. Convert to lowercase
         3. Remove stop words
         4. Keep only meaningful words (nouns, verbs, adjectives)
+
+        Results are cached per normalized query.
         """
-        # Remove special characters and extra spaces
-        query = re.sub(r'[^\w\s]', ' ', query)
-        query = re.sub(r'\s+', ' ', query).strip()
-        
-        # Convert to lowercase
-        query = query.lower()
-        
-        # Tokenize and POS tag
-        tokens = word_tokenize(query)
-        pos_tags = pos_tag(query)
-        
-        # Filter meaningful words
-        meaningful_words = []
-        for word, pos in pos_tags:
-            # Keep nouns, verbs, adjectives, and words not in stop words
-            if (pos.startswith('N') or pos.startswith('V') or pos.startswith('A') or 
-                (word not in QueryProcessor.STOP_WORDS and len(word) > 1)):
-                meaningful_words.append(word)
-        
-        # Join words back into a query
-        processed_query = ' '.join(meaningful_words)
-        
-        return processed_query if processed_query else query 
\ No newline at end of file
+        return _clean_normalized(QueryProcessor.normalize(query))
+
+    @staticmethod
+    def warm_up() -> None:
+        """Load the underthesea models ahead of the first long query"""
+        _get_pos_tag()("khởi động hệ thống")
+
+    @staticmethod
+    def cache_info():
+        return _clean_normalized.cache_info()
+
+_SPECIAL_CHARS = re.compile(r'[^\w\s]')
+_WHITESPACE = re.compile(r'\s+')
+
+_pos_tag = None
+_pos_tag_lock = threading.Lock()
+
+def _get_pos_tag():
+    """Import underthesea on first use (it loads its models on import)"""
+    global _pos_tag
+    if _pos_tag is None:
+        with _pos_tag_lock:
+            if _pos_tag is None:
+                from underthesea import pos_tag
+                _pos_tag = pos_tag
+    return _pos_tag
+
+@lru_cache(maxsize=1024)
+def _clean_normalized(query: str) -> str:
+    if not query:
+        return query
+
+    syllables = query.split(' ')
+    if (len(syllables) <= QueryProcessor.FAST_PATH_MAX_WORDS
+            and not any(syllable in QueryProcessor.STOP_WORDS for syllable in syllables)):
+        # Fast path: nothing to remove. A stop-word syllable may belong to a
+        # compound word ("người máy"), so those queries are segmented below
+        return query
+
+    # Single pass: pos_tag tokenizes (word segmentation) and tags at once
+    meaningful_words = []
+    for word, pos in _get_pos_tag()(query):
+        # Keep nouns, verbs, adjectives, and words not in stop words
+        if (pos.startswith('N') or pos.startswith('V') or pos.startswith('A') or 
+            (word not in QueryProcessor.STOP_WORDS and len(word) > 1)):
+            meaningful_words.append(word)
+    
+    # Join words back into a query
+    processed_query = ' '.join(meaningful_words)
+    
+    return processed_query if processed_query else query
@@ -0,0 +1,127 @@
+import json
+import logging
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Built-in synonym table for common library queries; extend it with a JSON
+# file ({"term": ["synonym", ...]}) via QUERY_SYNONYMS_PATH
+DEFAULT_SYNONYMS: Dict[str, List[str]] = {
+    "sách": ["tài liệu", "ấn phẩm"],
+    "tài liệu": ["sách", "văn bản"],
+    "tác giả": ["người viết"],
+    "tóm tắt": ["tổng quan", "nội dung chính"],
+    "lịch sử": ["sử"],
+    "kinh tế": ["kinh tế học"],
+    "máy tính": ["tin học", "máy vi tính"],
+    "trí tuệ nhân tạo": ["ai", "học máy"],
+    "học máy": ["machine learning", "trí tuệ nhân tạo"],
+    "luật": ["pháp luật", "quy định"],
+    "giáo trình": ["bài giảng", "sách giáo khoa"],
+}
+
+def fold_accents(text: str) -> str:
+    """Strip Vietnamese diacritics: 'Lịch sử Đà Nẵng' -> 'Lich su Da Nang'"""
+    text = text.replace("đ", "d").replace("Đ", "D")
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
+
+def segment(text: str) -> Optional[str]:
+    """Word-segmented form ('lịch_sử việt_nam'), or None if underthesea is unavailable"""
+    try:
+        from underthesea import word_tokenize
+        return word_tokenize(text, format="text")
+    except Exception as e:
+        logger.warning(f"Query segmentation skipped: {str(e)}")
+        return None
+
+@lru_cache(maxsize=1)
+def load_synonyms() -> Dict[str, List[str]]:
+    synonyms = dict(DEFAULT_SYNONYMS)
+    if settings.QUERY_SYNONYMS_PATH:
+        try:
+            with open(settings.QUERY_SYNONYMS_PATH, encoding="utf-8") as f:
+                synonyms.update(json.load(f))
+        except Exception as e:
+            logger.error(f"Failed to load query synonyms: {str(e)}")
+    return synonyms
+
+def synonym_rewrites(query: str) -> List[str]:
+    """One rewrite per synonym of each table term found in the query"""
+    rewrites = []
+    lowered = query.lower()
+    for term, alternatives in load_synonyms().items():
+        pattern = re.compile(rf"(?<!\w){re.escape(term)}(?!\w)")
+        if pattern.search(lowered):
+            rewrites.extend(pattern.sub(alternative, lowered) for alternative in alternatives)
+    return rewrites
+
+def llm_rewrites(query: str, client: Any, count: int = 2) -> List[str]:
+    """
+    Ask the LLM for alternative phrasings of a query (blocking).
+
+    Args:
+        query: Original question
+        client: OpenAI-compatible client (RAGPromptManager.client)
+        count: Number of rewrites requested
+    """
+    from app.core.rate_limiter import llm_rate_limiter, INTERACTIVE
+    from app.services.tokenization import estimate_request_tokens
+
+    prompt = (
+        f"Viết lại câu truy vấn tìm kiếm sau theo {count} cách khác nhau bằng tiếng Việt, "
+        f"dùng từ đồng nghĩa, mỗi cách trên một dòng, không giải thích:\n{query}"
+    )
+    try:
+        with llm_rate_limiter.limit_sync(
+            estimate_request_tokens([prompt], 100),
+            priority=INTERACTIVE,
+            timeout=settings.LLM_INTERACTIVE_WAIT_SECONDS
+        ) as permit:
+            response = client.chat.completions.create(
+                model=settings.GROK_API_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.3,
+                max_tokens=100
+            )
+            permit.record_usage(response.usage.total_tokens if response.usage else None)
+    except Exception as e:
+        logger.warning(f"LLM query rewrite skipped: {str(e)}")
+        return []
+    lines = (response.choices[0].message.content or "").splitlines()
+    # Drop list markers such as "1." or "-"
+    return [re.sub(r"^\s*(?:\d+[.)]|[-*•])\s*", "", line).strip() for line in lines if line.strip()][:count]
+
+def expand_query(query: str, llm_client: Any = None, max_variants: Optional[int] = None) -> List[str]:
+    """
+    Build search variants of a query: the query itself, its accent-folded
+    and word-segmented forms, synonym rewrites and, when a client is given,
+    LLM rewrites.
+
+    Args:
+        query: Cleaned query
+        llm_client: Optional client for LLM rewrites
+        max_variants: Maximum number of variants (default: QUERY_EXPANSION_MAX_VARIANTS)
+
+    Returns:
+        Unique variants, original first
+    """
+    max_variants = max_variants or settings.QUERY_EXPANSION_MAX_VARIANTS
+    candidates = [query, fold_accents(query)]
+    segmented = segment(query)
+    if segmented:
+        candidates.append(segmented)
+    candidates.extend(synonym_rewrites(query))
+    if llm_client is not None:
+        candidates.extend(llm_rewrites(query, llm_client))
+
+    variants: List[str] = []
+    for candidate in candidates:
+        candidate = candidate.strip()
+        if candidate and candidate not in variants:
+            variants.append(candidate)
+    return variants[:max_variants]
@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+from qdrant_client.http.models import Filter, FieldCondition, IsEmptyCondition, MatchAny, PayloadField
+from sqlalchemy import false, func, not_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models import Document, DocumentAccess, DocumentAccessLevel, DocumentStatus, User, UserRole
+from app.models.enums import DocumentAccessStatus
+from app.services.llm import RAGPromptManager, create_llm_provider
+
+logger = logging.getLogger(__name__)
+
+# Collection holding all document chunks (see VectorStore.COLLECTION_NAME)
+COLLECTION_NAME = "senselib"
+
+class StageTimer:
+    """Collects wall-clock durations (ms) of pipeline stages"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    def server_timing(self) -> str:
+        """Format timings as a Server-Timing header value"""
+        return ", ".join(f"{name};dur={duration}" for name, duration in self.timings.items())
+
+class RAGPipeline:
+    """
+    Question answering over the library: clean -> expand -> embed ->
+    retrieve (fused across query variants, pre-filtered by access) ->
+    rerank -> generate.
+
+    Model calls (query cleaning, embedding, cross-encoder, LLM) and the
+    synchronous Qdrant client run in worker threads so the event loop stays
+    free; access checks use the async database session.
+    """
+
+    def __init__(self):
+        self._manager: Optional[RAGPromptManager] = None
+
+    @property
+    def manager(self) -> RAGPromptManager:
+        if self._manager is None:
+            self._manager = RAGPromptManager(create_llm_provider("grok", settings.GROK_API_KEY))
+        return self._manager
+
+    @staticmethod
+    def _readable_clause(user: User):
+        """SQL condition on Document for documents the user may read (None for admins)"""
+        if user.role == UserRole.ADMIN:
+            return None
+        now = datetime.now(timezone.utc)
+        granted = (
+            select(DocumentAccess.document_id)
+            .where(
+                DocumentAccess.user_id == user.id,
+                DocumentAccess.status == DocumentAccessStatus.ACTIVE,
+                or_(DocumentAccess.expiry_date.is_(None), DocumentAccess.expiry_date > now)
+            )
+        )
+        return (Document.status != DocumentStatus.REJECTED) & or_(
+            Document.access_level == DocumentAccessLevel.PUBLIC,
+            Document.added_by == user.id,
+            (Document.access_level == DocumentAccessLevel.RESTRICTED) & Document.id.in_(granted)
+        )
+
+    @classmethod
+    async def _allowed_file_hashes(cls, db: AsyncSession, user: User, file_hashes: Set[str]) -> Set[str]:
+        """Return the subset of file hashes whose documents the user may read"""
+        if not file_hashes:
+            return set()
+        query = select(Document.file_hash).where(Document.file_hash.in_(file_hashes))
+        readable = cls._readable_clause(user)
+        if readable is not None:
+            query = query.where(readable)
+        result = await db.execute(query)
+        return set(result.scalars().all())
+
+    @classmethod
+    async def _access_filter(cls, db: AsyncSession, user: User) -> Filter:
+        """
+        Qdrant pre-filter excluding chunks the user may not read.
+
+        The access level lives in the database, not in the chunk payloads,
+        so the filter lists the file hashes of unreadable documents (usually
+        far fewer than the readable ones) and drops chunks without a hash.
+        """
+        must_not = [IsEmptyCondition(is_empty=PayloadField(key="metadata.file_hash"))]
+        readable = cls._readable_clause(user)
+        if readable is not None:
+            result = await db.execute(
+                select(Document.file_hash).where(
+                    Document.file_hash.isnot(None),
+                    # NULL (e.g. no uploader) counts as not readable
+                    not_(func.coalesce(readable, false()))
+                )
+            )
+            denied = list(result.scalars().all())
+            if denied:
+                must_not.append(FieldCondition(key="metadata.file_hash", match=MatchAny(any=denied)))
+        return Filter(must_not=must_not)
+
+    async def retrieve(
+        self,
+        query: str,
+        user: User,
+        db: AsyncSession,
+        top_n: int = 5,
+        top_k: int = 15,
+        timer: Optional[StageTimer] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve and rerank the chunks the user is allowed to see.
+
+        Args:
+            query: User's question
+            user: Requesting user (access level is enforced per document)
+            db: Async database session
+            top_n: Number of chunks to return after reranking
+            top_k: Number of vector search candidates passed to the reranker
+            timer: Optional StageTimer collecting per-stage durations
+        """
+        from app.services.query import QueryProcessor
+        from app.services.retrieval import get_retriever_singleton, reciprocal_rank_fusion
+        from app.services.query_expansion import expand_query
+
+        timer = timer or StageTimer()
+
+        with timer.stage("clean"):
+            search_query = await asyncio.to_thread(QueryProcessor.clean_query, query) or query
+
+        with timer.stage("load"):
+            # Only slow on the first request of a worker (model loading)
+            retriever = await asyncio.to_thread(get_retriever_singleton)
+
+        with timer.stage("access"):
+            search_filter = await self._access_filter(db, user)
+
+        if settings.QUERY_EXPANSION_ENABLED:
+            with timer.stage("expand"):
+                llm_client = self.manager.client if settings.QUERY_EXPANSION_LLM else None
+                variants = await asyncio.to_thread(expand_query, search_query, llm_client)
+
+            with timer.stage("embed"):
+                query_vectors = await asyncio.to_thread(retriever.encode_queries, variants)
+
+            with timer.stage("retrieve"):
+                result_lists = await asyncio.to_thread(
+                    retriever.search_vectors_batch, COLLECTION_NAME, query_vectors, top_k,
+                    search_filter=search_filter
+                )
+                candidates = reciprocal_rank_fusion(result_lists)[:top_k]
+        else:
+            with timer.stage("embed"):
+                query_vector = await asyncio.to_thread(retriever.encode_query, search_query)
+
+            with timer.stage("retrieve"):
+                candidates = await asyncio.to_thread(
+                    retriever.search_vectors, COLLECTION_NAME, query_vector, top_k,
+                    search_filter=search_filter
+                )
+
+        with timer.stage("verify"):
+            # Safety net for chunks of documents deleted from the database,
+            # or whose access changed between the two queries
+            file_hashes = {doc["metadata"].get("file_hash") for doc in candidates}
+            allowed = await self._allowed_file_hashes(db, user, file_hashes)
+            candidates = [doc for doc in candidates if doc["metadata"].get("file_hash") in allowed]
+
+        with timer.stage("rerank"):
+            documents = await asyncio.to_thread(retriever.rerank, query, candidates, top_n)
+
+        return documents
+
+    async def answer(
+        self,
+        query: str,
+        user: User,
+        db: AsyncSession,
+        top_n: int = 5,
+        temperature: float = 0.1,
+        max_tokens: int = 500,
+        context: Optional[Dict[str, Any]] = None,
+        timer: Optional[StageTimer] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the whole pipeline and generate an answer.
+
+        Returns:
+            Dictionary with the answer, its sources and generation metadata
+        """
+        timer = timer or StageTimer()
+        documents = await self.retrieve(query, user, db, top_n=top_n, timer=timer)
+
+        with timer.stage("generate"):
+            result = await asyncio.to_thread(
+                self.manager.generate_answer,
+                query,
+                documents,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                model=settings.GROK_API_MODEL,
+                context=context
+            )
+
+        result["sources"] = [
+            {
+                "text": doc["text"],
+                "metadata": doc.get("metadata", {}),
+                "score": doc.get("score"),
+                "rerank_score": doc.get("rerank_score")
+            }
+            for doc in documents
+        ]
+        result["timings_ms"] = timer.timings
+        return result
+
+# Process-wide pipeline (the retriever and LLM clients are shared singletons)
+rag_pipeline = RAGPipeline()
@@ -1,11 +1,11 @@
 from typing import List, Dict, Optional, Any
-from sentence_transformers import SentenceTransformer, CrossEncoder
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue, MatchAny, Range
+from qdrant_client.http.models import Filter, FieldCondition, MatchValue, MatchAny, Range, SearchRequest
 import logging
+import threading
 import time
-import torch
 import os
+from app.core.config import settings
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -27,14 +27,19 @@ class Retriever:
         verbose: bool = False
     ):
         self.verbose = verbose
+
+        # Heavy ML dependencies are imported here so that importing this
+        # module (and the API routers) stays cheap
+        import torch
+        from sentence_transformers import SentenceTransformer, CrossEncoder
         
         # Check if CUDA is available
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         logger.info(f"Using device: {self.device}")
         
         # Initialize query embedding model
-        logger.info("Loading query embedding model: dangvantuan/vietnamese-embedding")
-        self.query_encoder = SentenceTransformer('dangvantuan/vietnamese-embedding')
+        logger.info(f"Loading query embedding model: {settings.EMBEDDING_MODEL_NAME}")
+        self.query_encoder = SentenceTransformer(settings.EMBEDDING_MODEL_NAME)
         self.query_encoder.to(self.device)
         
         # Initialize reranking model
@@ -159,6 +164,120 @@ class Retriever:
         
         return None
 
+    def encode_query(self, query: str):
+        """Embed a query with the query encoder (blocking)"""
+        return self.query_encoder.encode(
+            query,
+            convert_to_numpy=True
+        )
+
+    def search_vectors(
+        self,
+        collection_name: str,
+        query_vector,
+        limit: int,
+        score_threshold: float = 0.0,
+        search_filter: Optional[Filter] = None
+    ) -> List[Dict]:
+        """
+        Vector search in a collection, returning formatted results.
+        
+        Args:
+            collection_name: Name of the collection to search in
+            query_vector: Query embedding (numpy array or list)
+            limit: Maximum number of results
+            score_threshold: Minimum similarity score
+            search_filter: Optional Qdrant pre-filter
+        """
+        if hasattr(query_vector, "tolist"):
+            query_vector = query_vector.tolist()
+        results = self.client.search(
+            collection_name=collection_name,
+            query_vector=query_vector,
+            limit=limit,
+            score_threshold=score_threshold,
+            query_filter=search_filter
+        )
+
+        formatted_results = []
+        for result in results:
+            try:
+                # Extract text and metadata
+                payload = result.payload
+                formatted_results.append({
+                    "text": payload.get("text", ""),
+                    "metadata": payload.get("metadata", {}),
+                    "score": float(result.score),
+                    "id": str(result.id)
+                })
+            except Exception as e:
+                logger.error(f"Error formatting result: {str(e)}")
+                continue
+        return formatted_results
+
+    def encode_queries(self, queries: List[str]):
+        """Embed several query variants in one batched encoder call (blocking)"""
+        return self.query_encoder.encode(
+            queries,
+            convert_to_numpy=True
+        )
+
+    def search_vectors_batch(
+        self,
+        collection_name: str,
+        query_vectors,
+        limit: int,
+        score_threshold: float = 0.0,
+        search_filter: Optional[Filter] = None
+    ) -> List[List[Dict]]:
+        """
+        Search several query vectors in a single Qdrant request.
+        
+        Returns:
+            One list of formatted results per query vector
+        """
+        requests = [
+            SearchRequest(
+                vector=vector.tolist() if hasattr(vector, "tolist") else list(vector),
+                limit=limit,
+                score_threshold=score_threshold,
+                filter=search_filter,
+                with_payload=True
+            )
+            for vector in query_vectors
+        ]
+        batches = self.client.search_batch(collection_name=collection_name, requests=requests)
+        return [
+            [
+                {
+                    "text": (result.payload or {}).get("text", ""),
+                    "metadata": (result.payload or {}).get("metadata", {}),
+                    "score": float(result.score),
+                    "id": str(result.id)
+                }
+                for result in results
+            ]
+            for results in batches
+        ]
+
+    def rerank(self, query: str, documents: List[Dict], top_n: Optional[int] = None) -> List[Dict]:
+        """
+        Score documents with the cross-encoder and sort them by rerank score.
+        
+        Args:
+            query: Search query text
+            documents: Formatted results (modified in place with "rerank_score")
+            top_n: Number of results to keep (all if None)
+        """
+        if not documents:
+            return []
+        rerank_pairs = [(query, doc["text"]) for doc in documents]
+        rerank_scores = self.reranker.predict(rerank_pairs)
+        for idx, score in enumerate(rerank_scores):
+            documents[idx]["rerank_score"] = float(score)
+        ranked = sorted(documents, key=lambda x: x["rerank_score"], reverse=True)
+        return ranked[:top_n] if top_n is not None else ranked
+
     def retrieve_documents(
         self,
         query: str,
@@ -198,10 +317,7 @@ class Retriever:
             if self.verbose:
                 logger.info("Generating query embedding...")
                 
-            query_embedding = self.query_encoder.encode(
-                query,
-                convert_to_numpy=True
-            )
+            query_embedding = self.encode_query(query)
             
             # Step 3: Vector search with optional pre-filtering
             if self.verbose:
@@ -210,63 +326,30 @@ class Retriever:
                     logger.info("Using combined pre-filtering and vector search")
                     
             try:
-                results = self.client.search(
-                    collection_name=collection_name,
-                    query_vector=query_embedding.tolist(),
+                formatted_results = self.search_vectors(
+                    collection_name,
+                    query_embedding,
                     limit=top_k * 2,  # Get more results for reranking
                     score_threshold=score_threshold,
-                    query_filter=search_filter
+                    search_filter=search_filter
                 )
                 
-                if not results:
+                if not formatted_results:
                     logger.info("No results found with pre-filtering and vector search")
                     return []
                     
-                logger.info(f"Retrieved {len(results)} documents")
+                logger.info(f"Retrieved {len(formatted_results)} documents")
                 
             except Exception as e:
                 logger.error(f"Error during vector search: {str(e)}")
                 return []
-                
-            # Step 4: Format results for reranking
-            formatted_results = []
-            for result in results:
-                try:
-                    # Extract text and metadata
-                    payload = result.payload
-                    text = payload.get("text", "")
-                    metadata = payload.get("metadata", {})
                     
-                    # Add to formatted results
-                    formatted_results.append({
-                        "text": text,
-                        "metadata": metadata,
-                        "score": float(result.score),
-                        "id": str(result.id)
-                    })
-                except Exception as e:
-                    logger.error(f"Error formatting result: {str(e)}")
-                    continue
-                    
-            # Step 5: Rerank results
-            if formatted_results:
-                if self.verbose:
-                    logger.info(f"Reranking {len(formatted_results)} documents")
-                    
-                # Prepare pairs for reranking
-                rerank_pairs = [(query, doc["text"]) for doc in formatted_results]
-                rerank_scores = self.reranker.predict(rerank_pairs)
-                
-                # Add rerank scores and sort
-                for idx, score in enumerate(rerank_scores):
-                    formatted_results[idx]["rerank_score"] = float(score)
-                
-                # Sort by rerank score and take top_k
-                formatted_results.sort(key=lambda x: x["rerank_score"], reverse=True)
-                formatted_results = formatted_results[:top_k]
-                
-                if self.verbose:
-                    logger.info(f"Final results after reranking: {len(formatted_results)}")
+            # Step 4: Rerank results
+            if self.verbose:
+                logger.info(f"Reranking {len(formatted_results)} documents")
+            formatted_results = self.rerank(query, formatted_results, top_k)
+            if self.verbose:
+                logger.info(f"Final results after reranking: {len(formatted_results)}")
                     
             # Log timing if verbose
             if self.verbose:
@@ -327,15 +410,7 @@ class Retriever:
             return []
 
         # Rerank all results together
-        rerank_pairs = [(query, doc["text"]) for doc in all_results]
-        rerank_scores = self.reranker.predict(rerank_pairs)
-
-        # Add rerank scores to results
-        for idx, score in enumerate(rerank_scores):
-            all_results[idx]["rerank_score"] = float(score)
-
-        # Sort by rerank score
-        all_results.sort(key=lambda x: x["rerank_score"], reverse=True)
+        all_results = self.rerank(query, all_results)
 
         # Apply merge strategy
         if merge_strategy == "round_robin" and len(collection_names) > 1:
@@ -362,19 +437,40 @@ class Retriever:
 
         return all_results 
 
+def reciprocal_rank_fusion(result_lists: List[List[Dict]], k: int = 60) -> List[Dict]:
+    """
+    Fuse ranked result lists with Reciprocal Rank Fusion.
+
+    Each point scores sum(1 / (k + rank)) over the lists it appears in; its
+    best vector score is kept in "score" and the fused one in "fusion_score".
+    """
+    fused: Dict[str, Dict] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, 1):
+            entry = fused.get(result["id"])
+            if entry is None:
+                entry = fused[result["id"]] = {**result, "fusion_score": 0.0}
+            entry["fusion_score"] += 1.0 / (k + rank)
+            entry["score"] = max(entry["score"], result["score"])
+    return sorted(fused.values(), key=lambda x: x["fusion_score"], reverse=True)
+
 # Singleton retriever instance
 _retriever_instance = None
+_retriever_lock = threading.Lock()
 
 def get_retriever_singleton(qdrant_url=None, qdrant_api_key=None, verbose=False):
     global _retriever_instance
-    if _retriever_instance is None:
-        # Nếu không truyền tham số thì lấy từ biến môi trường hoặc config
-        if qdrant_url is None or qdrant_api_key is None:
-            qdrant_url = os.getenv('QDRANT_URL')
-            qdrant_api_key = os.getenv('QDRANT_API_KEY')
-        _retriever_instance = Retriever(
-            qdrant_url=qdrant_url,
-            qdrant_api_key=qdrant_api_key,
-            verbose=verbose
-        )
+    # The lock keeps startup warm-up and a concurrent first request from
+    # loading the models twice
+    with _retriever_lock:
+        if _retriever_instance is None:
+            # Nếu không truyền tham số thì lấy từ biến môi trường hoặc config
+            if qdrant_url is None or qdrant_api_key is None:
+                qdrant_url = os.getenv('QDRANT_URL')
+                qdrant_api_key = os.getenv('QDRANT_API_KEY')
+            _retriever_instance = Retriever(
+                qdrant_url=qdrant_url,
+                qdrant_api_key=qdrant_api_key,
+                verbose=verbose
+            )
     return _retriever_instance 
\ No newline at end of file
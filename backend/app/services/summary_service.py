@@ -1,18 +1,28 @@
 import logging
 import aiohttp
 import asyncio
-import ssl
-import certifi
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, retry_if_exception_message
 from app.core.config import settings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.core.http_client import llm_http_client
+from app.core.rate_limiter import llm_rate_limiter, parse_retry_after, BATCH
+from app.services.tokenization import estimate_request_tokens, estimate_tokens, truncate_to_tokens, create_summary_splitter
+from app.services.llm_cache import llm_response_cache
 from contextlib import asynccontextmanager
-from typing import List, Tuple, Union
+from typing import List, Optional, Tuple, Union
 from datetime import datetime
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Separator between summaries fed to a reduce call
+SUMMARY_SEPARATOR = "\n\n"
+
+# Prompt template versions, part of the LLM response cache key; bump one
+# whenever its prompt or generation parameters change
+CHUNK_PROMPT_VERSION = "chunk-v1"
+CHUNK_FALLBACK_PROMPT_VERSION = "chunk-fallback-v1"
+REDUCE_PROMPT_VERSION = "reduce-v1"
+
 class SummaryService:
     def __init__(self):
         logger.info("Initializing SummaryService with Grok API")
@@ -20,32 +30,11 @@ class SummaryService:
         self.api_url = settings.GROK_API_URL
         self.api_model = settings.GROK_API_MODEL
         
-        # Optimize text splitter for larger chunks and less overlap
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.SUMMARY_CHUNK_SIZE * 1.5,  # Increase chunk size by 50%
-            chunk_overlap=settings.SUMMARY_CHUNK_OVERLAP // 2,  # Reduce overlap by 50%
-            length_function=len,
-            is_separator_regex=False,
-            separators=["\n\n", "\n", ".", "!", "?"]
-        )
-        
-        # Create SSL context
-        self.ssl_context = ssl.create_default_context(cafile=certifi.where())
-        self.ssl_context.check_hostname = False
-        self.ssl_context.verify_mode = ssl.CERT_NONE
-        
-        # Optimize connector settings for better performance
-        self.connector = aiohttp.TCPConnector(
-            ssl=self.ssl_context,
-            limit=20,  # Increased from 10 to 20 concurrent connections
-            ttl_dns_cache=600,  # Cache DNS for 10 minutes (increased from 5)
-            force_close=False,
-            keepalive_timeout=1800,  # Keep connections alive for 30 minutes (increased from 20)
-            enable_cleanup_closed=True
-        )
+        # Chunks are sized in LLM tokens so each call has a predictable size
+        self.text_splitter = create_summary_splitter()
         
-        # Increase concurrent API calls limit
-        self.semaphore = asyncio.Semaphore(8)  # Increased from 5 to 8 concurrent API calls
+        # Concurrency and request/token rates are governed process-wide by
+        # llm_rate_limiter (shared with RAG answers, which take priority)
         
         # Progress tracking
         self.processed_chunks = 0
@@ -54,95 +43,219 @@ class SummaryService:
     
     @asynccontextmanager
     async def get_session(self):
-        """Context manager for creating and managing aiohttp sessions"""
-        session = aiohttp.ClientSession(connector=self.connector)
-        try:
-            yield session
-        finally:
-            await session.close()
+        """Yield the app-wide aiohttp session (it is closed by the app lifespan, not here)"""
+        yield await llm_http_client.get_session()
     
-    async def _summarize_chunk_safe(self, session: aiohttp.ClientSession, chunk: str, index: int) -> Union[Tuple[int, str], Exception]:
+    async def _get_cached(self, template_version: str, text: str) -> Optional[str]:
+        return await asyncio.to_thread(llm_response_cache.get, self.api_model, template_version, text)
+
+    async def _set_cached(self, template_version: str, text: str, response: str) -> None:
+        await asyncio.to_thread(llm_response_cache.set, self.api_model, template_version, text, response)
+
+    async def _summarize_chunk_safe(
+        self,
+        session: aiohttp.ClientSession,
+        chunk: str,
+        index: int
+    ) -> Union[Tuple[int, str], Exception]:
         """Safe wrapper for chunk summarization that doesn't throw exceptions"""
-        async with self.semaphore:  # Limit concurrent API calls
-            try:
-                logger.info(f"Processing chunk {index + 1}/{self.total_chunks}")
+        try:
+            logger.info(f"Processing chunk {index + 1}/{self.total_chunks}")
+            # A summary from either prompt is good enough for a chunk
+            cached = (
+                await self._get_cached(CHUNK_PROMPT_VERSION, chunk)
+                or await self._get_cached(CHUNK_FALLBACK_PROMPT_VERSION, chunk)
+            )
+            if cached is not None:
+                logger.info(f"Using cached summary for chunk {index + 1}")
+                result = (index, cached)
+            else:
                 result = await self._summarize_chunk(session, chunk, index)
-                self.processed_chunks += 1
-                elapsed = (datetime.now() - self.start_time).total_seconds()
-                logger.info(f"Progress: {self.processed_chunks}/{self.total_chunks} chunks processed in {elapsed:.2f}s")
-                return result
-            except Exception as e:
-                logger.error(f"Error in _summarize_chunk_safe for chunk {index}: {str(e)}")
-                return e
+            self.processed_chunks += 1
+            elapsed = (datetime.now() - self.start_time).total_seconds()
+            logger.info(f"Progress: {self.processed_chunks}/{self.total_chunks} chunks processed in {elapsed:.2f}s")
+            return result
+        except Exception as e:
+            logger.error(f"Error in _summarize_chunk_safe for chunk {index}: {str(e)}")
+            return e
     
-    async def _summarize_chunk_fallback_safe(self, session: aiohttp.ClientSession, chunk: str, index: int) -> Union[Tuple[int, str], Exception]:
+    async def _summarize_chunk_fallback_safe(
+        self,
+        session: aiohttp.ClientSession,
+        chunk: str,
+        index: int
+    ) -> Union[Tuple[int, str], Exception]:
         """Safe wrapper for fallback chunk summarization that doesn't throw exceptions"""
-        async with self.semaphore:  # Limit concurrent API calls
-            try:
-                logger.info(f"Processing failed chunk {index + 1}/{self.total_chunks} with fallback method")
+        try:
+            logger.info(f"Processing failed chunk {index + 1}/{self.total_chunks} with fallback method")
+            cached = await self._get_cached(CHUNK_FALLBACK_PROMPT_VERSION, chunk)
+            if cached is not None:
+                result = (index, cached)
+            else:
                 result = await self._summarize_chunk_fallback(session, chunk, index)
-                self.processed_chunks += 1
-                elapsed = (datetime.now() - self.start_time).total_seconds()
-                logger.info(f"Progress: {self.processed_chunks}/{self.total_chunks} chunks processed in {elapsed:.2f}s")
-                return result
-            except Exception as e:
-                logger.error(f"Error in _summarize_chunk_fallback_safe for chunk {index}: {str(e)}")
-                return e
+            self.processed_chunks += 1
+            elapsed = (datetime.now() - self.start_time).total_seconds()
+            logger.info(f"Progress: {self.processed_chunks}/{self.total_chunks} chunks processed in {elapsed:.2f}s")
+            return result
+        except Exception as e:
+            logger.error(f"Error in _summarize_chunk_fallback_safe for chunk {index}: {str(e)}")
+            return e
     
+    async def _post_chat(self, session: aiohttp.ClientSession, data: dict, timeout: float) -> dict:
+        """POST a chat completion through the shared LLM rate limiter"""
+        tokens = estimate_request_tokens(
+            [message["content"] for message in data["messages"]],
+            data.get("max_tokens", 0)
+        )
+        async with llm_rate_limiter.limit(tokens, priority=BATCH) as permit:
+            async with session.post(
+                self.api_url,
+                json=data,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                timeout=timeout
+            ) as response:
+                if response.status in (429, 503):
+                    # Back off every caller, not just this retry loop
+                    llm_rate_limiter.note_rate_limited(parse_retry_after(response.headers.get("Retry-After")))
+                response.raise_for_status()
+                result = await response.json()
+            permit.record_usage(result.get("usage", {}).get("total_tokens"))
+        return result
+
     async def _create_final_summary(self, combined_summaries: str) -> str:
         try:
-            # Optimize final connector settings
-            final_connector = aiohttp.TCPConnector(
-                ssl=self.ssl_context,
-                limit=2,  # Increased from 1 to 2
-                ttl_dns_cache=600,
-                force_close=False,
-                keepalive_timeout=1800
-            )
+            session = await llm_http_client.get_session()
+
+            # Optimized prompt for faster final summary
+            prompt = f"""Tạo bài tóm tắt mạch lạc ({settings.SUMMARY_MAX_LENGTH} từ) từ các đoạn sau:
+            {combined_summaries}"""
             
-            # Optimize timeout settings
-            timeout = aiohttp.ClientTimeout(total=900)  # Reduced from 1200 to 900 seconds
+            data = {
+                "model": self.api_model,
+                "messages": [
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": 0.5,  # Reduced from 0.7
+                "max_tokens": settings.SUMMARY_MAX_LENGTH
+            }
             
-            async with aiohttp.ClientSession(
-                connector=final_connector,
-                timeout=timeout,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                    "User-Agent": "SenseLib/1.0",
-                    "Connection": "keep-alive"
-                }
-            ) as session:
-                # Optimized prompt for faster final summary
-                prompt = f"""Tạo bài tóm tắt mạch lạc ({settings.SUMMARY_MAX_LENGTH} từ) từ các đoạn sau:
-                {combined_summaries}"""
-                
-                data = {
-                    "model": self.api_model,
-                    "messages": [
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.5,  # Reduced from 0.7
-                    "max_tokens": settings.SUMMARY_MAX_LENGTH
-                }
-                
-                logger.info("Sending request for final summary generation...")
-                async with session.post(
-                    self.api_url,
-                    json=data,
-                    timeout=300,  # Reduced from 600 to 300 seconds
-                    raise_for_status=True
-                ) as response:
-                    result = await response.json()
-                    logger.info("Received response for final summary")
-                    return result["choices"][0]["message"]["content"].strip()
+            logger.info("Sending request for final summary generation...")
+            result = await self._post_chat(session, data, timeout=300)  # Reduced from 600 to 300 seconds
+            logger.info("Received response for final summary")
+            return result["choices"][0]["message"]["content"].strip()
                     
         except Exception as e:
             logger.error(f"Error in final summary generation: {str(e)}")
             raise
-        finally:
-            if 'final_connector' in locals():
-                await final_connector.close()
+
+    @staticmethod
+    def _group_summaries(summaries: List[str], max_tokens: int, fan_in: int) -> List[List[str]]:
+        """
+        Split summaries, in order, into batches of at most `fan_in` items
+        whose combined size stays within `max_tokens`.
+        """
+        groups: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for summary in summaries:
+            tokens = estimate_tokens(summary)
+            if current and (len(current) >= fan_in or current_tokens + tokens > max_tokens):
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(summary)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+        return groups
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=(
+            retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError)) |
+            retry_if_exception_message(match="502 Bad Gateway") |
+            retry_if_exception_message(match="503 Service Unavailable")
+        )
+    )
+    async def _reduce_batch(self, session: aiohttp.ClientSession, summaries: List[str]) -> str:
+        """Merge a batch of consecutive summaries into one intermediate summary"""
+        batch_text = SUMMARY_SEPARATOR.join(summaries)
+        cached = await self._get_cached(REDUCE_PROMPT_VERSION, batch_text)
+        if cached is not None:
+            return cached
+
+        prompt = f"""Gộp các bản tóm tắt liên tiếp sau thành một bản tóm tắt ngắn gọn (khoảng 200-250 từ), giữ nguyên trình tự và các ý chính:
+            {batch_text}"""
+
+        data = {
+            "model": self.api_model,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": settings.SUMMARY_REDUCE_MAX_TOKENS
+        }
+
+        result = await self._post_chat(session, data, timeout=120)
+        merged = result["choices"][0]["message"]["content"].strip()
+        await self._set_cached(REDUCE_PROMPT_VERSION, batch_text, merged)
+        return merged
+
+    async def _reduce_summaries(
+        self,
+        summaries: List[str]
+    ) -> str:
+        """
+        Tree-structured reduce of chunk summaries.
+
+        Summaries are merged level by level in bounded batches until the
+        remainder fits a single final call, so every LLM call has a bounded
+        input and the total number of calls stays linear in the number of
+        chunks.
+
+        Args:
+            summaries: Chunk summaries in document order
+
+        Returns:
+            Text that fits SUMMARY_REDUCE_MAX_INPUT_TOKENS, ready for the final summary
+        """
+        max_tokens = settings.SUMMARY_REDUCE_MAX_INPUT_TOKENS
+        fan_in = max(2, settings.SUMMARY_REDUCE_FAN_IN)
+        level = 0
+
+        while len(summaries) > 1 and estimate_tokens(SUMMARY_SEPARATOR.join(summaries)) > max_tokens:
+            level += 1
+            groups = self._group_summaries(summaries, max_tokens, fan_in)
+            logger.info(f"Reduce level {level}: merging {len(summaries)} summaries in {len(groups)} batches")
+
+            session = await llm_http_client.get_session()
+
+            async def reduce_group(index: int, group: List[str]) -> str:
+                if len(group) == 1:
+                    return group[0]
+                try:
+                    merged = await self._reduce_batch(session, group)
+                except Exception as e:
+                    # Keep the tree shrinking even if one batch cannot be merged
+                    logger.error(f"Reduce level {level} batch {index + 1} failed: {str(e)}")
+                    merged = truncate_to_tokens(
+                        SUMMARY_SEPARATOR.join(group),
+                        max(settings.SUMMARY_REDUCE_MAX_TOKENS, max_tokens // fan_in)
+                    )
+                return merged
+
+            reduced = await asyncio.gather(*(reduce_group(i, group) for i, group in enumerate(groups)))
+            if len(reduced) == len(summaries):
+                # Every batch held a single summary that alone exceeds the
+                # budget; truncate instead of looping forever
+                reduced = [truncate_to_tokens(summary, max_tokens // len(reduced)) for summary in reduced]
+            summaries = list(reduced)
+
+        combined = SUMMARY_SEPARATOR.join(summaries)
+        return truncate_to_tokens(combined, max_tokens)
 
     async def generate_summary(self, text: str) -> str:
         """
@@ -215,13 +328,13 @@ class SummaryService:
             if not combined_summaries:
                 raise Exception("Failed to generate any valid summaries")
             
-            # Sort by original index and join summaries
+            # Sort by original index and reduce until the summaries fit one call
             combined_summaries.sort(key=lambda x: x[0])
-            final_text = "\n\n".join(summary for _, summary in combined_summaries)
+            final_text = await self._reduce_summaries([summary for _, summary in combined_summaries])
             
-            logger.info(f"Combined {len(combined_summaries)} chunk summaries into final text of length {len(final_text)}")
+            logger.info(f"Reduced {len(combined_summaries)} chunk summaries into final text of length {len(final_text)}")
             
-            # Generate final summary with new session
+            # Generate final summary
             logger.info("Generating final coherent summary")
             final_summary = await self._create_final_summary(final_text)
             
@@ -244,12 +357,6 @@ class SummaryService:
     )
     async def _summarize_chunk(self, session: aiohttp.ClientSession, chunk: str, chunk_index: int) -> tuple[int, str]:
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-                "User-Agent": "SenseLib/1.0"
-            }
-            
             # Optimized prompt for faster processing
             prompt = f"""Tóm tắt ngắn gọn (100-150 từ) đoạn văn sau, tập trung vào thông tin chính:
             {chunk}"""
@@ -263,16 +370,10 @@ class SummaryService:
                 "max_tokens": 200  # Reduced from 300
             }
             
-            async with session.post(
-                self.api_url,
-                json=data,
-                headers=headers,
-                timeout=45,  # Reduced from 60 to 45 seconds
-                raise_for_status=True
-            ) as response:
-                result = await response.json()
-                summary = result["choices"][0]["message"]["content"]
-                return (chunk_index, summary.strip())
+            result = await self._post_chat(session, data, timeout=45)  # Reduced from 60 to 45 seconds
+            summary = result["choices"][0]["message"]["content"].strip()
+            await self._set_cached(CHUNK_PROMPT_VERSION, chunk, summary)
+            return (chunk_index, summary)
                 
         except Exception as e:
             logger.error(f"Error summarizing chunk {chunk_index}: {str(e)}")
@@ -292,12 +393,6 @@ class SummaryService:
     async def _summarize_chunk_fallback(self, session: aiohttp.ClientSession, chunk: str, chunk_index: int) -> tuple[int, str]:
         """Fallback method for summarizing chunks that failed with the main method"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-                "User-Agent": "SenseLib/1.0"  # Add user agent
-            }
-            
             # Simpler prompt for fallback
             prompt = f"""Tóm tắt ngắn gọn đoạn văn bản sau (khoảng 100 từ):
             {chunk}"""
@@ -311,16 +406,10 @@ class SummaryService:
                 "max_tokens": 200
             }
             
-            async with session.post(
-                self.api_url,
-                json=data,
-                headers=headers,
-                timeout=60,  # Increased timeout
-                raise_for_status=True  # Raise exception for non-200 status codes
-            ) as response:
-                result = await response.json()
-                summary = result["choices"][0]["message"]["content"]
-                return (chunk_index, summary.strip())
+            result = await self._post_chat(session, data, timeout=60)  # Increased timeout
+            summary = result["choices"][0]["message"]["content"].strip()
+            await self._set_cached(CHUNK_FALLBACK_PROMPT_VERSION, chunk, summary)
+            return (chunk_index, summary)
                 
         except Exception as e:
             logger.error(f"Error in fallback summarization for chunk {chunk_index}: {str(e)}")
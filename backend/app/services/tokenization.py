@@ -0,0 +1,142 @@
+import logging
+import math
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Optional
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# BPE tokenizers average roughly four bytes of UTF-8 per token; Vietnamese
+# diacritics take two to three bytes each, so counting bytes rather than
+# characters keeps the estimate close for both Vietnamese and English text.
+BYTES_PER_TOKEN = 4
+
+# Per-message overhead added by the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap estimate of the number of LLM tokens in a text.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Estimated token count (at least 1 for non-empty text)
+    """
+    if not text:
+        return 0
+    return max(1, math.ceil(len(text.encode("utf-8")) / BYTES_PER_TOKEN))
+
+def estimate_request_tokens(prompts: Iterable[str], max_tokens: int = 0) -> int:
+    """
+    Estimate the tokens a chat completion will consume: the prompt
+    messages plus the completion budget.
+
+    Args:
+        prompts: Message contents sent to the model
+        max_tokens: Completion token limit of the request
+
+    Returns:
+        Estimated total token count
+    """
+    return sum(estimate_tokens(prompt) + MESSAGE_OVERHEAD_TOKENS for prompt in prompts) + max_tokens
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut a text so that estimate_tokens() of the result fits max_tokens.
+
+    Args:
+        text: Input text
+        max_tokens: Token budget
+
+    Returns:
+        The text, shortened at a UTF-8 character boundary if needed
+    """
+    data = text.encode("utf-8")
+    limit = max(0, max_tokens) * BYTES_PER_TOKEN
+    if len(data) <= limit:
+        return text
+    return data[:limit].decode("utf-8", errors="ignore")
+
+# Sentence-ish separators tried in order when splitting text into chunks
+CHUNK_SEPARATORS = ["\n\n", "\n", ". ", "! ", "? ", "; ", ", ", " ", ""]
+
+@lru_cache(maxsize=1)
+def get_embedding_tokenizer() -> Optional[Any]:
+    """
+    Load the tokenizer of the embedding model (tokenizer files only, no
+    weights). Returns None if transformers is unavailable so callers can
+    fall back to estimate_tokens().
+    """
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(settings.EMBEDDING_MODEL_NAME)
+    except Exception as e:
+        logger.warning(f"Embedding tokenizer unavailable, using token estimate: {str(e)}")
+        return None
+
+def embedding_token_length(text: str) -> int:
+    """Number of embedding-model tokens in a text, excluding special tokens"""
+    tokenizer = get_embedding_tokenizer()
+    if tokenizer is None:
+        return estimate_tokens(text)
+    return len(tokenizer.encode(text, add_special_tokens=False))
+
+def embedding_max_tokens() -> int:
+    """
+    Largest chunk (in tokens) the embedding model encodes without
+    truncation: EMBEDDING_CHUNK_SIZE capped by the model's input limit.
+    """
+    limit = settings.EMBEDDING_CHUNK_SIZE
+    tokenizer = get_embedding_tokenizer()
+    model_max = getattr(tokenizer, "model_max_length", None) if tokenizer is not None else None
+    # Tokenizers without a configured limit report a huge sentinel value
+    if model_max and model_max < 100000:
+        # Leave room for the <s> and </s> special tokens
+        limit = min(limit, model_max - 2)
+    return limit
+
+def _token_splitter(chunk_tokens: int, overlap_tokens: int, length_function: Callable[[str], int]) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_tokens,
+        chunk_overlap=min(overlap_tokens, chunk_tokens // 2),
+        length_function=length_function,
+        is_separator_regex=False,
+        separators=CHUNK_SEPARATORS
+    )
+
+def create_embedding_splitter(
+    chunk_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None
+) -> RecursiveCharacterTextSplitter:
+    """
+    Splitter for index chunks, measured with the embedding model's tokenizer.
+
+    Args:
+        chunk_tokens: Maximum tokens per chunk (default: embedding_max_tokens())
+        overlap_tokens: Overlap between chunks (default: EMBEDDING_CHUNK_OVERLAP)
+    """
+    return _token_splitter(
+        chunk_tokens or embedding_max_tokens(),
+        settings.EMBEDDING_CHUNK_OVERLAP if overlap_tokens is None else overlap_tokens,
+        embedding_token_length
+    )
+
+def create_summary_splitter(
+    chunk_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None
+) -> RecursiveCharacterTextSplitter:
+    """
+    Splitter for summarization chunks, measured with the LLM token estimate.
+
+    Args:
+        chunk_tokens: Maximum tokens per chunk (default: SUMMARY_CHUNK_SIZE)
+        overlap_tokens: Overlap between chunks (default: SUMMARY_CHUNK_OVERLAP)
+    """
+    return _token_splitter(
+        chunk_tokens or settings.SUMMARY_CHUNK_SIZE,
+        settings.SUMMARY_CHUNK_OVERLAP if overlap_tokens is None else overlap_tokens,
+        estimate_tokens
+    )
@@ -0,0 +1,171 @@
+import io
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import wave
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Type
+from app.core.config import settings
+from app.utils.mp3 import mp3_duration_seconds
+
+logger = logging.getLogger(__name__)
+
+# Sentence ends (., !, ?, …, optionally followed by closing quotes/brackets) and line breaks
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])[\"'”’)\]]*\s+|\n+")
+# Fallback split points for sentences longer than a segment
+_CLAUSE_BOUNDARY = re.compile(r"(?<=[,;:])\s+")
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """Split an over-long sentence at clause boundaries, then at spaces"""
+    pieces: List[str] = []
+    for clause in _CLAUSE_BOUNDARY.split(sentence):
+        while len(clause) > max_chars:
+            cut = clause.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(clause[:cut].strip())
+            clause = clause[cut:].strip()
+        if clause:
+            pieces.append(clause)
+    return pieces
+
+def split_sentences(text: str, max_chars: Optional[int] = None) -> List[str]:
+    """
+    Split text into synthesis segments at sentence boundaries.
+
+    Consecutive sentences are packed into one segment up to max_chars so
+    short sentences do not each cost a synthesis call.
+
+    Args:
+        text: Text to split
+        max_chars: Maximum segment length (default: TTS_SEGMENT_MAX_CHARS)
+
+    Returns:
+        Non-empty segments in reading order
+    """
+    max_chars = max_chars or settings.TTS_SEGMENT_MAX_CHARS
+    segments: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_BOUNDARY.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        for piece in _split_long(sentence, max_chars) if len(sentence) > max_chars else [sentence]:
+            if current and len(current) + 1 + len(piece) > max_chars:
+                segments.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}" if current else piece
+    if current:
+        segments.append(current)
+    return segments
+
+class TTSEngine(ABC):
+    """
+    Text-to-speech backend.
+
+    synthesize() is blocking and must be safe to call from several worker
+    threads at once; AudioService runs it in its executor.
+    """
+
+    name = ""
+    extension = ""
+
+    @abstractmethod
+    def synthesize(self, text: str, language: str) -> bytes:
+        """Audio of one segment, in the engine's format"""
+
+    @abstractmethod
+    def concatenate(self, segments: List[bytes]) -> bytes:
+        """Join synthesized segments into one playable file"""
+
+    @abstractmethod
+    def duration_seconds(self, data: bytes) -> float:
+        """Playback length of synthesized audio"""
+
+class GTTSEngine(TTSEngine):
+    """Google Translate TTS (online), MP3 output"""
+
+    name = "gtts"
+    extension = "mp3"
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=language, slow=False).write_to_fp(buffer)
+        return buffer.getvalue()
+
+    def concatenate(self, segments: List[bytes]) -> bytes:
+        # gTTS returns bare MPEG frames (no ID3 header), which can be joined as is
+        return b"".join(segments)
+
+    def duration_seconds(self, data: bytes) -> float:
+        return mp3_duration_seconds(data)
+
+class EspeakEngine(TTSEngine):
+    """Local espeak-ng synthesis (offline), WAV output"""
+
+    name = "espeak"
+    extension = "wav"
+
+    def __init__(self):
+        self.binary = shutil.which(settings.TTS_ESPEAK_BINARY)
+        if not self.binary:
+            raise RuntimeError(f"TTS engine 'espeak' requires {settings.TTS_ESPEAK_BINARY} on PATH")
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        # Each call writes its own file, so calls run safely in parallel
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            subprocess.run(
+                [self.binary, "-v", language, "-w", path, "--stdin"],
+                input=text.encode("utf-8"),
+                check=True,
+                capture_output=True,
+                timeout=settings.TTS_SEGMENT_TIMEOUT_SECONDS
+            )
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+    def concatenate(self, segments: List[bytes]) -> bytes:
+        output = io.BytesIO()
+        with wave.open(output, "wb") as writer:
+            for index, segment in enumerate(segments):
+                with wave.open(io.BytesIO(segment), "rb") as reader:
+                    if index == 0:
+                        writer.setparams(reader.getparams())
+                    writer.writeframes(reader.readframes(reader.getnframes()))
+        return output.getvalue()
+
+    def duration_seconds(self, data: bytes) -> float:
+        return wav_duration_seconds(data)
+
+# Engines selectable with TTS_ENGINE
+TTS_ENGINES: Dict[str, Type[TTSEngine]] = {
+    GTTSEngine.name: GTTSEngine,
+    EspeakEngine.name: EspeakEngine,
+}
+
+def register_tts_engine(engine_class: Type[TTSEngine]) -> None:
+    """Make an engine available under its name (e.g. a site-specific local model)"""
+    TTS_ENGINES[engine_class.name] = engine_class
+
+def create_tts_engine(name: Optional[str] = None) -> TTSEngine:
+    """Instantiate the engine called name (default: TTS_ENGINE)"""
+    name = name or settings.TTS_ENGINE
+    try:
+        engine_class = TTS_ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown TTS engine '{name}', available: {', '.join(TTS_ENGINES)}")
+    return engine_class()
+
+def wav_duration_seconds(data: bytes) -> float:
+    """Exact duration of a WAV file"""
+    with wave.open(io.BytesIO(data), "rb") as reader:
+        return reader.getnframes() / float(reader.getframerate())
@@ -0,0 +1,141 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def normalize_tts_text(text: str) -> str:
+    """Canonical form of a segment: NFC, whitespace collapsed"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+class TTSSegmentCache:
+    """
+    Disk cache of synthesized segments.
+
+    Entries are keyed by (engine, voice_id, language, sha256(normalized
+    text)), so a sentence already spoken by the same voice is never sent to
+    the engine again, whichever document or chapter it comes from. Files
+    are evicted least-recently-used first once the directory grows past
+    max_bytes; a hit refreshes the file's mtime. The directory can be shared
+    by all worker processes on the host.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, enabled: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(engine: str, voice_id: Optional[str], language: str, text: str) -> str:
+        text_hash = hashlib.sha256(normalize_tts_text(text).encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{engine}\0{voice_id or ''}\0{language}\0{text_hash}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, extension: str) -> str:
+        # Two-level fan-out keeps directories small
+        return os.path.join(self.directory, key[:2], f"{key}.{extension}")
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                # In-flight writes (possibly another process's) are not entries
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        # Rescan: other processes write to the same directory
+        entries = sorted(self._entries())
+        size = sum(entry[1] for entry in entries)
+        # Evict down to 90% so eviction does not run on every write
+        target = int(self.max_bytes * 0.9)
+        for _, file_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+                size -= file_size
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+        self._size = size
+
+    def get(self, key: str, extension: str) -> Optional[bytes]:
+        """Return the cached audio of a segment, or None"""
+        if not self.enabled:
+            return None
+        path = self._path(key, extension)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except OSError as e:
+            # A broken cache must never break synthesis
+            logger.error(f"TTS cache read failed: {str(e)}")
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def set(self, key: str, extension: str, data: bytes) -> None:
+        """Store the audio of a segment, evicting old entries if needed"""
+        if not self.enabled or not data:
+            return
+        path = self._path(key, extension)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self.writes += 1
+                if self._size is None:
+                    self._size = sum(entry[1] for entry in self._entries())
+                else:
+                    self._size += len(data)
+                if self._size > self.max_bytes:
+                    self._evict()
+        except OSError as e:
+            logger.error(f"TTS cache write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "directory": self.directory,
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions
+            }
+
+# Process-wide TTS segment cache
+tts_segment_cache = TTSSegmentCache(
+    directory=settings.TTS_CACHE_DIR,
+    max_bytes=settings.TTS_CACHE_MAX_BYTES,
+    enabled=settings.TTS_CACHE_ENABLED
+)
@@ -1,11 +1,12 @@
 from typing import Optional, List, Dict, Any
 import time
 from datetime import datetime
-from sentence_transformers import SentenceTransformer
+from uuid import NAMESPACE_URL, uuid5
 from qdrant_client import QdrantClient, models
 from qdrant_client.http.models import Filter, FieldCondition, MatchValue
 import logging
 import numpy as np
+from app.core.config import settings
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -33,9 +34,10 @@ class VectorStore:
             
         self.verbose = verbose
         
-        # Initialize document embedding model
-        logger.info("Loading document embedding model: dangvantuan/vietnamese-embedding")
-        self.doc_encoder = SentenceTransformer('dangvantuan/vietnamese-embedding')
+        # Initialize document embedding model (imported lazily, it pulls in torch)
+        from sentence_transformers import SentenceTransformer
+        logger.info(f"Loading document embedding model: {settings.EMBEDDING_MODEL_NAME}")
+        self.doc_encoder = SentenceTransformer(settings.EMBEDDING_MODEL_NAME)
         self.doc_embedding_dim = self.doc_encoder.get_sentence_embedding_dimension()
         
         # Initialize Qdrant client
@@ -72,6 +74,13 @@ class VectorStore:
                 )
                 logger.info(f"Created collection: {self.COLLECTION_NAME}")
             
+            # RAG retrieval filters out unreadable documents by file hash
+            self.client.create_payload_index(
+                collection_name=self.COLLECTION_NAME,
+                field_name="metadata.file_hash",
+                field_schema=models.PayloadSchemaType.KEYWORD
+            )
+            
             return True
             
         except Exception as e:
@@ -82,7 +91,7 @@ class VectorStore:
         self,
         texts: List[str],
         metadata_list: Optional[List[Dict[str, Any]]] = None,
-        batch_size: int = 4
+        batch_size: int = 64
     ) -> bool:
         """
         Store text documents in the Qdrant Cloud collection.
@@ -116,21 +125,19 @@ class VectorStore:
                 batch_texts = texts[i:batch_end]
                 batch_metadata = metadata_list[i:batch_end]
                 
-                # Debug: print each chunk before encoding
-                print(f"[DEBUG] Batch {i//batch_size}: {len(batch_texts)} chunks")
-                for idx, text in enumerate(batch_texts):
-                    print(f"[DEBUG] Chunk {i+idx}: {repr(text)} (len={len(text)})")
+                logger.debug(f"Batch {i//batch_size}: {len(batch_texts)} chunks")
 
-                # Try encoding each chunk individually to catch errors
-                batch_embeddings = []
-                for idx, text in enumerate(batch_texts):
-                    try:
-                        emb = self.doc_encoder.encode([text], batch_size=1, convert_to_numpy=True, normalize_embeddings=True)
-                        batch_embeddings.append(emb[0])
-                        print(f"[DEBUG] Chunk {i+idx} encode OK")
-                    except Exception as e:
-                        print(f"[ERROR] Chunk {i+idx} encode FAIL: {e}")
-                        raise
+                # One encoder call per batch; the model pads and runs it as a single forward pass
+                try:
+                    batch_embeddings = self.doc_encoder.encode(
+                        batch_texts,
+                        batch_size=len(batch_texts),
+                        convert_to_numpy=True,
+                        normalize_embeddings=True
+                    )
+                except Exception as e:
+                    logger.error(f"Encoding chunks {i}-{batch_end - 1} failed: {str(e)}")
+                    raise
 
                 # Prepare points
                 points = []
@@ -145,8 +152,10 @@ class VectorStore:
                     if "id" not in metadata:
                         metadata["id"] = f"doc_{i+j}"
                     
+                    # Point ids derive from metadata ids, so chunks of different
+                    # documents never overwrite each other and re-imports upsert
                     point = models.PointStruct(
-                        id=i+j,
+                        id=str(uuid5(NAMESPACE_URL, str(metadata["id"]))),
                         vector=embedding.tolist(),
                         payload={
                             "text": text,
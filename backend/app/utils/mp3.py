@@ -0,0 +1,101 @@
+"""
+Duration of MP3 data from its MPEG audio frame headers.
+
+Only headers are read (no decoding), so probing a file costs one pass over
+its frame boundaries; exact for CBR and VBR streams alike.
+"""
+from typing import Optional, Tuple
+
+# Bitrates in kbit/s by (MPEG-1?, layer) and bitrate index
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# Sample rates by version bits (0: MPEG-2.5, 2: MPEG-2, 3: MPEG-1)
+_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+
+def _id3v2_size(data: bytes) -> int:
+    """Length of a leading ID3v2 tag (0 if there is none)"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def parse_frame_header(data: bytes, offset: int) -> Optional[Tuple[int, int, int]]:
+    """
+    Parse the frame header at offset.
+
+    Returns:
+        (frame length in bytes, samples per frame, sample rate), or None if
+        there is no valid header at offset
+    """
+    if offset + 4 > len(data):
+        return None
+    b1, b2 = data[offset + 1], data[offset + 2]
+    if data[offset] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version = (b1 >> 3) & 0x03
+    layer = 4 - ((b1 >> 1) & 0x03)
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        # Reserved values, or free format (not supported)
+        return None
+
+    mpeg1 = version == 3
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 0x01
+
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4, 384, sample_rate
+    if layer == 3 and not mpeg1:
+        return 72 * bitrate // sample_rate + padding, 576, sample_rate
+    return 144 * bitrate // sample_rate + padding, 1152, sample_rate
+
+def _is_info_frame(data: bytes, offset: int, frame_length: int) -> bool:
+    """Whether the frame at offset is a Xing/Info/VBRI header frame (no audio)"""
+    frame = data[offset:offset + frame_length]
+    return any(frame.find(tag, 4, 64) != -1 for tag in (b"Xing", b"Info", b"VBRI"))
+
+def mp3_duration_seconds(data: bytes) -> float:
+    """
+    Duration of MP3 data in seconds.
+
+    Concatenated streams (several files joined byte-wise) are handled, as
+    are ID3 tags and junk between frames.
+    """
+    offset = 0
+    total = 0.0
+    while offset < len(data):
+        header = parse_frame_header(data, offset)
+        if header is None:
+            tag_size = _id3v2_size(data[offset:offset + 10])
+            if tag_size:
+                offset += tag_size
+                continue
+            next_sync = data.find(b"\xff", offset + 1)
+            if next_sync == -1:
+                break
+            offset = next_sync
+            continue
+        frame_length, samples, sample_rate = header
+        if not _is_info_frame(data, offset, frame_length):
+            total += samples / sample_rate
+        offset += frame_length
+    return total
+
+def mp3_file_duration_seconds(path: str) -> float:
+    """Duration of an MP3 file in seconds"""
+    with open(path, "rb") as f:
+        return mp3_duration_seconds(f.read())
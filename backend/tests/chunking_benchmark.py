@@ -0,0 +1,68 @@
+"""
+Compare the old character-based splitters with the token-aware ones.
+
+Usage (from backend/, with the usual env vars set):
+    python tests/chunking_benchmark.py path/to/book.txt [more.txt ...]
+
+For each splitter it reports the number of chunks (= embedding inputs or
+LLM calls), the share of chunks longer than the budget (truncated by the
+embedding model / oversized LLM calls) and the mean budget utilisation.
+"""
+import os
+import sys
+import time
+
+# Run as a plain script: make backend/ importable so "app" resolves
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.core.config import settings
+from app.services.tokenization import (
+    create_embedding_splitter, create_summary_splitter, embedding_max_tokens,
+    embedding_token_length, estimate_tokens, get_embedding_tokenizer
+)
+
+def report(name, splitter, text, length_function, budget):
+    start = time.perf_counter()
+    chunks = splitter.split_text(text)
+    elapsed = time.perf_counter() - start
+    lengths = [length_function(chunk) for chunk in chunks]
+    over = sum(1 for length in lengths if length > budget)
+    utilisation = sum(min(length, budget) for length in lengths) / (budget * len(lengths)) if lengths else 0
+    print(
+        f"  {name:<28} chunks={len(chunks):<6} over_budget={over / max(1, len(chunks)):6.1%} "
+        f"utilisation={utilisation:6.1%} split_time={elapsed:.2f}s"
+    )
+
+def main(paths):
+    if get_embedding_tokenizer() is None:
+        print("NOTE: embedding tokenizer unavailable, embedding lengths use the LLM estimate")
+    embedding_budget = embedding_max_tokens()
+
+    # Splitters as configured before token-aware sizing
+    old_embedding = RecursiveCharacterTextSplitter(
+        chunk_size=512, chunk_overlap=200, length_function=len, is_separator_regex=False
+    )
+    old_summary = RecursiveCharacterTextSplitter(
+        chunk_size=3072 * 1.5, chunk_overlap=50, length_function=len,
+        is_separator_regex=False, separators=["\n\n", "\n", ".", "!", "?"]
+    )
+
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        print(f"{path}: {len(text)} chars, ~{estimate_tokens(text)} LLM tokens")
+
+        print(f" embedding chunks (budget {embedding_budget} model tokens)")
+        report("characters (512/200)", old_embedding, text, embedding_token_length, embedding_budget)
+        report("tokens", create_embedding_splitter(), text, embedding_token_length, embedding_budget)
+
+        print(f" summary chunks (budget {settings.SUMMARY_CHUNK_SIZE} LLM tokens)")
+        report("characters (4608/50)", old_summary, text, estimate_tokens, settings.SUMMARY_CHUNK_SIZE)
+        report("tokens", create_summary_splitter(), text, estimate_tokens, settings.SUMMARY_CHUNK_SIZE)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1:])